@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+"""Compare per-cycle dispatch overhead of set_process_callback and ProcessThreadDriver.
+
+The overhead is measured as the time between the start of the JACK cycle
+and the moment the Python code runs, from jack_frames_since_cycle_start().
+Results are printed as JSON on stdout.
+"""
+
+import json
+import sys
+import time
+
+import jacklib
+from jacklib.helpers import get_jack_status_error_string
+from jacklib.process_thread import ProcessThreadDriver
+
+
+def open_client(name):
+    status = jacklib.jack_status_t()
+    client = jacklib.client_open(name, jacklib.JackOptions.NO_START_SERVER, status)
+
+    if not client:
+        sys.exit("Error connecting to JACK server: %s" % get_jack_status_error_string(status))
+
+    return client
+
+
+def run(mode, duration):
+    client = open_client("bench-" + mode)
+    samplerate = jacklib.get_sample_rate(client)
+    delays = []
+
+    def hook(nframes):
+        delays.append(jacklib.frames_since_cycle_start(client))
+        return 0
+
+    if mode == "callback":
+        jacklib.set_process_callback(client, lambda nframes, arg: hook(nframes), None)
+    else:
+        driver = ProcessThreadDriver(client, [hook])
+        driver.register()
+
+    jacklib.activate(client)
+    time.sleep(duration)
+    jacklib.deactivate(client)
+    jacklib.client_close(client)
+
+    delays.sort()
+    to_usecs = 1e6 / samplerate
+    return {
+        "mode": mode,
+        "cycles": len(delays),
+        "mean_usecs": sum(delays) / len(delays) * to_usecs if delays else None,
+        "median_usecs": delays[len(delays) // 2] * to_usecs if delays else None,
+        "max_usecs": delays[-1] * to_usecs if delays else None,
+    }
+
+
+if __name__ == "__main__":
+    duration = float(sys.argv[1]) if len(sys.argv) > 1 else 5.0
+    print(json.dumps([run(mode, duration) for mode in ("callback", "thread")], indent=2))
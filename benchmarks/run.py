@@ -0,0 +1,318 @@
+#!/usr/bin/env python
+"""Benchmarks of pyjacklib hot paths.
+
+Run against a JACK server (for example 'jackd -d dummy') or, with
+'--backend fake', against the in-process fake libjack. Results are written
+as JSON (one object with metadata and a list of results), so runs of two
+releases can be compared by a script.
+
+    python benchmarks/run.py --backend fake -o results.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from ctypes import POINTER, byref, c_float, cast
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCHMARKS = []
+
+
+def benchmark(name, **params):
+    ''' register a benchmark, it is run once for each combination in params. '''
+    def decorator(func):
+        BENCHMARKS.append((name, func, params))
+        return func
+    return decorator
+
+
+def measure(func, number, repeat=5) -> float:
+    ''' best time of one call to func, in seconds. '''
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+class Context:
+    def __init__(self, jacklib, fake: bool):
+        self.jacklib = jacklib
+        self.fake = fake
+        self.client = self.open("pyjacklib-bench")
+
+    def open(self, name):
+        jacklib = self.jacklib
+        status = jacklib.jack_status_t()
+        client = jacklib.client_open(name, jacklib.JackOptions.NO_START_SERVER, status)
+        if not client:
+            sys.exit("Could not open JACK client, is a JACK server running?")
+        return client
+
+    def run_cycles(self, count):
+        if self.fake:
+            self.jacklib.jlib.run_cycles(count)
+        else:
+            nframes = self.jacklib.get_buffer_size(self.client)
+            time.sleep(count * nframes / self.jacklib.get_sample_rate(self.client))
+
+    def close(self):
+        self.jacklib.client_close(self.client)
+
+
+@benchmark("import_time")
+def bench_import(ctx):
+    code = "import time; t = time.perf_counter(); import jacklib; print(time.perf_counter() - t)"
+    # the jacklib of this tree, as imported by main()
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(
+        filter(None, (REPO_ROOT, os.environ.get("PYTHONPATH")))))
+    times = [
+        float(subprocess.check_output([sys.executable, "-c", code], env=env))
+        for _ in range(5)]
+    return {"seconds": min(times)}
+
+
+@benchmark("port_get_buffer")
+def bench_port_get_buffer(ctx):
+    jacklib = ctx.jacklib
+    port = jacklib.port_register(
+        ctx.client, "bench_buf", jacklib.JACK_DEFAULT_AUDIO_TYPE,
+        jacklib.JackPortFlags.IS_OUTPUT, 0)
+    nframes = jacklib.get_buffer_size(ctx.client)
+
+    def get_and_touch():
+        buf = cast(jacklib.port_get_buffer(port, nframes), POINTER(c_float))
+        buf[0] = buf[nframes - 1]
+
+    result = {
+        "call_seconds": measure(lambda: jacklib.port_get_buffer(port, nframes), 20000),
+        "call_and_access_seconds": measure(get_and_touch, 20000),
+    }
+    jacklib.port_unregister(ctx.client, port)
+    return result
+
+
+@benchmark("fastcall")
+def bench_fastcall(ctx):
+    jacklib = ctx.jacklib
+    from jacklib.fastcall import FastCalls, address
+
+    port = jacklib.port_register(
+        ctx.client, "bench_fast", jacklib.JACK_DEFAULT_AUDIO_TYPE,
+        jacklib.JackPortFlags.IS_OUTPUT, 0)
+    nframes = jacklib.get_buffer_size(ctx.client)
+    fast = FastCalls(ctx.client)
+    port_addr, client = address(port), ctx.client
+    port_get_buffer = jacklib.jlib.jack_port_get_buffer
+    frame_time = jacklib.jlib.jack_frame_time
+    fast_get_buffer, fast_frame_time = fast.port_get_buffer, fast.frame_time
+
+    result = {
+        "port_get_buffer_seconds": measure(lambda: port_get_buffer(port, nframes), 20000),
+        "fast_port_get_buffer_seconds": measure(lambda: fast_get_buffer(port_addr, nframes), 20000),
+        "frame_time_seconds": measure(lambda: frame_time(client), 20000),
+        "fast_frame_time_seconds": measure(fast_frame_time, 20000),
+    }
+    jacklib.port_unregister(ctx.client, port)
+    return result
+
+
+@benchmark("port_register", ports=(16, 256))
+def bench_port_register(ctx, ports):
+    jacklib = ctx.jacklib
+    flags = jacklib.JackPortFlags.IS_OUTPUT
+    specs = [("r%d" % i, jacklib.JACK_DEFAULT_AUDIO_TYPE, flags) for i in range(ports)]
+
+    def one_by_one():
+        registered = [jacklib.port_register(ctx.client, name, type_, flags, 0)
+                      for name, type_, flags in specs]
+        for port in registered:
+            jacklib.port_unregister(ctx.client, port)
+
+    def bulk():
+        jacklib.port_unregister_many(ctx.client, jacklib.port_register_many(ctx.client, specs))
+
+    return {"seconds": measure(one_by_one, 5, 3), "bulk_seconds": measure(bulk, 5, 3)}
+
+
+@benchmark("midi_throughput", events=(16, 256))
+def bench_midi(ctx, events):
+    jacklib = ctx.jacklib
+    port = jacklib.port_register(
+        ctx.client, "bench_midi", jacklib.JACK_DEFAULT_MIDI_TYPE,
+        jacklib.JackPortFlags.IS_OUTPUT, 0)
+    nframes = jacklib.get_buffer_size(ctx.client)
+    buf = jacklib.port_get_buffer(port, nframes)
+    event = jacklib.jack_midi_event_t()
+    step = max(1, nframes // events)
+
+    def write():
+        jacklib.midi_clear_buffer(buf)
+        for i in range(events):
+            data = jacklib.midi_event_reserve(buf, i * step % nframes, 3)
+            data[0], data[1], data[2] = 0x90, 60, 100
+
+    def read():
+        for i in range(jacklib.midi_get_event_count(buf)):
+            jacklib.midi_event_get(byref(event), buf, i)
+            bytes(event.buffer[:event.size])
+
+    write_time = measure(write, 200)
+    read_time = measure(read, 200)
+    jacklib.port_unregister(ctx.client, port)
+    return {"write_events_per_second": events / write_time,
+            "read_events_per_second": events / read_time}
+
+
+@benchmark("get_ports", ports=(1000, 10000))
+def bench_get_ports(ctx, ports):
+    jacklib = ctx.jacklib
+    from jacklib.helpers import c_char_p_p_to_list
+
+    registered = []
+    for i in range(ports):
+        port = jacklib.port_register(
+            ctx.client, "p%d" % i, jacklib.JACK_DEFAULT_AUDIO_TYPE,
+            jacklib.JackPortFlags.IS_OUTPUT, 0)
+        if not port:
+            break
+        registered.append(port)
+
+    seconds = measure(lambda: c_char_p_p_to_list(jacklib.get_ports(ctx.client)), 5, 3)
+    for port in registered:
+        jacklib.port_unregister(ctx.client, port)
+    return {"seconds": seconds, "registered_ports": len(registered)}
+
+
+@benchmark("get_all_properties", ports=(100, 1000))
+def bench_get_all_properties(ctx, ports):
+    jacklib = ctx.jacklib
+    registered = []
+    for i in range(ports):
+        port = jacklib.port_register(
+            ctx.client, "m%d" % i, jacklib.JACK_DEFAULT_AUDIO_TYPE,
+            jacklib.JackPortFlags.IS_OUTPUT, 0)
+        if not port:
+            break
+        uuid = jacklib.port_uuid(port)
+        jacklib.set_property(ctx.client, uuid, jacklib.JACK_METADATA_PRETTY_NAME,
+                             "Port %d" % i, "text/plain")
+        jacklib.set_property(ctx.client, uuid, jacklib.JACK_METADATA_ORDER, str(i),
+                             "http://www.w3.org/2001/XMLSchema#integer")
+        registered.append(port)
+
+    seconds = measure(jacklib.get_all_properties, 5, 3)
+    table_seconds = measure(jacklib.get_all_properties_table, 5, 3)
+    for port in registered:
+        jacklib.port_unregister(ctx.client, port)
+    return {"seconds": seconds, "table_seconds": table_seconds, "subjects": len(registered)}
+
+
+@benchmark("connect_disconnect")
+def bench_connect(ctx):
+    jacklib = ctx.jacklib
+    src = jacklib.port_register(
+        ctx.client, "c_out", jacklib.JACK_DEFAULT_AUDIO_TYPE, jacklib.JackPortFlags.IS_OUTPUT, 0)
+    dst = jacklib.port_register(
+        ctx.client, "c_in", jacklib.JACK_DEFAULT_AUDIO_TYPE, jacklib.JackPortFlags.IS_INPUT, 0)
+    jacklib.activate(ctx.client)
+    src_name, dst_name = jacklib.port_name(src), jacklib.port_name(dst)
+
+    def connect_disconnect():
+        jacklib.connect(ctx.client, src_name, dst_name)
+        jacklib.disconnect(ctx.client, src_name, dst_name)
+
+    seconds = measure(connect_disconnect, 100, 3)
+    jacklib.deactivate(ctx.client)
+    jacklib.port_unregister(ctx.client, src)
+    jacklib.port_unregister(ctx.client, dst)
+    return {"pairs_per_second": 1.0 / seconds}
+
+
+@benchmark("callback_dispatch")
+def bench_callback_dispatch(ctx):
+    jacklib = ctx.jacklib
+    client = ctx.open("pyjacklib-bench-cb")
+    calls = [0]
+
+    def process(nframes, arg):
+        calls[0] += 1
+        return 0
+
+    jacklib.set_process_callback(client, process, None)
+    jacklib.activate(client)
+    cycles = 2000 if ctx.fake else 200
+    start = time.perf_counter()
+    ctx.run_cycles(cycles)
+    elapsed = time.perf_counter() - start
+    jacklib.deactivate(client)
+    jacklib.client_close(client)
+
+    if not ctx.fake:
+        # against a real server only the call count is meaningful here,
+        # see bench_process_thread.py for dispatch latency.
+        return {"cycles": calls[0]}
+    return {"cycle_seconds": elapsed / cycles, "cycles": calls[0]}
+
+
+def main(args=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--backend", choices=("jack", "fake"), default="jack",
+                    help="run against libjack or the in-process fake backend")
+    ap.add_argument("-o", "--output", help="write JSON results to this file")
+    ap.add_argument("-k", "--filter", help="only run benchmarks whose name contains this")
+    opts = ap.parse_args(args)
+
+    if opts.backend == "fake":
+        os.environ["JACKLIB_BACKEND"] = "fake"
+
+    sys.path.insert(0, REPO_ROOT)
+    import jacklib
+
+    ctx = Context(jacklib, opts.backend == "fake")
+    results = []
+
+    for name, func, params in BENCHMARKS:
+        if opts.filter and opts.filter not in name:
+            continue
+
+        if params:
+            key, values = next(iter(params.items()))
+            runs = [{key: value} for value in values]
+        else:
+            runs = [{}]
+
+        for run_params in runs:
+            print("running %s %s" % (name, run_params), file=sys.stderr)
+            results.append({"name": name, "params": run_params,
+                            "metrics": func(ctx, **run_params)})
+
+    ctx.close()
+    output = {
+        "meta": {
+            "backend": opts.backend,
+            "jacklib_version": jacklib.__version__,
+            "jack_version": jacklib.get_version_string(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "time": time.time(),
+        },
+        "results": results,
+    }
+
+    if opts.output:
+        with open(opts.output, "w") as fp:
+            json.dump(output, fp, indent=2)
+    else:
+        json.dump(output, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -23,7 +23,10 @@ from ctypes import (
     pointer,
     POINTER,
     byref,
-    c_char_p
+    c_char_p,
+    c_void_p,
+    cast,
+    string_at
 )
 from typing import Iterator
 
@@ -48,9 +51,10 @@ from .types import (
     jack_session_command_t,
     JackThreadCallback,
     JackErrorCallback,
+    JackInfoCallback,
     JackTimebaseCallback
 )
-from .cb_setter import init_callback_setter, callback_setter
+from .cb_setter import init_callback_setter, callback_setter, release_callbacks
 
 jlib = get_jlib()
 
@@ -101,8 +105,15 @@ def get_version_string() -> str:
     return ''
 
 def client_open(client_name: str, options: JackOptions,
-                status: JackStatus, uuid="") -> 'pointer[jack_client_t]':
+                status: JackStatus, uuid="", server_name=None) -> 'pointer[jack_client_t]':
+    # NOTE - server_name is given to libjack as variadic argument,
+    # JackOptions.SERVER_NAME is added to options if it is not None.
     if jlib.jack_client_open:
+        if server_name is not None:
+            return jlib.jack_client_open(
+                _e(client_name), options | JackOptions.SERVER_NAME, status,
+                _e(server_name), _e(uuid) if uuid else None)
+
         return jlib.jack_client_open(
             _e(client_name), options, status,
             _e(uuid) if uuid else None)
@@ -117,7 +128,10 @@ def client_rename(client: 'pointer[jack_client_t]', new_name: str):
 
 def client_close(client: 'pointer[jack_client_t]') -> int:
     if jlib.jack_client_close:
-        return jlib.jack_client_close(client)
+        ret = jlib.jack_client_close(client)
+        release_callbacks(client)
+        _thread_callbacks.pop(cast(client, c_void_p).value, None)
+        return ret
 
     return -1
 
@@ -159,7 +173,8 @@ def is_realtime(client: 'pointer[jack_client_t]') -> int:
     return 0
 
 # Non-Callback API
-_thread_callback = None
+# thread callbacks per client address, released by client_close()
+_thread_callbacks = dict[int, JackThreadCallback]()
 
 def cycle_wait(client: 'pointer[jack_client_t]'):
     if jlib.jack_cycle_wait:
@@ -173,8 +188,8 @@ def cycle_signal(client: 'pointer[jack_client_t]', status: JackStatus):
 
 def set_process_thread(client: 'pointer[jack_client_t]', thread_callback, arg):
     if jlib.jack_set_process_thread:
-        global _thread_callback
         _thread_callback = JackThreadCallback(thread_callback)
+        _thread_callbacks[cast(client, c_void_p).value] = _thread_callback
         return jlib.jack_set_process_thread(client, _thread_callback, arg)
 
     return -1
@@ -270,6 +285,35 @@ def port_register(client, port_name, port_type, flags, buffer_size):
 def port_unregister(client, port):
     return jlib.jack_port_unregister(client, port)
 
+def port_register_many(client, specs, buffer_size=0):
+    # NOTE - this function has no equivalent in libjack
+    # specs is an iterable of (port_name, port_type, flags).
+    # Returns the list of registered ports, or None if one of them could not
+    # be registered, in which case the ones already registered are unregistered.
+    register = jlib.jack_port_register
+    types = {}
+    ports = []
+
+    for name, type_, flags in specs:
+        type_b = types.get(type_)
+        if type_b is None:
+            type_b = types[type_] = _e(type_)
+
+        port = register(client, _e(name), type_b, int(flags), buffer_size)
+        if not port:
+            port_unregister_many(client, ports)
+            return None
+
+        ports.append(port)
+
+    return ports
+
+def port_unregister_many(client, ports):
+    # NOTE - this function has no equivalent in libjack
+    # Ports are unregistered in reverse order, returns the number of failures.
+    unregister = jlib.jack_port_unregister
+    return sum(unregister(client, port) != 0 for port in reversed(ports))
+
 def port_get_buffer(port, nframes):
     return jlib.jack_port_get_buffer(port, nframes)
 
@@ -462,6 +506,7 @@ def get_time():
 # -------------------------------------------------------------------------------------------------
 # Misc
 _error_callback = None
+_info_callback = None
 
 def set_error_function(error_callback):
     global _error_callback
@@ -469,6 +514,12 @@ def set_error_function(error_callback):
         _error_callback = JackErrorCallback(error_callback)
         jlib.jack_set_error_function(_error_callback)
 
+def set_info_function(info_callback):
+    global _info_callback
+    if jlib.jack_set_info_function:
+        _info_callback = JackInfoCallback(info_callback)
+        jlib.jack_set_info_function(_info_callback)
+
 
 def free(ptr):
     return jlib.jack_free(ptr)
@@ -536,6 +587,57 @@ def midi_event_write(port_buffer, time, data, data_size):
 def midi_get_lost_event_count(port_buffer):
     return jlib.jack_midi_get_lost_event_count(port_buffer)
 
+# -------------------------------------------------------------------------------------------------
+# Internal clients
+
+def get_internal_client_name(client, intclient):
+    if not jlib.jack_get_internal_client_name:
+        return None
+
+    name = jlib.jack_get_internal_client_name(client, intclient)
+    if not name:
+        return None
+
+    try:
+        return _d(string_at(name))
+    finally:
+        free(name)
+
+def internal_client_handle(client, client_name, status):
+    if jlib.jack_internal_client_handle:
+        return jlib.jack_internal_client_handle(client, _e(client_name), status)
+
+    return 0
+
+def internal_client_load(client, client_name, options, status, load_name=None, load_init=None):
+    # NOTE - the variadic arguments of jack_internal_client_load are given as
+    # load_name and load_init, JackOptions.LOAD_NAME and LOAD_INIT are added
+    # to options accordingly.
+    if not jlib.jack_internal_client_load:
+        return 0
+
+    args = []
+    options = int(options) & ~(JackOptions.LOAD_NAME | JackOptions.LOAD_INIT)
+
+    if load_name is not None:
+        options |= JackOptions.LOAD_NAME
+        args.append(c_char_p(_e(load_name)))
+
+    if load_init is not None:
+        load_init = _e(load_init)
+        if len(load_init) >= JACK_LOAD_INIT_LIMIT:
+            raise ValueError("load_init must be shorter than %d bytes" % JACK_LOAD_INIT_LIMIT)
+        options |= JackOptions.LOAD_INIT
+        args.append(c_char_p(load_init))
+
+    return jlib.jack_internal_client_load(client, _e(client_name), options, status, *args)
+
+def internal_client_unload(client, intclient):
+    if jlib.jack_internal_client_unload:
+        return jlib.jack_internal_client_unload(client, intclient)
+
+    return int(JackStatus.FAILURE | JackStatus.NO_SUCH_CLIENT)
+
 # -------------------------------------------------------------------------------------------------
 # Session
 @callback_setter
@@ -642,24 +744,83 @@ def _decode_property(prop, encoding=ENCODING):
 
     return Property(key, value, type_)
 
-def get_all_properties(encoding=ENCODING):
+PropertyTable = namedtuple(
+    "PropertyTable", ("subjects", "keys", "values", "types", "key_names", "type_names"))
+PropertyTable.__doc__ = """ Columnar view of all properties, one row per property.
+
+    keys and types hold indices into key_names and type_names, where each
+    distinct key and type is decoded once. A property without type has the
+    type None. """
+
+def get_all_properties_table(encoding=ENCODING) -> PropertyTable:
+    subjects, keys, values, types = [], [], [], []
+    key_ids, key_names = {}, []
+    # raw type -> (type id, decode value)
+    type_ids, type_names = {None: (0, True)}, [None]
     descriptions = POINTER(jack_description_t)()
     ret = jlib.jack_get_all_properties(byref(descriptions))
-    results = {}
 
-    if ret != -1:
-        for p_idx in range(ret):
-            description = descriptions[p_idx]
+    try:
+        for d_idx in range(max(ret, 0)):
+            description = descriptions[d_idx]
+            try:
+                subject = description.subject
+                props = description.properties
+
+                for p_idx in range(description.property_cnt):
+                    prop = props[p_idx]
+                    key, value, type_ = prop.key, prop.data, prop.type
+
+                    key_id = key_ids.get(key)
+                    if key_id is None:
+                        key_id = key_ids[key] = len(key_names)
+                        try:
+                            key_names.append(_d(key, encoding))
+                        except UnicodeDecodeError:
+                            key_names.append(key)
+
+                    type_info = type_ids.get(type_)
+                    if type_info is None:
+                        # same rules as _decode_property()
+                        type_name, decode_value = type_, True
+                        if type_:
+                            try:
+                                type_name = _d(type_, encoding)
+                            except UnicodeDecodeError:
+                                pass
+                            else:
+                                decode_value = type_.startswith(b"text/")
+                        type_info = type_ids[type_] = (len(type_names), decode_value)
+                        type_names.append(type_name)
+
+                    if type_info[1] and encoding:
+                        try:
+                            value = value.decode(encoding)
+                        except UnicodeDecodeError:
+                            pass
+
+                    subjects.append(subject)
+                    keys.append(key_id)
+                    values.append(value)
+                    types.append(type_info[0])
+            finally:
+                free_description(description, 0)
+    finally:
+        free(descriptions)
+
+    return PropertyTable(subjects, keys, values, types, key_names, type_names)
 
-            if description.property_cnt:
-                results[description.subject] = [
-                    _decode_property(description.properties[p_idx], encoding)
-                    for p_idx in range(description.property_cnt)
-                ]
+def get_all_properties(encoding=ENCODING):
+    table = get_all_properties_table(encoding)
+    key_names, type_names = table.key_names, table.type_names
+    results = {}
 
-            free_description(description, 0)
+    for subject, key, value, type_ in zip(table.subjects, table.keys, table.values, table.types):
+        props = results.get(subject)
+        if props is None:
+            props = results[subject] = []
+        props.append(Property(key_names[key], value, type_names[type_]))
 
-    free(descriptions)
     return results
 
 def get_properties(subject, encoding=ENCODING):
@@ -674,11 +835,22 @@ def get_properties(subject, encoding=ENCODING):
     free_description(byref(description), 0)
     return results
 
-def get_client_properties(client, client_uuid, encoding=ENCODING):
+def _client_uuid(client, client_uuid):
+    # client_uuid may be a client name, a UUID string (bytes), or an already
+    # parsed jack_uuid_t / int (see clients.ClientDirectory).
+    if isinstance(client_uuid, jack_uuid_t):
+        return client_uuid
+
+    if isinstance(client_uuid, int):
+        return jack_uuid_t(client_uuid)
+
     if isinstance(client_uuid, str):
         client_uuid = get_uuid_for_client_name(client, client_uuid)
 
-    return get_properties(uuid_parse(client_uuid), encoding)
+    return uuid_parse(client_uuid)
+
+def get_client_properties(client, client_uuid, encoding=ENCODING):
+    return get_properties(_client_uuid(client, client_uuid), encoding)
 
 def get_port_properties(client, port, encoding=ENCODING):
     if not isinstance(port, POINTER(jack_port_t)):
@@ -723,10 +895,7 @@ def get_property(subject, key, encoding=ENCODING):
         return Property(key, value, type_)
 
 def get_client_property(client, client_uuid, key, encoding=ENCODING):
-    if isinstance(client_uuid, str):
-        client_uuid = get_uuid_for_client_name(client, client_uuid)
-
-    return get_property(uuid_parse(client_uuid), key, encoding)
+    return get_property(_client_uuid(client, client_uuid), key, encoding)
 
 def get_port_property(client, port, key, encoding=ENCODING):
     if not isinstance(port, POINTER(jack_port_t)):
@@ -739,16 +908,13 @@ def get_port_pretty_name(client, port, encoding=ENCODING):
     return prop.value if prop else None
 
 def remove_all_properties(client):
-    return jlib.jack_remove_property(client)
+    return jlib.jack_remove_all_properties(client)
 
 def remove_properties(client, subject):
-    return jlib.jack_remove_property(client, subject)
+    return jlib.jack_remove_properties(client, subject)
 
 def remove_client_properties(client, client_uuid):
-    if isinstance(client_uuid, str):
-        client_uuid = get_uuid_for_client_name(client, client_uuid)
-
-    return remove_properties(client, uuid_parse(client_uuid))
+    return remove_properties(client, _client_uuid(client, client_uuid))
 
 def remove_port_properties(client, port):
     if not isinstance(port, POINTER(jack_port_t)):
@@ -760,10 +926,7 @@ def remove_property(client, subject, key, encoding=ENCODING):
     return jlib.jack_remove_property(client, subject, _e(key, encoding))
 
 def remove_client_property(client, client_uuid, key, encoding=ENCODING):
-    if isinstance(client_uuid, str):
-        client_uuid = get_uuid_for_client_name(client, client_uuid)
-
-    return remove_property(client, uuid_parse(client_uuid), key, encoding)
+    return remove_property(client, _client_uuid(client, client_uuid), key, encoding)
 
 def remove_port_property(client, port, key, encoding=ENCODING):
     if not isinstance(port, POINTER(jack_port_t)):
@@ -781,10 +944,7 @@ def set_property(client, subject, key, value, type=None, encoding=ENCODING):
     return jlib.jack_set_property(client, subject, _e(key, encoding), value, type)
 
 def set_client_property(client, client_uuid, key, value, type=None, encoding=ENCODING):
-    if isinstance(client_uuid, str):
-        client_uuid = get_uuid_for_client_name(client, client_uuid)
-
-    uuid = uuid_parse(client_uuid)
+    uuid = _client_uuid(client, client_uuid)
     return set_property(client, uuid, key, value, type, encoding) if uuid != -1 else -1
 
 def set_port_property(client, port, key, value, type=None, encoding=ENCODING):
@@ -0,0 +1,103 @@
+"""numpy helpers for JACK audio port buffers."""
+
+from ctypes import c_float, memmove, sizeof
+
+import numpy as np
+
+from .api import jlib
+from .types import jack_default_audio_sample_t
+
+SAMPLE_SIZE = sizeof(jack_default_audio_sample_t)
+
+
+def port_array(port, nframes: int) -> np.ndarray:
+    ''' zero-copy float32 view over the audio buffer of port,
+        only valid during the current process cycle. '''
+    addr = jlib.jack_port_get_buffer(port, nframes)
+    return np.ctypeslib.as_array((c_float * nframes).from_address(addr))
+
+
+class PortBufferArray:
+    ''' Preallocated (channels x frames) float32 array,
+        filled from or copied to a list of audio ports
+        with one memmove per port and per cycle. '''
+
+    def __init__(self, ports: list, max_frames: int):
+        self.ports = list(ports)
+        self.data = np.zeros((len(self.ports), 0), dtype=np.float32)
+        self._rows = list[int]()
+        self.resize(max_frames)
+
+    def resize(self, max_frames: int):
+        self.max_frames = max_frames
+        self.data = np.zeros((len(self.ports), max_frames), dtype=np.float32)
+        self._rows = [self.data[i].ctypes.data for i in range(len(self.ports))]
+
+    def read(self, nframes: int) -> np.ndarray:
+        ''' copy nframes of each port buffer into the array
+            and return a (channels x nframes) view on it. '''
+        get_buffer = jlib.jack_port_get_buffer
+        size = nframes * SAMPLE_SIZE
+
+        for port, row in zip(self.ports, self._rows):
+            memmove(row, get_buffer(port, nframes), size)
+
+        return self.data[:, :nframes]
+
+    def write(self, nframes: int, data: np.ndarray = None):
+        ''' copy rows of data (default: the array itself) into the port buffers.
+            data must be float32 with contiguous rows. '''
+        if data is None:
+            rows = self._rows
+        else:
+            base, stride = data.ctypes.data, data.strides[0]
+            rows = [base + i * stride for i in range(len(self.ports))]
+
+        get_buffer = jlib.jack_port_get_buffer
+        size = nframes * SAMPLE_SIZE
+
+        for port, row in zip(self.ports, rows):
+            memmove(get_buffer(port, nframes), row, size)
+
+
+class SnapshotArrays:
+    ''' Named float arrays written by one thread (usually the process
+        callback) and read from others without any lock.
+
+        The writer brackets its updates with a sequence counter,
+        readers retry when the counter changed during their copy. '''
+
+    def __init__(self, names: tuple, shape, dtype=np.float32):
+        self.names = tuple(names)
+        self.arrays = {name: np.zeros(shape, dtype=dtype) for name in self.names}
+        self._seq = 0
+
+    def publish(self, **values):
+        self._seq += 1
+        arrays = self.arrays
+        for name, value in values.items():
+            arrays[name][...] = value
+        self._seq += 1
+
+    @property
+    def version(self) -> int:
+        ''' number of publications so far. '''
+        return self._seq >> 1
+
+    def read_versioned(self, retries=100) -> tuple:
+        ''' (version, arrays) like read(), (None, None) if it failed. '''
+        for _ in range(retries):
+            seq = self._seq
+            if seq & 1:
+                continue
+
+            copies = {name: array.copy() for name, array in self.arrays.items()}
+            if seq == self._seq:
+                return seq >> 1, copies
+
+        return None, None
+
+    def read(self, retries=100) -> dict:
+        ''' return a consistent copy of the arrays,
+            or None if the writer kept updating them. '''
+        return self.read_versioned(retries)[1]
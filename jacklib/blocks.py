@@ -0,0 +1,147 @@
+"""Fixed-size block processing of audio ports.
+
+numpy code is much cheaper per frame on large blocks than on the 64 or
+128 frames of a JACK period. BlockAdapter buffers the input ports and
+calls a function with blocks of block_size frames, every hop_size frames
+(block_size - hop_size frames of overlap, for FFT work), and plays the
+hop_size frames it returns on the output ports with a constant latency,
+reported to the server from the latency callback.
+"""
+
+from ctypes import byref
+from math import gcd
+
+import numpy as np
+
+from . import api as jacklib
+from .arrays import PortBufferArray
+from .enums import JackLatencyCallbackMode
+from .types import jack_latency_range_t
+
+
+class BlockAdapter:
+    ''' Run func on (inputs x block_size) float32 blocks of in_ports.
+
+        func(block) returns a (outputs x hop_size) array, the output
+        frames aligned with the last hop_size frames of the block, or None
+        without out_ports. The block is a view on the input buffer, valid
+        during the call only. The first blocks start with zeros.
+
+        Output is delayed by hop_size - gcd(hop_size, period) frames, the
+        least which never starves the output ports, plus extra_latency,
+        the latency of func itself (block_size - hop_size for an
+        overlap-add outputting the oldest frames of its block). This
+        latency is set on the ports by latency_callback(). '''
+
+    def __init__(self, client, func, block_size: int, hop_size=None,
+                 in_ports=(), out_ports=(), extra_latency=0):
+        hop_size = hop_size or block_size
+        if not 0 < hop_size <= block_size:
+            raise ValueError("hop_size must be between 1 and block_size")
+
+        self.client = client
+        self.func = func
+        self.block_size = block_size
+        self.hop_size = hop_size
+        self.extra_latency = extra_latency
+        period = jacklib.get_buffer_size(client)
+        self._in = PortBufferArray(in_ports, period)
+        self._out = PortBufferArray(out_ports, period)
+        self._configure(period)
+
+    @property
+    def in_ports(self) -> list:
+        return self._in.ports
+
+    @property
+    def out_ports(self) -> list:
+        return self._out.ports
+
+    def _configure(self, period: int):
+        ''' (re)allocate the FIFOs for period and reset them. '''
+        block_size, hop_size = self.block_size, self.hop_size
+        self.period = period
+        self.delay = hop_size - gcd(hop_size, period)
+        self.latency = self.delay + self.extra_latency
+
+        self._in.resize(period)
+        self._out.resize(period)
+        self._in_fifo = np.zeros((len(self._in.ports), block_size + period), dtype=np.float32)
+        self._out_fifo = np.zeros(
+            (len(self._out.ports), self.delay + period + hop_size), dtype=np.float32)
+        # block_size - hop_size zeros, so that each hop completes a block
+        self._in_fill = block_size - hop_size
+        self._out_fill = self.delay
+
+    # ---------------------------------------------------------------------------------------------
+    # Process thread
+
+    def process(self, nframes: int):
+        if nframes != self.period:
+            # normally done by buffer_size_callback() before
+            self._configure(nframes)
+
+        block_size, hop_size = self.block_size, self.hop_size
+        in_fifo, out_fifo = self._in_fifo, self._out_fifo
+        fill, out_fill = self._in_fill, self._out_fill
+        outputs = bool(self._out.ports)
+
+        in_fifo[:, fill:fill + nframes] = self._in.read(nframes)
+        fill += nframes
+
+        while fill >= block_size:
+            result = self.func(in_fifo[:, :block_size])
+            if outputs:
+                out_fifo[:, out_fill:out_fill + hop_size] = result
+                out_fill += hop_size
+            # numpy copes with the overlapping ranges
+            in_fifo[:, :fill - hop_size] = in_fifo[:, hop_size:fill]
+            fill -= hop_size
+
+        if outputs:
+            self._out.write(nframes, out_fifo[:, :nframes])
+            out_fifo[:, :out_fill - nframes] = out_fifo[:, nframes:out_fill]
+            out_fill -= nframes
+
+        self._in_fill, self._out_fill = fill, out_fill
+
+    def process_callback(self, nframes: int, arg) -> int:
+        self.process(nframes)
+        return 0
+
+    # ---------------------------------------------------------------------------------------------
+    # Callbacks
+
+    def buffer_size_callback(self, nframes: int, arg) -> int:
+        self._configure(nframes)
+        return 0
+
+    def latency_callback(self, mode, arg):
+        ''' outputs get the capture latency of the inputs plus ours,
+            inputs the playback latency of the outputs plus ours. '''
+        if mode == JackLatencyCallbackMode.CAPTURE:
+            sources, targets = self._in.ports, self._out.ports
+        else:
+            sources, targets = self._out.ports, self._in.ports
+
+        if not targets:
+            return
+
+        range_ = jack_latency_range_t()
+        min_, max_ = None, 0
+        for port in sources:
+            jacklib.port_get_latency_range(port, mode, byref(range_))
+            min_ = range_.min if min_ is None else min(min_, range_.min)
+            max_ = max(max_, range_.max)
+
+        range_.min = (min_ or 0) + self.latency
+        range_.max = max_ + self.latency
+        for port in targets:
+            jacklib.port_set_latency_range(port, mode, byref(range_))
+
+    def register(self):
+        ''' set the process, buffer size and latency callbacks, on an inactive client. '''
+        client = self.client
+        jacklib.set_process_callback(client, self.process_callback, None)
+        jacklib.set_buffer_size_callback(client, self.buffer_size_callback, None)
+        jacklib.set_latency_callback(client, self.latency_callback, None)
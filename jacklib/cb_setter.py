@@ -2,6 +2,7 @@ from typing import Callable
 from ctypes import (
     CFUNCTYPE,
     POINTER,
+    cast,
     c_void_p,
     c_int,
     c_char_p,
@@ -37,7 +38,8 @@ class _Cb:
             self.jlib_func = None
 
 
-_used_callbacks = list[CFUNCTYPE]()
+# callbacks must stay alive as long as their client, they are kept per client address
+_used_callbacks = dict[int, list[CFUNCTYPE]]()
 _jlib = None
 _cbs = tuple[_Cb]()
 
@@ -128,6 +130,11 @@ def callback_setter(func: Callable):
             return None
         
         _callback = _cb.callback(callback)
-        _used_callbacks.append(_callback)
+        _used_callbacks.setdefault(cast(client, c_void_p).value, []).append(_callback)
         return _cb.jlib_func(client, _callback, arg)
-    return wrapper
\ No newline at end of file
+    return wrapper
+
+
+def release_callbacks(client):
+    ''' forget the callbacks of a closed client. '''
+    _used_callbacks.pop(cast(client, c_void_p).value, None)
\ No newline at end of file
@@ -1,3 +1,4 @@
+import os
 import sys
 from ctypes import (
     ARRAY,
@@ -15,6 +16,7 @@ from ctypes import (
 
 from .types import (
     jack_client_t,
+    jack_intclient_t,
     jack_port_t,
     jack_port_id_t,
     jack_port_type_id_t,
@@ -35,6 +37,7 @@ from .types import (
     jack_latency_range_t,
     JackThreadCallback,
     JackErrorCallback,
+    JackInfoCallback,
     JackTimebaseCallback
 )
 
@@ -357,6 +360,12 @@ def _set_misc_func(jlib: CDLL):
         jlib.jack_set_error_function.restype = None
     except AttributeError:
         jlib.jack_set_error_function = None
+
+    try:
+        jlib.jack_set_info_function.argtypes = [JackInfoCallback]
+        jlib.jack_set_info_function.restype = None
+    except AttributeError:
+        jlib.jack_set_info_function = None
         
 def _set_transport_func(jlib: CDLL):
     jlib.jack_release_timebase.argtypes = [POINTER(jack_client_t)]
@@ -525,12 +534,12 @@ def _set_metadata_func(jlib: CDLL):
         jlib.jack_remove_all_properties.argtypes = [POINTER(jack_client_t)]
         jlib.jack_remove_all_properties.restype = c_int
 
-        jlib.jack_remove_properties.argtypess = [
-            POINTER(jack_client_t), POINTER(jack_uuid_t)]
+        jlib.jack_remove_properties.argtypes = [
+            POINTER(jack_client_t), jack_uuid_t]
         jlib.jack_remove_properties.restype = c_int
 
         jlib.jack_remove_property.argtypes = [
-            POINTER(jack_client_t), POINTER(jack_uuid_t), c_char_p]
+            POINTER(jack_client_t), jack_uuid_t, c_char_p]
         jlib.jack_remove_property.restype = c_int
 
         jlib.jack_set_property.argtypes = [
@@ -551,7 +560,43 @@ def _set_metadata_func(jlib: CDLL):
         jlib.jack_remove_property = None
         jlib.jack_set_property = None
     
+def _set_intclient_func(jlib: CDLL):
+    try:
+        jlib.jack_get_internal_client_name.argtypes = [
+            POINTER(jack_client_t), jack_intclient_t]
+        # allocated string, freed with jack_free()
+        jlib.jack_get_internal_client_name.restype = c_void_p
+    except AttributeError:
+        jlib.jack_get_internal_client_name = None
+
+    try:
+        jlib.jack_internal_client_handle.argtypes = [
+            POINTER(jack_client_t), c_char_p, POINTER(jack_status_t)]
+        jlib.jack_internal_client_handle.restype = jack_intclient_t
+    except AttributeError:
+        jlib.jack_internal_client_handle = None
+
+    try:
+        # variadic: load name and load init strings follow, depending on options
+        jlib.jack_internal_client_load.argtypes = [
+            POINTER(jack_client_t), c_char_p, jack_options_t, POINTER(jack_status_t)]
+        jlib.jack_internal_client_load.restype = jack_intclient_t
+    except AttributeError:
+        jlib.jack_internal_client_load = None
+
+    try:
+        jlib.jack_internal_client_unload.argtypes = [
+            POINTER(jack_client_t), jack_intclient_t]
+        jlib.jack_internal_client_unload.restype = jack_status_t
+    except AttributeError:
+        jlib.jack_internal_client_unload = None
+
 def get_jlib() -> CDLL:
+    # JACKLIB_BACKEND=fake selects the in-process stand-in for libjack
+    if os.environ.get("JACKLIB_BACKEND") == "fake":
+        from .fake_backend import FakeJackLib
+        return FakeJackLib()
+
     # Load JACK shared library
     try:
         if sys.platform == "darwin":
@@ -581,4 +626,5 @@ def get_jlib() -> CDLL:
     _set_midi_func(jlib)
     _set_session_func(jlib)
     _set_metadata_func(jlib)
+    _set_intclient_func(jlib)
     return jlib
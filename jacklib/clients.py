@@ -0,0 +1,115 @@
+"""Client name / UUID directory.
+
+The client metadata functions of the api module resolve a client name with
+get_uuid_for_client_name() and uuid_parse() on every call. ClientDirectory
+keeps both directions cached, with parsed jack_uuid_t values which can be
+passed as is to get_client_properties(), set_client_property() etc., and
+keeps the cache current from client registration and rename callbacks.
+"""
+
+import threading
+
+from . import api as jacklib
+from .api import ENCODING, jlib
+from .types import jack_uuid_t
+
+
+class ClientDirectory:
+    ''' Bidirectional client name <-> jack_uuid_t mapping.
+
+        Call register() on an inactive client, or call the *_callback()
+        methods from your own callbacks. Callbacks only update the cache,
+        as notification callbacks must not call the server; names which
+        are not cached are resolved on first use. '''
+
+    def __init__(self, client, encoding=ENCODING):
+        self.client = client
+        self.encoding = encoding
+        self._uuids = dict[str, jack_uuid_t]()
+        self._names = dict[int, str]()
+        self._lock = threading.Lock()
+
+    # ---------------------------------------------------------------------------------------------
+    # Callbacks
+
+    def client_registration_callback(self, name: bytes, register: int, arg):
+        name = name.decode(self.encoding, errors="replace")
+        with self._lock:
+            # a new client may reuse the name of a gone one
+            uuid = self._uuids.pop(name, None)
+            if uuid is not None:
+                self._names.pop(uuid.value, None)
+
+    def client_rename_callback(self, old_name: bytes, new_name: bytes, arg) -> int:
+        old_name = old_name.decode(self.encoding, errors="replace")
+        new_name = new_name.decode(self.encoding, errors="replace")
+        with self._lock:
+            uuid = self._uuids.pop(old_name, None)
+            if uuid is not None:
+                self._uuids[new_name] = uuid
+                self._names[uuid.value] = new_name
+        return 0
+
+    def register(self):
+        jacklib.set_client_registration_callback(
+            self.client, self.client_registration_callback, None)
+        jacklib.set_client_rename_callback(self.client, self.client_rename_callback, None)
+
+    # ---------------------------------------------------------------------------------------------
+    # Lookups
+
+    def refresh(self, names=None):
+        ''' resolve names, all clients owning ports if None, in one go. '''
+        if names is None:
+            ports = jacklib.get_ports(self.client)
+            names = set()
+            if ports:
+                i = 0
+                while ports[i]:
+                    names.add(ports[i].partition(b":")[0].decode(self.encoding, errors="replace"))
+                    i += 1
+                jacklib.free(ports)
+
+        for name in names:
+            self._resolve(name)
+
+    def _resolve(self, name: str):
+        if not jlib.jack_get_uuid_for_client_name:
+            return None
+
+        uuid_str = jlib.jack_get_uuid_for_client_name(self.client, name.encode(self.encoding))
+        uuid = jacklib.uuid_parse(uuid_str)
+        if not isinstance(uuid, jack_uuid_t):
+            return None
+
+        with self._lock:
+            self._uuids[name] = uuid
+            self._names[uuid.value] = name
+        return uuid
+
+    def uuid(self, name: str):
+        ''' parsed jack_uuid_t of client name, None if there is no such client. '''
+        uuid = self._uuids.get(name)
+        return uuid if uuid is not None else self._resolve(name)
+
+    def name(self, uuid):
+        ''' name of the client with uuid (int or jack_uuid_t), None if unknown. '''
+        if isinstance(uuid, jack_uuid_t):
+            uuid = uuid.value
+
+        name = self._names.get(uuid)
+        if name is None and jlib.jack_get_client_name_by_uuid:
+            raw = jlib.jack_get_client_name_by_uuid(
+                self.client, jacklib.uuid_unparse(jack_uuid_t(uuid)).encode())
+            if raw:
+                name = raw.decode(self.encoding, errors="replace")
+                self._resolve(name)
+        return name
+
+    def names(self) -> list[str]:
+        ''' names currently cached. '''
+        with self._lock:
+            return list(self._uuids)
+
+    def __contains__(self, name: str) -> bool:
+        return self.uuid(name) is not None
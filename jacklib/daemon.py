@@ -0,0 +1,383 @@
+"""Control daemon holding one JACK client for short-lived scripts.
+
+Opening and closing a client makes the server notify all other clients
+and reallocate the graph. pyjacklib-daemon keeps one client open, with the
+graph cache of servers.ServerConnection and a metadata cache invalidated
+per subject by the property change callback, and serves requests of local
+scripts over a Unix domain socket:
+
+    pyjacklib-daemon &
+
+    with DaemonClient() as jack:
+        jack.connect("system:capture_1", "system:playback_1")
+        print(jack.ports(r"^system:"))
+
+Each message is a 4 bytes big-endian length followed by that many bytes
+of UTF-8 JSON. Requests are {"op": name, "args": {...}}, replies are
+{"ok": true, "result": ...} or {"ok": false, "error": message}. Property
+values with a type other than text are returned as null.
+"""
+
+import argparse
+import json
+import os
+import re
+import socket
+import socketserver
+import struct
+import sys
+import threading
+
+from . import api as jacklib
+from .enums import JackOptions
+from .servers import ServerManager
+
+_HEADER = struct.Struct(">I")
+MAX_MESSAGE_SIZE = 16 * 1024 * 1024
+
+
+def default_socket_path(server_name=None) -> str:
+    ''' $XDG_RUNTIME_DIR/pyjacklib-SERVER.sock, or in the temp directory
+        with the user id if XDG_RUNTIME_DIR is not set. '''
+    server_name = server_name or os.environ.get("JACK_DEFAULT_SERVER", "default")
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return os.path.join(runtime_dir, "pyjacklib-%s.sock" % server_name)
+    return "/tmp/pyjacklib-%d-%s.sock" % (os.getuid(), server_name)
+
+
+def send_message(sock, message):
+    data = json.dumps(message, separators=(",", ":")).encode()
+    sock.sendall(_HEADER.pack(len(data)) + data)
+
+
+def _recv_exact(sock, size) -> bytes:
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 65536))
+        if not chunk:
+            raise EOFError("connection closed")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def recv_message(sock):
+    ''' next message from sock, EOFError if the peer closed the connection. '''
+    size, = _HEADER.unpack(_recv_exact(sock, _HEADER.size))
+    if size > MAX_MESSAGE_SIZE:
+        raise ValueError("message too large (%d bytes)" % size)
+    return json.loads(_recv_exact(sock, size))
+
+
+def _text(value):
+    # get_all_properties() only decodes values of text types
+    return value if isinstance(value, str) else None
+
+
+class DaemonError(Exception):
+    ''' error reply of the daemon. '''
+
+
+# -------------------------------------------------------------------------------------------------
+# Daemon
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        while True:
+            try:
+                request = recv_message(self.request)
+            except (EOFError, ConnectionError):
+                return
+            except ValueError as exc:
+                # can not resync after a bad length or broken JSON
+                send_message(self.request, {"ok": False, "error": str(exc)})
+                return
+
+            send_message(self.request, self.server.daemon.handle(request))
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class ControlDaemon:
+    ''' Serves requests on socket_path with one client on server_name.
+
+        serve_forever() blocks, start() serves from a thread. '''
+
+    def __init__(self, socket_path=None, server_name=None, client_name="pyjacklib-daemon"):
+        self.socket_path = socket_path or default_socket_path(server_name)
+        self.server_name = server_name
+        self.manager = ServerManager(client_name, JackOptions.NO_START_SERVER)
+        self._properties = None
+        self._dirty_subjects = set()
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    # ---------------------------------------------------------------------------------------------
+    # JACK side
+
+    def _on_property_change(self, subject, key, change, arg):
+        if subject == 0:
+            self._properties = None
+        else:
+            self._dirty_subjects.add(subject)
+
+    def _connection(self):
+        conn = self.manager.get(self.server_name)
+        if conn is None:
+            # first request, or the server was restarted
+            conn = self.manager.open(self.server_name, activate=False)
+            jacklib.set_property_change_callback(conn.client, self._on_property_change, None)
+            jacklib.activate(conn.client)
+            self._properties = None
+        return conn
+
+    def properties(self, subject: int) -> dict:
+        ''' cached {key: (value, type)} of subject. '''
+        if self._properties is None:
+            self._dirty_subjects.clear()
+            self._properties = {
+                uuid: {prop.key: (prop.value, prop.type) for prop in props}
+                for uuid, props in jacklib.get_all_properties().items()}
+
+        cache = self._properties
+        while self._dirty_subjects:
+            dirty = self._dirty_subjects.pop()
+            props = jacklib.get_properties(dirty)
+            if props:
+                cache[dirty] = {prop.key: (prop.value, prop.type) for prop in props}
+            else:
+                cache.pop(dirty, None)
+        return cache.get(subject, {})
+
+    def _subject(self, conn, args) -> int:
+        if "port" in args:
+            port = jacklib.port_by_name(conn.client, args["port"])
+            if not port:
+                raise DaemonError("no such port: %s" % args["port"])
+            return jacklib.port_uuid(port)
+        if "client" in args:
+            uuid = jacklib.uuid_parse(jacklib.get_uuid_for_client_name(
+                conn.client, args["client"]))
+            if not isinstance(uuid, jacklib.jack_uuid_t):
+                raise DaemonError("no such client: %s" % args["client"])
+            return uuid.value
+        return int(args["subject"])
+
+    # ---------------------------------------------------------------------------------------------
+    # Operations, op_NAME(conn, args) -> JSON serializable result
+
+    def op_ping(self, conn, args):
+        return "pong"
+
+    def op_ports(self, conn, args):
+        ''' port names matching the optional "pattern" regular expression. '''
+        names = conn.ports()
+        if args.get("pattern"):
+            pattern = re.compile(args["pattern"])
+            names = [name for name in names if pattern.search(name)]
+        return names
+
+    def op_port(self, conn, args):
+        name = args["name"].encode(jacklib.ENCODING)
+        for port in conn.graph().ports:
+            if port.name == name:
+                return {"name": args["name"],
+                        "type": port.type.decode(jacklib.ENCODING, errors="replace"),
+                        "flags": port.flags,
+                        "uuid": port.uuid,
+                        "aliases": [alias.decode(jacklib.ENCODING, errors="replace")
+                                    for alias in port.aliases]}
+        return None
+
+    def op_connections(self, conn, args):
+        ''' [source, destination] pairs, only those of "port" if given. '''
+        connections = conn.connections()
+        port = args.get("port")
+        if port:
+            connections = [pair for pair in connections if port in pair]
+        return [list(pair) for pair in connections]
+
+    def op_connect(self, conn, args):
+        return conn.connect(args["source"], args["destination"])
+
+    def op_disconnect(self, conn, args):
+        return conn.disconnect(args["source"], args["destination"])
+
+    def op_properties(self, conn, args):
+        return {key: _text(value)
+                for key, (value, type_) in self.properties(self._subject(conn, args)).items()}
+
+    def op_get_property(self, conn, args):
+        value, type_ = self.properties(self._subject(conn, args)).get(args["key"], (None, None))
+        if value is None:
+            return None
+        return {"value": _text(value), "type": _text(type_)}
+
+    def op_set_property(self, conn, args):
+        return jacklib.set_property(conn.client, self._subject(conn, args), args["key"],
+                                    args["value"], args.get("type"))
+
+    def op_remove_property(self, conn, args):
+        return jacklib.remove_property(conn.client, self._subject(conn, args), args["key"])
+
+    def handle(self, request) -> dict:
+        ''' reply to one request. '''
+        try:
+            if not isinstance(request, dict) or not isinstance(request.get("op"), str):
+                raise DaemonError("a request is an object with an \"op\" string")
+            args = request.get("args") or {}
+            if not isinstance(args, dict):
+                raise DaemonError("\"args\" must be an object")
+
+            op = getattr(self, "op_" + request["op"], None)
+            if op is None:
+                raise DaemonError("unknown operation: %s" % request["op"])
+
+            with self._lock:
+                conn = self._connection()
+                result = op(conn, args)
+        except OSError as exc:
+            return {"ok": False, "error": str(exc)}
+        except (DaemonError, AttributeError, KeyError, TypeError, ValueError) as exc:
+            # AttributeError: argument values of the wrong type
+            return {"ok": False, "error": "%s: %s" % (type(exc).__name__, exc)}
+        return {"ok": True, "result": result}
+
+    # ---------------------------------------------------------------------------------------------
+
+    def _bind(self):
+        if os.path.exists(self.socket_path):
+            # a stale socket of a daemon which did not exit cleanly
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(self.socket_path)
+            except ConnectionRefusedError:
+                os.unlink(self.socket_path)
+            else:
+                raise OSError("a daemon is already listening on %s" % self.socket_path)
+            finally:
+                probe.close()
+
+        self._server = _UnixServer(self.socket_path, _Handler)
+        self._server.daemon = self
+
+    def serve_forever(self):
+        if self._server is None:
+            self._bind()
+        self._server.serve_forever()
+
+    def start(self):
+        self._bind()
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="jacklib-daemon", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._server is not None:
+            if self._thread is not None:
+                self._server.shutdown()
+                self._thread.join()
+                self._thread = None
+            self._server.server_close()
+            self._server = None
+            try:
+                os.unlink(self.socket_path)
+            except OSError:
+                pass
+        self.manager.close_all()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+# -------------------------------------------------------------------------------------------------
+# Client
+
+class DaemonClient:
+    ''' Connection of a script to a running ControlDaemon. '''
+
+    def __init__(self, socket_path=None, server_name=None, timeout=5.0):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.sock.connect(socket_path or default_socket_path(server_name))
+
+    def call(self, op, **args):
+        ''' result of op, raises DaemonError on an error reply. '''
+        send_message(self.sock, {"op": op, "args": args})
+        reply = recv_message(self.sock)
+        if not reply["ok"]:
+            raise DaemonError(reply["error"])
+        return reply["result"]
+
+    def ping(self):
+        return self.call("ping")
+
+    def ports(self, pattern=None) -> list[str]:
+        return self.call("ports", pattern=pattern)
+
+    def port(self, name):
+        return self.call("port", name=name)
+
+    def connections(self, port=None) -> list[list[str]]:
+        return self.call("connections", port=port)
+
+    def connect(self, source, destination) -> int:
+        return self.call("connect", source=source, destination=destination)
+
+    def disconnect(self, source, destination) -> int:
+        return self.call("disconnect", source=source, destination=destination)
+
+    def properties(self, **subject) -> dict:
+        ''' subject is one of port=name, client=name or subject=uuid. '''
+        return self.call("properties", **subject)
+
+    def get_property(self, key, **subject):
+        return self.call("get_property", key=key, **subject)
+
+    def set_property(self, key, value, type=None, **subject) -> int:
+        return self.call("set_property", key=key, value=value, type=type, **subject)
+
+    def remove_property(self, key, **subject) -> int:
+        return self.call("remove_property", key=key, **subject)
+
+    def close(self):
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def main(args=None):
+    ap = argparse.ArgumentParser(
+        prog="pyjacklib-daemon", description=__doc__.splitlines()[0])
+    ap.add_argument("-s", "--socket", help="Unix socket path (default: %s)" % default_socket_path())
+    ap.add_argument("-n", "--server-name", help="JACK server name")
+    ap.add_argument("-c", "--client-name", default="pyjacklib-daemon")
+    opts = ap.parse_args(args)
+
+    daemon = ControlDaemon(opts.socket, opts.server_name, opts.client_name)
+    try:
+        # connect now to report an unreachable server at once
+        daemon._connection()
+        daemon.serve_forever()
+    except OSError as exc:
+        sys.exit(str(exc))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        daemon.stop()
+
+
+if __name__ == "__main__":
+    main()
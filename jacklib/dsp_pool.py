@@ -0,0 +1,229 @@
+"""Process-callback DSP spread over worker processes via shared memory.
+
+The process callback copies the input port buffers into a shared memory
+block and wakes up a pool of worker processes, each one in charge of a
+subset of the channels. Their outputs are collected at the next cycle,
+so the pool adds exactly one period of latency.
+"""
+
+import logging
+import multiprocessing
+import traceback
+from ctypes import memmove, memset
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .api import jlib
+from .arrays import SAMPLE_SIZE
+
+log = logging.getLogger(__name__)
+
+# per worker header fields in shared memory
+_NFRAMES = 0
+_FAILED = 1
+
+
+def _worker_main(shm_name: str, index: int, workers: int, channels: int, max_frames: int,
+                 start: int, stop: int, func, go, done, quit_, errors):
+    shm = shared_memory.SharedMemory(shm_name)
+    header = np.ndarray((workers, 2), dtype=np.uint32, buffer=shm.buf)
+    data = np.ndarray((2, channels, max_frames), dtype=np.float32,
+                      buffer=shm.buf, offset=header.nbytes)
+    inputs, outputs = data[0, start:stop], data[1, start:stop]
+
+    try:
+        while True:
+            go.wait()
+            go.clear()
+            if quit_.is_set():
+                break
+
+            n = int(header[index, _NFRAMES])
+            try:
+                func(inputs[:, :n], outputs[:, :n])
+            except Exception:
+                header[index, _FAILED] = 1
+                errors.put((index, traceback.format_exc()))
+            done.set()
+    finally:
+        del header, data, inputs, outputs
+        shm.close()
+
+
+class DSPWorkerPool:
+    ''' Run func(inputs, outputs) on worker processes for each cycle.
+
+        in_ports and out_ports must have the same length, channel i of
+        inputs feeds channel i of outputs. func receives two
+        (channels x nframes) float32 arrays for the channels of its worker
+        and writes its result into outputs in place. It must be picklable.
+
+        Call process() from the process callback, or use process_callback
+        directly as a process callback. Workers have the whole period to
+        finish, the process callback waits timeout seconds more (a quarter
+        of a period by default). The channels of a late worker are
+        silenced and counted in overruns; its result is discarded when it
+        finally arrives. Channels of a worker whose func raised are
+        silenced for that cycle and counted in errors, pop_errors()
+        logs and returns the tracebacks. '''
+
+    def __init__(self, client, in_ports: list, out_ports: list, func,
+                 workers=None, timeout=None, max_frames=None, mp_context=None):
+        if len(in_ports) != len(out_ports):
+            raise ValueError("in_ports and out_ports must have the same length")
+
+        self.in_ports = list(in_ports)
+        self.out_ports = list(out_ports)
+        self.func = func
+        self.channels = len(self.in_ports)
+        self.max_frames = max_frames or jlib.jack_get_buffer_size(client)
+
+        if timeout is None:
+            timeout = 0.25 * jlib.jack_get_buffer_size(client) / jlib.jack_get_sample_rate(client)
+        self.timeout = timeout
+
+        workers = min(workers or multiprocessing.cpu_count(), self.channels)
+        bounds = np.linspace(0, self.channels, workers + 1).astype(int)
+        self._slices = [(int(bounds[i]), int(bounds[i + 1])) for i in range(workers)]
+
+        self._ctx = mp_context or multiprocessing.get_context("spawn")
+        self._shm = None
+        self._procs = []
+        self._go = []
+        self._done = []
+        self._busy = []
+        self._late = []
+        self._quit = None
+        self._errors = None
+        self.overruns = 0
+        self.errors = 0
+
+    def start(self):
+        channels, max_frames, workers = self.channels, self.max_frames, len(self._slices)
+        header_size = workers * 2 * 4
+        self._shm = shared_memory.SharedMemory(
+            create=True, size=header_size + 2 * channels * max_frames * SAMPLE_SIZE)
+        self._header = np.ndarray((workers, 2), dtype=np.uint32, buffer=self._shm.buf)
+        self._header.fill(0)
+        self._data = np.ndarray((2, channels, max_frames), dtype=np.float32,
+                                buffer=self._shm.buf, offset=header_size)
+        self._data.fill(0.0)
+
+        # raw row addresses, so the process callback only does memmoves
+        self._in_rows = [self._data[0, i].ctypes.data for i in range(channels)]
+        self._out_rows = [self._data[1, i].ctypes.data for i in range(channels)]
+
+        self._quit = self._ctx.Event()
+        self._errors = self._ctx.SimpleQueue()
+        for index, (start, stop) in enumerate(self._slices):
+            go, done = self._ctx.Event(), self._ctx.Event()
+            proc = self._ctx.Process(
+                target=_worker_main,
+                args=(self._shm.name, index, workers, channels, max_frames,
+                      start, stop, self.func, go, done, self._quit, self._errors),
+                daemon=True)
+            proc.start()
+            self._procs.append(proc)
+            self._go.append(go)
+            self._done.append(done)
+            self._busy.append(False)
+            self._late.append(False)
+
+    def process(self, nframes: int):
+        get_buffer = jlib.jack_port_get_buffer
+        out_rows, in_rows = self._out_rows, self._in_rows
+        header = self._header
+        size = nframes * SAMPLE_SIZE
+
+        if nframes > self.max_frames:
+            for port in self.out_ports:
+                memset(get_buffer(port, nframes), 0, size)
+            return
+
+        # collect outputs of the previous cycle
+        for index, (start, stop) in enumerate(self._slices):
+            silence = False
+
+            if self._busy[index]:
+                # a worker already late gets no more time, its result is stale anyway
+                late = self._late[index]
+                if self._done[index].wait(0.0 if late else self.timeout):
+                    self._busy[index] = self._late[index] = False
+                    if header[index, _FAILED]:
+                        header[index, _FAILED] = 0
+                        self.errors += 1
+                        silence = True
+                    else:
+                        silence = late
+                else:
+                    if not late:
+                        self.overruns += 1
+                        self._late[index] = True
+                    silence = True
+
+            for i in range(start, stop):
+                if silence:
+                    memset(get_buffer(self.out_ports[i], nframes), 0, size)
+                else:
+                    memmove(get_buffer(self.out_ports[i], nframes), out_rows[i], size)
+
+        # feed inputs of this cycle to idle workers
+        for index, (start, stop) in enumerate(self._slices):
+            if self._busy[index]:
+                continue
+
+            for i in range(start, stop):
+                memmove(in_rows[i], get_buffer(self.in_ports[i], nframes), size)
+
+            header[index, _NFRAMES] = nframes
+            self._done[index].clear()
+            self._busy[index] = True
+            self._go[index].set()
+
+    def pop_errors(self) -> list[str]:
+        ''' tracebacks of func errors in the workers since the last call,
+            also logged. Not to be called from the process callback. '''
+        tracebacks = []
+        while self._errors is not None and not self._errors.empty():
+            index, text = self._errors.get()
+            log.error("DSP worker %d failed:\n%s", index, text)
+            tracebacks.append(text)
+        return tracebacks
+
+    def process_callback(self, nframes: int, arg) -> int:
+        self.process(nframes)
+        return 0
+
+    def stop(self):
+        if self._quit is None:
+            return
+
+        self._quit.set()
+        for go in self._go:
+            go.set()
+        for proc in self._procs:
+            proc.join(1.0)
+            if proc.is_alive():
+                proc.terminate()
+
+        self.pop_errors()
+        self._procs.clear()
+        self._go.clear()
+        self._done.clear()
+        self._busy.clear()
+        self._late.clear()
+        self._quit = None
+        self._errors = None
+
+        del self._header, self._data
+        self._shm.close()
+        self._shm.unlink()
+        self._shm = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,1488 @@
+"""In-process stand-in for libjack, for tests and benchmarks without jackd.
+
+Select it by setting the environment variable JACKLIB_BACKEND=fake before
+importing jacklib. get_jlib() then returns a FakeJackLib instance, which
+exposes the jack_* functions with the same call signatures as the CDLL
+configured in cdll_funcs, so the whole api module works unchanged.
+
+Clients, ports, connections, metadata, latencies and transport are
+simulated per server name. Nothing happens on its own: process cycles are
+run explicitly with FakeJackLib.run_cycles(), and notification callbacks
+are called synchronously from the thread doing the change. Only active
+clients receive callbacks, as with JACK.
+"""
+
+import os
+import re
+import threading
+import time
+from ctypes import (
+    POINTER,
+    _Pointer,
+    addressof,
+    c_char_p,
+    c_float,
+    c_uint8,
+    c_void_p,
+    cast,
+    create_string_buffer,
+    memmove,
+    memset,
+    pointer,
+    sizeof,
+    string_at,
+)
+from functools import partial
+
+from .enums import (
+    JackLatencyCallbackMode,
+    JackOptions,
+    JackPortFlags,
+    JackPropertyChange,
+    JackStatus,
+    JackTransportState,
+)
+from .types import (
+    jack_client_t,
+    jack_description_t,
+    jack_midi_data_t,
+    jack_port_t,
+    jack_position_t,
+    jack_property_t,
+)
+
+DEFAULT_SAMPLE_RATE = 48000
+DEFAULT_BUFFER_SIZE = 1024
+MIDI_BUFFER_SIZE = 32768
+
+_AUDIO_TYPE = b"32 bit float mono audio"
+_MIDI_TYPE = b"8 bit raw midi"
+_CLIENT_NAME_SIZE = 64
+_PORT_NAME_SIZE = 321
+_PORT_TYPE_SIZE = 32
+
+# errno values returned by libjack
+_EEXIST = 17
+_EBUSY = 16
+_ENODATA = 61
+_ENOBUFS = 105
+
+_IS_OUTPUT = int(JackPortFlags.IS_OUTPUT)
+
+_CALLBACKS = (
+    "thread_init", "process", "freewheel", "buffer_size", "sample_rate",
+    "client_registration", "client_rename", "port_registration", "port_connect",
+    "port_rename", "graph_order", "xrun", "latency", "sync", "session",
+    "property_change",
+)
+
+
+def _deref(obj):
+    ''' return the ctypes object behind a pointer or a byref() argument. '''
+    if type(obj).__name__ == "CArgObject":
+        return obj._obj
+    if isinstance(obj, _Pointer):
+        return obj.contents
+    return obj
+
+
+def _address(obj) -> int:
+    if obj is None or isinstance(obj, int):
+        return obj
+    if type(obj).__name__ == "CArgObject":
+        return addressof(obj._obj)
+    if isinstance(obj, (_Pointer, c_char_p, c_void_p)):
+        return cast(obj, c_void_p).value
+    return addressof(obj)
+
+
+def _bytes(value) -> bytes:
+    return getattr(value, "value", value)
+
+
+def _int(value) -> int:
+    if value is None:
+        return 0
+    return getattr(value, "value", value)
+
+
+def _combine(ranges) -> list:
+    ranges = list(ranges)
+    if not ranges:
+        return [0, 0]
+    return [min(r[0] for r in ranges), max(r[1] for r in ranges)]
+
+
+class _MidiBuffer:
+    def __init__(self):
+        self.raw = (c_uint8 * 8)()
+        self.address = addressof(self.raw)
+        self.events = list[tuple]()
+        self.used = 0
+        self.lost = 0
+        self.nframes = DEFAULT_BUFFER_SIZE
+
+    def clear(self):
+        self.events.clear()
+        self.used = 0
+
+    def reserve(self, time_: int, size: int):
+        if (time_ >= self.nframes
+                or (self.events and time_ < self.events[-1][0])
+                or self.used + size > MIDI_BUFFER_SIZE):
+            self.lost += 1
+            return None
+
+        data = (jack_midi_data_t * size)()
+        self.events.append((time_, size, data))
+        self.used += size
+        return data
+
+
+class _Port:
+    def __init__(self, client: '_Client', short_name: bytes, type_: bytes,
+                 flags: int, port_id: int, uuid: int):
+        self.struct = jack_port_t()
+        self.pointer = pointer(self.struct)
+        self.address = addressof(self.struct)
+        self.client = client
+        self.short_name = short_name
+        self.type = type_
+        self.flags = flags
+        self.is_output = bool(flags & _IS_OUTPUT)
+        self.id = port_id
+        self.uuid = uuid
+        self.aliases = list[bytes]()
+        self.connections = list['_Port']()
+        self.latency = {JackLatencyCallbackMode.CAPTURE: [0, 0],
+                        JackLatencyCallbackMode.PLAYBACK: [0, 0]}
+        self.monitor_requests = 0
+        self.audio = None
+        self.midi = None
+
+    @property
+    def name(self) -> bytes:
+        return self.client.name + b":" + self.short_name
+
+    def buffer_address(self, nframes: int) -> int:
+        if self.type == _MIDI_TYPE:
+            if self.midi is None:
+                self.midi = _MidiBuffer()
+            return self.midi.address
+
+        if self.audio is None or len(self.audio) < nframes:
+            self.audio = (c_float * max(nframes, self.client.server.buffer_size))()
+        return addressof(self.audio)
+
+
+class _Client:
+    def __init__(self, server: '_Server', name: bytes, uuid: int):
+        self.struct = jack_client_t()
+        self.pointer = pointer(self.struct)
+        self.address = addressof(self.struct)
+        self.server = server
+        self.name = name
+        self.uuid = uuid
+        self.active = False
+        self.ports = list[_Port]()
+        self.callbacks = dict[str, tuple]()
+        self.shutdown = None
+        self.info_shutdown = None
+        self.thread = None
+        self.thread_callback = None
+        self.cycle_go = threading.Event()
+        self.cycle_done = threading.Event()
+        self.cycle_nframes = 0
+
+
+class _Server:
+    def __init__(self, name: bytes, sample_rate=DEFAULT_SAMPLE_RATE,
+                 buffer_size=DEFAULT_BUFFER_SIZE, capture=2, playback=2):
+        self.name = name
+        self.sample_rate = sample_rate
+        self.buffer_size = buffer_size
+        self.clients = dict[bytes, _Client]()
+        self.ports = dict[int, _Port]()
+        self.port_names = dict[bytes, _Port]()
+        self.properties = dict[int, dict]()
+        self.next_port_id = 1
+        self.next_uuid = 2
+        self.frames = 0
+        self.usecs = 0
+        self.freewheel = False
+        self.latencies_dirty = False
+        self.transport_state = JackTransportState.STOPPED
+        self.position = jack_position_t()
+        self.position.frame_rate = sample_rate
+        self.pending_position = None
+        self.transport_advance = 0
+        self.timebase_master = None
+        self.internal_clients = dict[int, _Client]()
+
+        system = self.new_client(b"system")
+        system.active = True
+        for i in range(capture):
+            port = self.new_port(
+                system, b"capture_%d" % (i + 1), _AUDIO_TYPE,
+                JackPortFlags.IS_OUTPUT | JackPortFlags.IS_PHYSICAL | JackPortFlags.IS_TERMINAL)
+            port.latency[JackLatencyCallbackMode.CAPTURE] = [buffer_size, buffer_size]
+        for i in range(playback):
+            port = self.new_port(
+                system, b"playback_%d" % (i + 1), _AUDIO_TYPE,
+                JackPortFlags.IS_INPUT | JackPortFlags.IS_PHYSICAL | JackPortFlags.IS_TERMINAL)
+            port.latency[JackLatencyCallbackMode.PLAYBACK] = [buffer_size, buffer_size]
+
+    def uuid(self) -> int:
+        uuid = self.next_uuid
+        self.next_uuid += 1
+        return uuid
+
+    def new_client(self, name: bytes) -> _Client:
+        client = _Client(self, name, self.uuid())
+        self.clients[name] = client
+        return client
+
+    def new_port(self, client: _Client, short_name: bytes, type_: bytes, flags: int) -> _Port:
+        port = _Port(client, short_name, type_, int(flags), self.next_port_id, self.uuid())
+        self.next_port_id += 1
+        self.ports[port.id] = port
+        self.port_names[port.name] = port
+        client.ports.append(port)
+        return port
+
+    def remove_port(self, port: _Port):
+        port.client.ports.remove(port)
+        del self.ports[port.id]
+        del self.port_names[port.name]
+        for alias in port.aliases:
+            self.port_names.pop(alias, None)
+
+    def rename_port(self, port: _Port, short_name: bytes):
+        del self.port_names[port.name]
+        port.short_name = short_name
+        self.port_names[port.name] = port
+
+    def port_by_name(self, name: bytes) -> _Port:
+        return self.port_names.get(name)
+
+    def ordered_clients(self) -> list[_Client]:
+        ''' clients sorted so that upstream clients come first,
+            clients in feedback loops keep their registration order. '''
+        clients = list(self.clients.values())
+        deps = {client: set() for client in clients}
+        for port in self.ports.values():
+            if port.is_output:
+                for dest in port.connections:
+                    if dest.client is not port.client:
+                        deps[dest.client].add(port.client)
+
+        ordered = []
+        remaining = clients
+        while remaining:
+            ready = [c for c in remaining if not deps[c] - set(ordered)]
+            if not ready:
+                ready = remaining[:1]
+            for client in ready:
+                ordered.append(client)
+            remaining = [c for c in remaining if c not in ready]
+        return ordered
+
+
+class FakeJackLib:
+    ''' Simulated libjack, see the module docstring. '''
+
+    def __init__(self, sample_rate=DEFAULT_SAMPLE_RATE, buffer_size=DEFAULT_BUFFER_SIZE):
+        self.sample_rate = sample_rate
+        self.buffer_size = buffer_size
+        self.servers = dict[bytes, _Server]()
+        self._clients = dict[int, _Client]()
+        self._ports = dict[int, _Port]()
+        self._midi_buffers = dict[int, _MidiBuffer]()
+        self._allocations = dict[int, object]()
+        self._error_callback = None
+        self._info_callback = None
+
+        # ctypes code sets argtypes/restype on library functions,
+        # partial objects accept that where bound methods do not.
+        for name in dir(type(self)):
+            if name.startswith("jack_"):
+                setattr(self, name, partial(getattr(type(self), name), self))
+
+        for cb_name in _CALLBACKS:
+            setattr(self, "jack_set_%s_callback" % cb_name,
+                    partial(self._set_callback, cb_name))
+
+    # ---------------------------------------------------------------------------------------------
+    # Simulation control
+
+    def server(self, name=None) -> _Server:
+        if name is None:
+            name = os.environ.get("JACK_DEFAULT_SERVER", "default")
+        if isinstance(name, str):
+            name = name.encode()
+
+        server = self.servers.get(name)
+        if server is None:
+            server = self.servers[name] = _Server(name, self.sample_rate, self.buffer_size)
+            for port in server.ports.values():
+                self._ports[port.address] = port
+        return server
+
+    def reset(self):
+        ''' forget all servers, clients and ports. '''
+        self.servers.clear()
+        self._clients.clear()
+        self._ports.clear()
+        self._midi_buffers.clear()
+        self._allocations.clear()
+
+    def run_cycles(self, count=1, server=None):
+        ''' run count process cycles on server. '''
+        server = self.server(server)
+        for _ in range(count):
+            self._run_cycle(server)
+
+    def _run_cycle(self, server: _Server):
+        nframes = server.buffer_size
+        self._flush_latencies(server)
+        self._update_transport(server, nframes)
+
+        for client in server.ordered_clients():
+            if not client.active:
+                continue
+
+            for port in client.ports:
+                if not port.is_output:
+                    self._mix_input(port, nframes)
+            for port in client.ports:
+                if port.is_output and port.midi is not None:
+                    port.midi.clear()
+                    port.midi.nframes = nframes
+
+            if client.thread_callback is not None:
+                client.cycle_nframes = nframes
+                client.cycle_done.clear()
+                client.cycle_go.set()
+                self._wait_cycle_done(client)
+            elif "process" in client.callbacks:
+                callback, arg = client.callbacks["process"]
+                if callback(nframes, arg):
+                    client.active = False
+
+        server.frames += nframes
+        server.usecs += nframes * 1000000 // server.sample_rate
+        if server.transport_state == JackTransportState.ROLLING:
+            server.transport_advance = nframes
+
+    def _mix_input(self, port: _Port, nframes: int):
+        address = port.buffer_address(nframes)
+        sources = [src for src in port.connections if src.client.active]
+
+        if port.type == _MIDI_TYPE:
+            midi = port.midi
+            midi.clear()
+            midi.nframes = nframes
+            events = []
+            for src in sources:
+                if src.midi is not None:
+                    events.extend(src.midi.events)
+            for time_, size, data in sorted(events, key=lambda e: e[0]):
+                copy = midi.reserve(time_, size)
+                if copy is not None:
+                    memmove(copy, data, size)
+            return
+
+        size = nframes * sizeof(c_float)
+        if not sources:
+            memset(address, 0, size)
+        elif len(sources) == 1:
+            memmove(address, sources[0].buffer_address(nframes), size)
+        else:
+            buffers = [src.audio for src in sources if src.audio is not None]
+            port.audio[:nframes] = [sum(samples) for samples in zip(
+                *(buf[:nframes] for buf in buffers))] if buffers else [0.0] * nframes
+
+    def _update_transport(self, server: _Server, nframes: int):
+        # the position always describes the current cycle,
+        # so a rolling transport moves at the start of the next one.
+        server.position.frame += server.transport_advance
+        server.transport_advance = 0
+        new_pos = 0
+        if server.pending_position is not None:
+            memmove(addressof(server.position), addressof(server.pending_position),
+                    sizeof(jack_position_t))
+            server.position.frame_rate = server.sample_rate
+            server.pending_position = None
+            new_pos = 1
+
+        if server.transport_state == JackTransportState.STARTING:
+            ready = True
+            for client in server.clients.values():
+                if client.active and "sync" in client.callbacks:
+                    callback, arg = client.callbacks["sync"]
+                    if not callback(server.transport_state, pointer(server.position), arg):
+                        ready = False
+            if ready:
+                server.transport_state = JackTransportState.ROLLING
+
+        position = server.position
+        position.usecs = server.usecs
+        position.unique_1 += 1
+
+        master = server.timebase_master
+        if master is not None and (new_pos or server.transport_state
+                                   == JackTransportState.ROLLING):
+            callback, arg = master.callbacks["timebase"]
+            callback(server.transport_state, nframes, pointer(position), new_pos, arg)
+
+        position.unique_2 = position.unique_1
+
+    def _notify(self, server: _Server, name: str, *args, exclude=None):
+        for client in list(server.clients.values()):
+            if client.active and client is not exclude and name in client.callbacks:
+                callback, arg = client.callbacks[name]
+                callback(*args, arg)
+
+    def _error(self, message: str):
+        if self._error_callback is not None:
+            self._error_callback(message.encode())
+
+    def _info(self, message: str):
+        if self._info_callback is not None:
+            self._info_callback(message.encode())
+
+    def _client(self, client) -> _Client:
+        return self._clients.get(_address(client))
+
+    def _port(self, port) -> _Port:
+        return self._ports.get(_address(port))
+
+    def _alloc_strings(self, names: list) -> 'POINTER(c_char_p)':
+        if not names:
+            return POINTER(c_char_p)()
+
+        array = (c_char_p * (len(names) + 1))(*names)
+        self._allocations[addressof(array)] = array
+        return cast(array, POINTER(c_char_p))
+
+    # ---------------------------------------------------------------------------------------------
+    # Client
+
+    def jack_get_version_string(self):
+        return b"fake"
+
+    def jack_client_open(self, client_name: bytes, options, status, *args):
+        options = int(options)
+        args = list(args)
+        server_name = args.pop(0) if options & JackOptions.SERVER_NAME and args else None
+        status = _deref(status)
+        server = self.server(server_name)
+        name = client_name
+
+        if (not name or len(name) >= _CLIENT_NAME_SIZE
+                or options & ~(JackOptions.OPEN_OPTIONS | JackOptions.LOAD_OPTIONS)):
+            if status is not None:
+                status.value = JackStatus.FAILURE | JackStatus.INVALID_OPTION
+            return POINTER(jack_client_t)()
+
+        flags = 0
+        if name in server.clients:
+            if options & JackOptions.USE_EXACT_NAME:
+                if status is not None:
+                    status.value = JackStatus.FAILURE | JackStatus.NAME_NOT_UNIQUE
+                return POINTER(jack_client_t)()
+
+            index = 1
+            while b"%s-%02d" % (client_name, index) in server.clients:
+                index += 1
+            name = b"%s-%02d" % (client_name, index)
+            flags = JackStatus.NAME_NOT_UNIQUE
+
+        if status is not None:
+            status.value = flags
+
+        client = server.new_client(name)
+        self._clients[client.address] = client
+        self._notify(server, "client_registration", name, 1, exclude=client)
+        return client.pointer
+
+    def jack_client_close(self, client) -> int:
+        client = self._client(client)
+        if client is None:
+            return -1
+
+        server = client.server
+        if client.active:
+            self.jack_deactivate(client.pointer)
+        for port in list(client.ports):
+            self.jack_port_unregister(client.pointer, port.pointer)
+        if server.timebase_master is client:
+            server.timebase_master = None
+
+        del server.clients[client.name]
+        del self._clients[client.address]
+        self._notify(server, "client_registration", client.name, 0)
+        return 0
+
+    def jack_client_rename(self, client, new_name: bytes):
+        client = self._client(client)
+        if client is None or new_name in client.server.clients:
+            return None
+
+        server = client.server
+        old_name = client.name
+        del server.clients[old_name]
+        for port in client.ports:
+            del server.port_names[port.name]
+        client.name = new_name
+        for port in client.ports:
+            server.port_names[port.name] = port
+        server.clients[new_name] = client
+        self._notify(server, "client_rename", old_name, new_name, exclude=client)
+        return new_name
+
+    def jack_client_name_size(self) -> int:
+        return _CLIENT_NAME_SIZE
+
+    def jack_get_client_name(self, client):
+        client = self._client(client)
+        return client.name if client else None
+
+    def jack_activate(self, client) -> int:
+        client = self._client(client)
+        if client is None:
+            return -1
+        if client.active:
+            return 0
+
+        client.active = True
+        if client.thread_callback is not None:
+            client.thread = threading.Thread(
+                target=self._process_thread_main, args=(client,), daemon=True)
+            client.thread.start()
+        elif "thread_init" in client.callbacks:
+            callback, arg = client.callbacks["thread_init"]
+            callback(arg)
+
+        client.server.latencies_dirty = True
+        return 0
+
+    def jack_deactivate(self, client) -> int:
+        client = self._client(client)
+        if client is None:
+            return -1
+        if not client.active:
+            return 0
+
+        for port in client.ports:
+            self.jack_port_disconnect(client.pointer, port.pointer)
+        client.active = False
+        return 0
+
+    def jack_get_client_pid(self, name: bytes) -> int:
+        return os.getpid()
+
+    def jack_is_realtime(self, client) -> int:
+        return 0
+
+    # ---------------------------------------------------------------------------------------------
+    # Callbacks and non-callback API
+
+    def _set_callback(self, name: str, client, callback, arg) -> int:
+        client = self._client(client)
+        if client is None or client.active:
+            return -1
+
+        client.callbacks[name] = (callback, arg)
+        return 0
+
+    def jack_on_shutdown(self, client, callback, arg):
+        client = self._client(client)
+        if client is not None:
+            client.shutdown = (callback, arg)
+
+    def jack_on_info_shutdown(self, client, callback, arg):
+        client = self._client(client)
+        if client is not None:
+            client.info_shutdown = (callback, arg)
+
+    def shutdown(self, server=None, reason=b"fake server shut down"):
+        ''' simulate the server going away. '''
+        server = self.server(server)
+        for client in list(server.clients.values()):
+            if client.info_shutdown is not None:
+                callback, arg = client.info_shutdown
+                callback(JackStatus.FAILURE | JackStatus.SERVER_ERROR, reason, arg)
+            elif client.shutdown is not None:
+                callback, arg = client.shutdown
+                callback(arg)
+            client.active = False
+
+    def xrun(self, server=None):
+        ''' simulate an xrun. '''
+        self._notify(self.server(server), "xrun")
+
+    def jack_set_process_thread(self, client, callback, arg) -> int:
+        client = self._client(client)
+        if client is None or client.active:
+            return -1
+
+        client.thread_callback = (callback, arg)
+        return 0
+
+    def _process_thread_main(self, client: _Client):
+        if "thread_init" in client.callbacks:
+            callback, arg = client.callbacks["thread_init"]
+            callback(arg)
+
+        callback, arg = client.thread_callback
+        callback(arg)
+
+    def _wait_cycle_done(self, client: _Client, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        while not client.cycle_done.wait(0.01):
+            if not client.thread.is_alive() or time.monotonic() > deadline:
+                # the thread function returned, the client does not process anymore
+                client.cycle_go.clear()
+                client.active = False
+                return
+
+    def jack_cycle_wait(self, client) -> int:
+        client = self._client(client)
+        client.cycle_go.wait()
+        client.cycle_go.clear()
+        return client.cycle_nframes
+
+    def jack_cycle_signal(self, client, status):
+        client = self._client(client)
+        if status:
+            client.active = False
+        client.cycle_done.set()
+
+    # ---------------------------------------------------------------------------------------------
+    # Server control
+
+    def jack_set_freewheel(self, client, onoff) -> int:
+        client = self._client(client)
+        if client is None:
+            return -1
+
+        server = client.server
+        if bool(onoff) != server.freewheel:
+            server.freewheel = bool(onoff)
+            self._notify(server, "freewheel", int(server.freewheel))
+        return 0
+
+    def jack_set_buffer_size(self, client, nframes) -> int:
+        client = self._client(client)
+        if client is None or nframes <= 0:
+            return -1
+
+        server = client.server
+        server.buffer_size = nframes
+        self._notify(server, "buffer_size", nframes)
+        return 0
+
+    def jack_get_sample_rate(self, client) -> int:
+        client = self._client(client)
+        return client.server.sample_rate if client else 0
+
+    def jack_get_buffer_size(self, client) -> int:
+        client = self._client(client)
+        return client.server.buffer_size if client else 0
+
+    def jack_engine_takeover_timebase(self, client) -> int:
+        return 0
+
+    def jack_cpu_load(self, client) -> float:
+        return 0.0
+
+    # ---------------------------------------------------------------------------------------------
+    # Ports
+
+    def jack_port_register(self, client, port_name: bytes, port_type: bytes,
+                           flags, buffer_size):
+        client = self._client(client)
+        if client is None:
+            return POINTER(jack_port_t)()
+
+        server = client.server
+        full_name = client.name + b":" + port_name
+        if (len(full_name) >= _PORT_NAME_SIZE or server.port_by_name(full_name)
+                or port_type not in (_AUDIO_TYPE, _MIDI_TYPE)):
+            self._error("Cannot register port '%s'" % full_name.decode(errors="replace"))
+            return POINTER(jack_port_t)()
+
+        port = server.new_port(client, port_name, port_type, flags)
+        self._ports[port.address] = port
+        self._notify(server, "port_registration", port.id, 1)
+        return port.pointer
+
+    def jack_port_unregister(self, client, port) -> int:
+        client, port = self._client(client), self._port(port)
+        if client is None or port is None or port.client is not client:
+            return -1
+
+        server = client.server
+        self.jack_port_disconnect(client.pointer, port.pointer)
+        server.remove_port(port)
+        del self._ports[port.address]
+        if port.midi is not None:
+            self._midi_buffers.pop(port.midi.address, None)
+        if server.properties.pop(port.uuid, None):
+            self._notify(server, "property_change", port.uuid, None, JackPropertyChange.DELETED)
+        self._notify(server, "port_registration", port.id, 0)
+        return 0
+
+    def jack_port_get_buffer(self, port, nframes) -> int:
+        port = self._port(port)
+        if port is None:
+            return None
+
+        address = port.buffer_address(nframes)
+        if port.midi is not None:
+            self._midi_buffers[address] = port.midi
+        return address
+
+    def jack_port_name(self, port):
+        port = self._port(port)
+        return port.name if port else None
+
+    def jack_port_short_name(self, port):
+        port = self._port(port)
+        return port.short_name if port else None
+
+    def jack_port_flags(self, port) -> int:
+        port = self._port(port)
+        return port.flags if port else 0
+
+    def jack_port_type(self, port):
+        port = self._port(port)
+        return port.type if port else None
+
+    def jack_port_type_id(self, port) -> int:
+        port = self._port(port)
+        return int(port.type == _MIDI_TYPE) if port else 0
+
+    def jack_port_is_mine(self, client, port) -> int:
+        client, port = self._client(client), self._port(port)
+        return int(port is not None and port.client is client)
+
+    def jack_port_connected(self, port) -> int:
+        port = self._port(port)
+        return len(port.connections) if port else 0
+
+    def jack_port_connected_to(self, port, port_name: bytes) -> int:
+        port = self._port(port)
+        return int(port is not None
+                   and any(other.name == port_name for other in port.connections))
+
+    def _connection_names(self, port):
+        port = self._port(port)
+        return self._alloc_strings([other.name for other in port.connections] if port else [])
+
+    def jack_port_get_connections(self, port):
+        return self._connection_names(port)
+
+    def jack_port_get_all_connections(self, client, port):
+        return self._connection_names(port)
+
+    def jack_port_tie(self, src, dst) -> int:
+        return -1
+
+    def jack_port_untie(self, port) -> int:
+        return -1
+
+    def jack_port_set_name(self, port, port_name: bytes) -> int:
+        port = self._port(port)
+        if port is None:
+            return -1
+        return self.jack_port_rename(port.client.pointer, port.pointer, port_name)
+
+    def jack_port_rename(self, client, port, port_name: bytes) -> int:
+        port = self._port(port)
+        if port is None:
+            return -1
+
+        server = port.client.server
+        old_name = port.name
+        new_short_name = port_name.split(b":", 1)[1] if b":" in port_name else port_name
+        if server.port_by_name(port.client.name + b":" + new_short_name):
+            return -1
+
+        server.rename_port(port, new_short_name)
+        self._notify(server, "port_rename", port.id, old_name, port.name)
+        return 0
+
+    def jack_port_set_alias(self, port, alias: bytes) -> int:
+        port = self._port(port)
+        if port is None or len(port.aliases) >= 2:
+            return -1
+
+        port.aliases.append(alias)
+        port.client.server.port_names.setdefault(alias, port)
+        return 0
+
+    def jack_port_unset_alias(self, port, alias: bytes) -> int:
+        port = self._port(port)
+        if port is None or alias not in port.aliases:
+            return -1
+
+        port.aliases.remove(alias)
+        if port.client.server.port_names.get(alias) is port:
+            del port.client.server.port_names[alias]
+        return 0
+
+    def jack_port_get_aliases(self, port, aliases) -> int:
+        port = self._port(port)
+        if port is None:
+            return -1
+
+        aliases = _deref(aliases)
+        for index, alias in enumerate(port.aliases):
+            aliases[index] = alias
+        return len(port.aliases)
+
+    def jack_port_request_monitor(self, port, onoff) -> int:
+        port = self._port(port)
+        if port is None:
+            return -1
+
+        port.monitor_requests = max(0, port.monitor_requests + (1 if onoff else -1))
+        return 0
+
+    def jack_port_request_monitor_by_name(self, client, port_name: bytes, onoff) -> int:
+        client = self._client(client)
+        port = client.server.port_by_name(port_name) if client else None
+        if port is None:
+            return -1
+        return self.jack_port_request_monitor(port.pointer, onoff)
+
+    def jack_port_ensure_monitor(self, port, onoff) -> int:
+        port = self._port(port)
+        if port is None:
+            return -1
+
+        if onoff and not port.monitor_requests:
+            port.monitor_requests = 1
+        elif not onoff:
+            port.monitor_requests = 0
+        return 0
+
+    def jack_port_monitoring_input(self, port) -> int:
+        port = self._port(port)
+        return int(bool(port and port.monitor_requests))
+
+    def jack_connect(self, client, source_port: bytes, destination_port: bytes) -> int:
+        client = self._client(client)
+        if client is None:
+            return -1
+
+        server = client.server
+        src = server.port_by_name(source_port)
+        dst = server.port_by_name(destination_port)
+        if (src is None or dst is None or not src.is_output or dst.is_output
+                or src.type != dst.type):
+            self._error("Cannot connect '%s' to '%s'" % (
+                source_port.decode(errors="replace"),
+                destination_port.decode(errors="replace")))
+            return -1
+        if dst in src.connections:
+            return _EEXIST
+
+        src.connections.append(dst)
+        dst.connections.append(src)
+        self._notify(server, "port_connect", src.id, dst.id, 1)
+        self._notify(server, "graph_order")
+        server.latencies_dirty = True
+        return 0
+
+    def _disconnect(self, server: _Server, src: _Port, dst: _Port):
+        src.connections.remove(dst)
+        dst.connections.remove(src)
+        self._notify(server, "port_connect", src.id, dst.id, 0)
+        self._notify(server, "graph_order")
+
+    def jack_disconnect(self, client, source_port: bytes, destination_port: bytes) -> int:
+        client = self._client(client)
+        if client is None:
+            return -1
+
+        server = client.server
+        src = server.port_by_name(source_port)
+        dst = server.port_by_name(destination_port)
+        if src is None or dst is None or dst not in src.connections:
+            return -1
+
+        self._disconnect(server, src, dst)
+        server.latencies_dirty = True
+        return 0
+
+    def jack_port_disconnect(self, client, port) -> int:
+        port = self._port(port)
+        if port is None:
+            return -1
+
+        if not port.connections:
+            return 0
+
+        server = port.client.server
+        for other in list(port.connections):
+            if port.is_output:
+                self._disconnect(server, port, other)
+            else:
+                self._disconnect(server, other, port)
+        server.latencies_dirty = True
+        return 0
+
+    def jack_port_name_size(self) -> int:
+        return _PORT_NAME_SIZE
+
+    def jack_port_type_size(self) -> int:
+        return _PORT_TYPE_SIZE
+
+    def jack_port_type_get_buffer_size(self, client, port_type: bytes) -> int:
+        client = self._client(client)
+        if client is None:
+            return 0
+        if port_type == _MIDI_TYPE:
+            return MIDI_BUFFER_SIZE
+        return client.server.buffer_size * sizeof(c_float)
+
+    def jack_port_uuid(self, port) -> int:
+        port = self._port(port)
+        return port.uuid if port else 0
+
+    # ---------------------------------------------------------------------------------------------
+    # Latency
+
+    def _flush_latencies(self, server: _Server):
+        # like jackd, latencies are recomputed once after a batch of
+        # graph changes, not on every connection.
+        if server.latencies_dirty:
+            self._update_latencies(server)
+
+    def _update_latencies(self, server: _Server):
+        server.latencies_dirty = False
+        capture = JackLatencyCallbackMode.CAPTURE
+        playback = JackLatencyCallbackMode.PLAYBACK
+        system = server.clients.get(b"system")
+        ordered = server.ordered_clients()
+
+        for client in ordered:
+            inputs = [p for p in client.ports if not p.is_output]
+            outputs = [p for p in client.ports if p.is_output]
+            for port in inputs:
+                port.latency[capture] = _combine(
+                    src.latency[capture] for src in port.connections)
+            if client is system or not client.active:
+                continue
+            if "latency" in client.callbacks:
+                callback, arg = client.callbacks["latency"]
+                callback(capture, arg)
+            else:
+                latency = _combine(p.latency[capture] for p in inputs)
+                for port in outputs:
+                    port.latency[capture] = list(latency)
+
+        for client in reversed(ordered):
+            inputs = [p for p in client.ports if not p.is_output]
+            outputs = [p for p in client.ports if p.is_output]
+            for port in outputs:
+                port.latency[playback] = _combine(
+                    dst.latency[playback] for dst in port.connections)
+            if client is system or not client.active:
+                continue
+            if "latency" in client.callbacks:
+                callback, arg = client.callbacks["latency"]
+                callback(playback, arg)
+            else:
+                latency = _combine(p.latency[playback] for p in outputs)
+                for port in inputs:
+                    port.latency[playback] = list(latency)
+
+    def jack_port_set_latency(self, port, nframes):
+        port = self._port(port)
+        if port is not None:
+            mode = (JackLatencyCallbackMode.CAPTURE if port.is_output
+                    else JackLatencyCallbackMode.PLAYBACK)
+            port.latency[mode] = [nframes, nframes]
+
+    def jack_port_get_latency_range(self, port, mode, range_):
+        port = self._port(port)
+        range_ = _deref(range_)
+        if port is not None:
+            self._flush_latencies(port.client.server)
+            range_.min, range_.max = port.latency[JackLatencyCallbackMode(mode)]
+
+    def jack_port_set_latency_range(self, port, mode, range_):
+        port = self._port(port)
+        range_ = _deref(range_)
+        if port is not None:
+            port.latency[JackLatencyCallbackMode(mode)] = [range_.min, range_.max]
+
+    def jack_recompute_total_latencies(self, client) -> int:
+        client = self._client(client)
+        if client is None:
+            return -1
+
+        self._update_latencies(client.server)
+        return 0
+
+    def jack_port_get_latency(self, port) -> int:
+        port = self._port(port)
+        if port is None:
+            return 0
+
+        self._flush_latencies(port.client.server)
+        mode = (JackLatencyCallbackMode.CAPTURE if port.is_output
+                else JackLatencyCallbackMode.PLAYBACK)
+        return port.latency[mode][1]
+
+    def jack_port_get_total_latency(self, client, port) -> int:
+        return self.jack_port_get_latency(port)
+
+    def jack_recompute_total_latency(self, client, port) -> int:
+        return self.jack_recompute_total_latencies(client)
+
+    # ---------------------------------------------------------------------------------------------
+    # Port searching
+
+    def jack_get_ports(self, client, port_name_pattern: bytes,
+                       type_name_pattern: bytes, flags):
+        client = self._client(client)
+        if client is None:
+            return POINTER(c_char_p)()
+
+        name_re = re.compile(port_name_pattern) if port_name_pattern else None
+        type_re = re.compile(type_name_pattern) if type_name_pattern else None
+        flags = int(flags)
+        names = [
+            port.name for port in client.server.ports.values()
+            if (not flags or port.flags & flags == flags)
+            and (name_re is None or name_re.search(port.name))
+            and (type_re is None or type_re.search(port.type))
+        ]
+        return self._alloc_strings(names)
+
+    def jack_port_by_name(self, client, port_name: bytes):
+        client = self._client(client)
+        port = client.server.port_by_name(port_name) if client else None
+        return port.pointer if port else POINTER(jack_port_t)()
+
+    def jack_port_by_id(self, client, port_id):
+        client = self._client(client)
+        port = client.server.ports.get(port_id) if client else None
+        return port.pointer if port else POINTER(jack_port_t)()
+
+    # ---------------------------------------------------------------------------------------------
+    # Time
+
+    def jack_frames_since_cycle_start(self, client) -> int:
+        return 0
+
+    def jack_frame_time(self, client) -> int:
+        client = self._client(client)
+        return client.server.frames & 0xFFFFFFFF if client else 0
+
+    def jack_last_frame_time(self, client) -> int:
+        return self.jack_frame_time(client)
+
+    def jack_get_cycle_times(self, client, current_frames, current_usecs,
+                             next_usecs, period_usecs) -> int:
+        client = self._client(client)
+        if client is None:
+            return -1
+
+        server = client.server
+        period = server.buffer_size * 1000000 / server.sample_rate
+        _deref(current_frames).value = server.frames & 0xFFFFFFFF
+        _deref(current_usecs).value = server.usecs
+        _deref(next_usecs).value = server.usecs + int(period)
+        _deref(period_usecs).value = period
+        return 0
+
+    def jack_frames_to_time(self, client, nframes) -> int:
+        client = self._client(client)
+        if client is None:
+            return 0
+
+        server = client.server
+        return server.usecs + (nframes - server.frames) * 1000000 // server.sample_rate
+
+    def jack_time_to_frames(self, client, usecs) -> int:
+        client = self._client(client)
+        if client is None:
+            return 0
+
+        server = client.server
+        frames = server.frames + (usecs - server.usecs) * server.sample_rate // 1000000
+        return frames & 0xFFFFFFFF
+
+    def jack_get_time(self) -> int:
+        return int(time.monotonic() * 1000000)
+
+    # ---------------------------------------------------------------------------------------------
+    # Misc
+
+    def jack_free(self, ptr):
+        self._allocations.pop(_address(ptr), None)
+
+    def jack_set_error_function(self, callback):
+        self._error_callback = callback
+
+    def jack_set_info_function(self, callback):
+        self._info_callback = callback
+
+    # ---------------------------------------------------------------------------------------------
+    # Transport
+
+    def jack_release_timebase(self, client) -> int:
+        client = self._client(client)
+        if client is None or client.server.timebase_master is not client:
+            return -1
+
+        client.server.timebase_master = None
+        return 0
+
+    def jack_set_sync_timeout(self, client, timeout) -> int:
+        return 0
+
+    def jack_set_timebase_callback(self, client, conditional, callback, arg) -> int:
+        client = self._client(client)
+        if client is None:
+            return -1
+
+        server = client.server
+        if conditional and server.timebase_master not in (None, client):
+            return _EBUSY
+
+        client.callbacks["timebase"] = (callback, arg)
+        server.timebase_master = client
+        return 0
+
+    def jack_transport_locate(self, client, frame) -> int:
+        client = self._client(client)
+        if client is None:
+            return -1
+
+        pos = jack_position_t()
+        pos.frame = frame
+        client.server.pending_position = pos
+        return 0
+
+    def jack_transport_query(self, client, pos) -> int:
+        client = self._client(client)
+        if client is None:
+            return JackTransportState.STOPPED
+
+        server = client.server
+        if pos:
+            memmove(_address(pos), addressof(server.position), sizeof(jack_position_t))
+        return server.transport_state
+
+    def jack_get_current_transport_frame(self, client) -> int:
+        client = self._client(client)
+        return client.server.position.frame if client else 0
+
+    def jack_transport_reposition(self, client, pos) -> int:
+        client = self._client(client)
+        if client is None:
+            return -1
+
+        new_pos = jack_position_t()
+        memmove(addressof(new_pos), _address(pos), sizeof(jack_position_t))
+        client.server.pending_position = new_pos
+        return 0
+
+    def jack_transport_start(self, client):
+        client = self._client(client)
+        if client is not None and client.server.transport_state == JackTransportState.STOPPED:
+            client.server.transport_state = JackTransportState.STARTING
+
+    def jack_transport_stop(self, client):
+        client = self._client(client)
+        if client is not None:
+            client.server.transport_state = JackTransportState.STOPPED
+
+    # ---------------------------------------------------------------------------------------------
+    # MIDI
+
+    def jack_midi_get_event_count(self, port_buffer) -> int:
+        midi = self._midi_buffers.get(_address(port_buffer))
+        return len(midi.events) if midi else 0
+
+    def jack_midi_event_get(self, event, port_buffer, event_index) -> int:
+        midi = self._midi_buffers.get(_address(port_buffer))
+        if midi is None or event_index >= len(midi.events):
+            return _ENODATA
+
+        event = _deref(event)
+        event.time, event.size, data = midi.events[event_index]
+        event.buffer = cast(data, POINTER(jack_midi_data_t))
+        return 0
+
+    def jack_midi_clear_buffer(self, port_buffer):
+        midi = self._midi_buffers.get(_address(port_buffer))
+        if midi is not None:
+            midi.clear()
+
+    def jack_midi_max_event_size(self, port_buffer) -> int:
+        midi = self._midi_buffers.get(_address(port_buffer))
+        return MIDI_BUFFER_SIZE - midi.used if midi else 0
+
+    def jack_midi_event_reserve(self, port_buffer, time_, data_size):
+        midi = self._midi_buffers.get(_address(port_buffer))
+        data = midi.reserve(time_, data_size) if midi else None
+        if data is None:
+            return POINTER(jack_midi_data_t)()
+        return cast(data, POINTER(jack_midi_data_t))
+
+    def jack_midi_event_write(self, port_buffer, time_, data, data_size) -> int:
+        midi = self._midi_buffers.get(_address(port_buffer))
+        dest = midi.reserve(time_, data_size) if midi else None
+        if dest is None:
+            return _ENOBUFS
+
+        if isinstance(data, (bytes, bytearray)):
+            data = bytes(data)
+        else:
+            data = string_at(_address(data), data_size)
+        memmove(dest, data, data_size)
+        return 0
+
+    def jack_midi_get_lost_event_count(self, port_buffer) -> int:
+        midi = self._midi_buffers.get(_address(port_buffer))
+        return midi.lost if midi else 0
+
+    # ---------------------------------------------------------------------------------------------
+    # Internal clients
+
+    def _load_inprocess(self, client: _Client):
+        # like the inprocess example of JACK, copies its input to its output
+        audio = _AUDIO_TYPE
+        in_port = self.jack_port_register(
+            client.pointer, b"input", audio, JackPortFlags.IS_INPUT, 0)
+        out_port = self.jack_port_register(
+            client.pointer, b"output", audio, JackPortFlags.IS_OUTPUT, 0)
+        in_port, out_port = self._port(in_port), self._port(out_port)
+
+        def process(nframes, arg):
+            memmove(out_port.buffer_address(nframes), in_port.buffer_address(nframes),
+                    nframes * sizeof(c_float))
+            return 0
+
+        client.callbacks["process"] = (process, None)
+
+    _INTERNAL_CLIENTS = {b"inprocess": _load_inprocess}
+
+    def jack_internal_client_load(self, client, client_name: bytes, options, status, *args):
+        client = self._client(client)
+        options = int(options)
+        status = _deref(status)
+        args = list(args)
+        # same order as jack_varargs_parse()
+        if options & JackOptions.SERVER_NAME and args:
+            args.pop(0)
+        load_name = _bytes(args.pop(0)) if options & JackOptions.LOAD_NAME and args else None
+        if options & JackOptions.LOAD_INIT and args:
+            args.pop(0)
+
+        loader = self._INTERNAL_CLIENTS.get(load_name or client_name)
+        if client is None or loader is None:
+            if status is not None:
+                status.value = JackStatus.FAILURE | JackStatus.LOAD_FAILURE
+            return 0
+
+        internal = self._client(self.jack_client_open(
+            client_name, options & JackOptions.USE_EXACT_NAME | JackOptions.SERVER_NAME,
+            status, client.server.name))
+        if internal is None:
+            return 0
+
+        internal.server.internal_clients[internal.uuid] = internal
+        loader(self, internal)
+        self.jack_activate(internal.pointer)
+        return internal.uuid
+
+    def jack_internal_client_handle(self, client, client_name: bytes, status) -> int:
+        client = self._client(client)
+        status = _deref(status)
+        for handle, internal in (client.server.internal_clients.items() if client else ()):
+            if internal.name == client_name:
+                if status is not None:
+                    status.value = 0
+                return handle
+
+        if status is not None:
+            status.value = JackStatus.FAILURE | JackStatus.NO_SUCH_CLIENT
+        return 0
+
+    def jack_get_internal_client_name(self, client, intclient):
+        client = self._client(client)
+        internal = client.server.internal_clients.get(_int(intclient)) if client else None
+        if internal is None:
+            return None
+
+        name = create_string_buffer(internal.name)
+        self._allocations[addressof(name)] = name
+        return addressof(name)
+
+    def jack_internal_client_unload(self, client, intclient) -> int:
+        client = self._client(client)
+        internal = client.server.internal_clients.pop(_int(intclient), None) if client else None
+        if internal is None:
+            return int(JackStatus.FAILURE | JackStatus.NO_SUCH_CLIENT)
+
+        self.jack_client_close(internal.pointer)
+        return 0
+
+    # ---------------------------------------------------------------------------------------------
+    # Session and UUIDs
+
+    def jack_session_reply(self, client, event) -> int:
+        return 0
+
+    def jack_session_event_free(self, event):
+        pass
+
+    def jack_client_get_uuid(self, client):
+        client = self._client(client)
+        return b"%d" % client.uuid if client else None
+
+    def jack_session_notify(self, client, target, type_, path):
+        return None
+
+    def jack_session_commands_free(self, cmds):
+        pass
+
+    def jack_get_uuid_for_client_name(self, client, client_name: bytes):
+        client = self._client(client)
+        other = client.server.clients.get(client_name) if client else None
+        return b"%d" % other.uuid if other else None
+
+    def jack_get_client_name_by_uuid(self, client, client_uuid: bytes):
+        client = self._client(client)
+        if client is None:
+            return None
+
+        for other in client.server.clients.values():
+            if b"%d" % other.uuid == client_uuid:
+                return other.name
+        return None
+
+    def jack_reserve_client_name(self, client, name: bytes, uuid: bytes) -> int:
+        return 0
+
+    def jack_client_has_session_callback(self, client, client_name: bytes) -> int:
+        client = self._client(client)
+        other = client.server.clients.get(client_name) if client else None
+        if other is None:
+            return -1
+        return int("session" in other.callbacks)
+
+    def jack_uuid_parse(self, uuid_cstr: bytes, uuid) -> int:
+        try:
+            value = int(uuid_cstr)
+        except (TypeError, ValueError):
+            return -1
+
+        _deref(uuid).value = value
+        return 0
+
+    def jack_uuid_unparse(self, uuid, uuid_str):
+        uuid_str.value = b"%d" % _int(uuid)
+
+    # ---------------------------------------------------------------------------------------------
+    # Metadata
+
+    def _metadata_server(self, client=None) -> _Server:
+        client = self._client(client) if client is not None else None
+        return client.server if client is not None else self.server()
+
+    def _fill_description(self, desc: jack_description_t, subject: int, props: dict):
+        array = (jack_property_t * len(props))()
+        for index, (key, (value, type_)) in enumerate(props.items()):
+            array[index].key = key
+            array[index].data = value
+            array[index].type = type_
+
+        desc.subject = subject
+        desc.property_cnt = len(props)
+        desc.property_size = len(props)
+        desc.properties = cast(array, POINTER(jack_property_t))
+        self._allocations[addressof(array)] = array
+
+    def jack_free_description(self, description, free_description_itself):
+        description = _deref(description)
+        if description.properties:
+            self.jack_free(description.properties)
+
+    def jack_get_all_properties(self, descriptions) -> int:
+        server = self._metadata_server()
+        subjects = [(s, p) for s, p in server.properties.items() if p]
+        array = (jack_description_t * len(subjects))()
+        for index, (subject, props) in enumerate(subjects):
+            self._fill_description(array[index], subject, props)
+
+        self._allocations[addressof(array)] = array
+        c_void_p.from_address(addressof(_deref(descriptions))).value = (
+            addressof(array) if subjects else None)
+        return len(subjects)
+
+    def jack_get_properties(self, subject, description) -> int:
+        props = self._metadata_server().properties.get(_int(subject))
+        if not props:
+            return -1
+
+        self._fill_description(_deref(description), _int(subject), props)
+        return len(props)
+
+    def jack_get_property(self, subject, key: bytes, value, type_) -> int:
+        props = self._metadata_server().properties.get(_int(subject), {})
+        if key not in props:
+            return -1
+
+        _deref(value).value, _deref(type_).value = props[key]
+        return 0
+
+    def jack_remove_all_properties(self, client) -> int:
+        server = self._metadata_server(client)
+        subjects = [s for s, p in server.properties.items() if p]
+        server.properties.clear()
+        for subject in subjects:
+            self._notify(server, "property_change", subject, None, JackPropertyChange.DELETED)
+        return 0
+
+    def jack_remove_properties(self, client, subject) -> int:
+        server = self._metadata_server(client)
+        subject = _int(subject)
+        props = server.properties.pop(subject, None)
+        if not props:
+            return -1
+
+        self._notify(server, "property_change", subject, None, JackPropertyChange.DELETED)
+        return len(props)
+
+    def jack_remove_property(self, client, subject, key: bytes) -> int:
+        server = self._metadata_server(client)
+        subject = _int(subject)
+        props = server.properties.get(subject, {})
+        if key not in props:
+            return -1
+
+        del props[key]
+        self._notify(server, "property_change", subject, key, JackPropertyChange.DELETED)
+        return 0
+
+    def jack_set_property(self, client, subject, key: bytes, value: bytes, type_: bytes) -> int:
+        server = self._metadata_server(client)
+        subject = _int(subject)
+        if not subject or key is None:
+            return -1
+
+        props = server.properties.setdefault(subject, {})
+        change = JackPropertyChange.CHANGED if key in props else JackPropertyChange.CREATED
+        props[key] = (value, type_ or None)
+        self._notify(server, "property_change", subject, key, change)
+        return 0
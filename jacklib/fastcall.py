@@ -0,0 +1,82 @@
+"""Fast-call layer for the libjack functions used in process callbacks.
+
+The CDLL functions configured in cdll_funcs convert every argument through
+the from_param() of their POINTER argtypes. FastCalls binds the same C
+functions again with plain c_void_p / integer prototypes, so callers holding
+raw addresses (see address()) skip most of that conversion, and binds the
+functions taking a client to that client once.
+
+There is no validation at all: a wrong address crashes the process. Only
+use it with addresses already checked, typically resolved before activate().
+"""
+
+from ctypes import (
+    CDLL,
+    CFUNCTYPE,
+    c_int,
+    c_size_t,
+    c_uint32,
+    c_void_p,
+    cast,
+)
+from functools import partial
+
+from .api import jlib
+from .types import jack_nframes_t, jack_transport_state_t
+
+# name: (restype, argtypes), argtypes first item is None for
+# functions whose first argument is the client.
+_PROTOTYPES = {
+    "jack_port_get_buffer": (c_void_p, (c_void_p, jack_nframes_t)),
+    "jack_frame_time": (jack_nframes_t, (None,)),
+    "jack_last_frame_time": (jack_nframes_t, (None,)),
+    "jack_frames_since_cycle_start": (jack_nframes_t, (None,)),
+    "jack_transport_query": (jack_transport_state_t, (None, c_void_p)),
+    "jack_midi_get_event_count": (jack_nframes_t, (c_void_p,)),
+    "jack_midi_event_get": (c_int, (c_void_p, c_void_p, c_uint32)),
+    "jack_midi_clear_buffer": (None, (c_void_p,)),
+    "jack_midi_event_reserve": (c_void_p, (c_void_p, jack_nframes_t, c_size_t)),
+    "jack_midi_event_write": (c_int, (c_void_p, jack_nframes_t, c_void_p, c_size_t)),
+}
+
+
+def address(obj) -> int:
+    ''' raw address of a port, client or buffer pointer. '''
+    if obj is None or isinstance(obj, int):
+        return obj
+    return cast(obj, c_void_p).value
+
+
+class FastCalls:
+    ''' Hot libjack functions for one client, taking raw addresses.
+
+        Attributes are named after the libjack functions without the
+        'jack_' prefix; the client argument is already bound:
+
+            fast = FastCalls(client)
+            port_addr = address(port)
+            ...
+            buf = fast.port_get_buffer(port_addr, nframes)
+            now = fast.frame_time() '''
+
+    def __init__(self, client):
+        self.client = client
+        self.client_address = address(client)
+
+        for name, (restype, argtypes) in _PROTOTYPES.items():
+            func = getattr(jlib, name, None)
+            if func is None:
+                continue
+
+            if isinstance(jlib, CDLL):
+                prototype = CFUNCTYPE(restype, *(t or c_void_p for t in argtypes))
+                func = prototype(cast(func, c_void_p).value)
+            elif restype is c_void_p:
+                # the fake backend returns ctypes pointers,
+                # callers of this layer expect addresses.
+                func = partial(lambda f, *args: address(f(*args)), func)
+
+            if argtypes[0] is None:
+                func = partial(func, self.client_address)
+
+            setattr(self, name[5:], func)
@@ -70,7 +70,7 @@ def get_jack_status_error_string(cStatus):
 def c_char_p_p_to_list(c_char_p_p: 'pointer[c_char_p]',
                        encoding=jacklib.ENCODING,
                        errors="ignore") -> list[str]:
-    """Convert C char** -> Python list of strings."""
+    """Convert C char** -> Python list of strings, of bytes if encoding is None."""
     i = 0
     ret_list = list[str]()
 
@@ -82,7 +82,8 @@ def c_char_p_p_to_list(c_char_p_p: 'pointer[c_char_p]',
         if not new_char_p:
             break
 
-        ret_list.append(new_char_p.decode(encoding=encoding, errors=errors))
+        ret_list.append(new_char_p.decode(encoding=encoding, errors=errors)
+                        if encoding else new_char_p)
         i += 1
 
     jacklib.free(c_char_p_p)
@@ -0,0 +1,220 @@
+"""Round-trip latency measurement, like jack_iodelay.
+
+IODelay plays a burst of pseudo-random noise on its output port once per
+window and records its input port. Connect the output to a playback port,
+loop the hardware output back to an input, and connect that capture port
+to the input. The delay is the peak of the cross-correlation of the burst
+with the recording, computed with FFTs, refined to a fraction of a frame
+from the cross spectrum. It is compared with the latency the ports
+report, which is what latency compensation relies on.
+
+    pyjacklib-iodelay --connect system:playback_1 system:capture_1
+"""
+
+import argparse
+import queue
+import sys
+from collections import deque, namedtuple
+from ctypes import byref
+
+import numpy as np
+
+from . import api as jacklib
+from .api import JACK_DEFAULT_AUDIO_TYPE
+from .arrays import port_array
+from .enums import JackLatencyCallbackMode, JackOptions, JackPortFlags
+from .helpers import get_jack_status_error_string
+from .types import jack_latency_range_t, jack_status_t
+
+IODelayResult = namedtuple(
+    "IODelayResult", ("frames", "milliseconds", "reported", "extra", "inverted", "correlation"))
+IODelayResult.__doc__ = ''' frames is the measured delay, reported the (min, max) latency
+    of the ports (playback latency of the output plus capture latency of the
+    input) and extra = frames - reported max, the latency the ports do not
+    report. inverted is True if the loop inverts polarity, correlation the
+    normalized peak (1.0 for a perfect copy). '''
+
+
+def find_delay(signal: np.ndarray, recording: np.ndarray, max_delay=None, resolution=32):
+    ''' (delay in frames, normalized correlation) of signal in recording.
+
+        The delay is fractional: around the peak, the correlation is
+        evaluated every 1/resolution frame from the cross spectrum, and
+        refined by parabolic interpolation. The correlation is negative
+        if the polarity is inverted. '''
+    max_delay = len(recording) - len(signal) if max_delay is None else max_delay
+    size = 1 << (len(recording) + len(signal) - 1).bit_length()
+    cross = np.fft.rfft(recording, size) * np.conj(np.fft.rfft(signal, size))
+    lags = np.fft.irfft(cross, size)[:max_delay + 1]
+    peak = int(np.argmax(np.abs(lags)))
+
+    # band limited interpolation between the neighbour frames
+    weights = np.full(len(cross), 2.0)
+    weights[0] = weights[-1] = 1.0
+    fine = peak + np.linspace(-1.0, 1.0, 2 * resolution + 1)
+    phases = np.exp(2j * np.pi * np.outer(fine, np.arange(len(cross))) / size)
+    fine_lags = (phases @ (weights * cross)).real / size
+    values = np.abs(fine_lags)
+    index = int(np.argmax(values))
+
+    delay = float(fine[index])
+    if 0 < index < len(values) - 1:
+        y0, y1, y2 = values[index - 1:index + 2]
+        denom = y0 - 2.0 * y1 + y2
+        if denom:
+            delay += 0.5 * (y0 - y2) / denom / resolution
+    delay = min(max(delay, 0.0), float(max_delay))
+
+    segment = recording[peak:peak + len(signal)]
+    norm = np.sqrt(np.dot(signal, signal) * np.dot(segment, segment))
+    return delay, float(fine_lags[index] / norm) if norm else 0.0
+
+
+class IODelay:
+    ''' Round-trip measurement client with an "out" and an "in" port.
+
+        Every window frames (signal_length + max_delay, at least), the
+        process callback starts the burst again and queues the recording of
+        the window; measure() analyzes them. Delays above max_delay frames
+        are not found. '''
+
+    def __init__(self, client, signal_length=8192, max_delay=None, level=0.5,
+                 output_name="out", input_name="in", threshold=0.3, seed=0):
+        self.client = client
+        self.sample_rate = jacklib.get_sample_rate(client)
+        self.max_delay = max_delay or self.sample_rate // 2
+        self.threshold = threshold
+
+        ports = jacklib.port_register_many(client, [
+            (output_name, JACK_DEFAULT_AUDIO_TYPE, JackPortFlags.IS_OUTPUT),
+            (input_name, JACK_DEFAULT_AUDIO_TYPE, JackPortFlags.IS_INPUT)])
+        if ports is None:
+            raise OSError("Could not register iodelay ports")
+        self.out_port, self.in_port = ports
+
+        rng = np.random.default_rng(seed)
+        self.signal = (level * rng.uniform(-1.0, 1.0, signal_length)).astype(np.float32)
+        self.window = signal_length + self.max_delay
+        self._output = np.zeros(self.window, dtype=np.float32)
+        self._output[:signal_length] = self.signal
+
+        # recordings go process thread -> measure() -> back to the free list
+        self._free = deque(np.zeros(self.window, dtype=np.float32) for _ in range(3))
+        self._recorded = queue.SimpleQueue()
+        self._recording = self._free.popleft()
+        self._pos = 0
+        self.dropped = 0
+
+    # ---------------------------------------------------------------------------------------------
+    # Process thread
+
+    def process(self, nframes: int):
+        out = port_array(self.out_port, nframes)
+        in_ = port_array(self.in_port, nframes)
+        window, output = self.window, self._output
+        pos, done = self._pos, 0
+
+        while done < nframes:
+            count = min(nframes - done, window - pos)
+            out[done:done + count] = output[pos:pos + count]
+            if self._recording is not None:
+                self._recording[pos:pos + count] = in_[done:done + count]
+            pos += count
+            done += count
+
+            if pos == window:
+                pos = 0
+                if self._recording is not None:
+                    self._recorded.put(self._recording)
+                else:
+                    self.dropped += 1
+                self._recording = self._free.popleft() if self._free else None
+
+        self._pos = pos
+
+    def process_callback(self, nframes: int, arg) -> int:
+        self.process(nframes)
+        return 0
+
+    def register(self):
+        jacklib.set_process_callback(self.client, self.process_callback, None)
+
+    # ---------------------------------------------------------------------------------------------
+
+    def reported_latency(self) -> tuple[int, int]:
+        ''' (min, max) latency the ports report for the loop. '''
+        playback, capture = jack_latency_range_t(), jack_latency_range_t()
+        jacklib.port_get_latency_range(
+            self.out_port, JackLatencyCallbackMode.PLAYBACK, byref(playback))
+        jacklib.port_get_latency_range(
+            self.in_port, JackLatencyCallbackMode.CAPTURE, byref(capture))
+        return playback.min + capture.min, playback.max + capture.max
+
+    def analyze(self, recording: np.ndarray):
+        ''' IODelayResult of one recorded window, None if the signal is not in it. '''
+        delay, corr = find_delay(self.signal, recording, self.max_delay)
+        if abs(corr) < self.threshold:
+            return None
+
+        reported = self.reported_latency()
+        return IODelayResult(delay, 1000.0 * delay / self.sample_rate, reported,
+                             delay - reported[1], corr < 0, abs(corr))
+
+    def measure(self, timeout=None):
+        ''' analyze the next recorded window, waiting up to timeout seconds.
+            Returns None if there was none or the signal was not found. '''
+        try:
+            recording = self._recorded.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+        try:
+            return self.analyze(recording)
+        finally:
+            self._free.append(recording)
+
+
+def main(args=None):
+    ap = argparse.ArgumentParser(
+        prog="pyjacklib-iodelay", description=__doc__.splitlines()[0])
+    ap.add_argument("-c", "--connect", nargs=2, metavar=("PLAYBACK", "CAPTURE"),
+                    help="connect the output to PLAYBACK and CAPTURE to the input")
+    ap.add_argument("-n", "--count", type=int, default=0,
+                    help="stop after COUNT measurements (default: run until interrupted)")
+    opts = ap.parse_args(args)
+
+    status = jack_status_t()
+    client = jacklib.client_open("pyjacklib-iodelay", JackOptions.NO_START_SERVER, status)
+    if not client:
+        sys.exit("Could not connect to JACK server: " + get_jack_status_error_string(status))
+
+    try:
+        meter = IODelay(client)
+        meter.register()
+        jacklib.activate(client)
+        if opts.connect:
+            jacklib.connect(client, jacklib.port_name(meter.out_port), opts.connect[0])
+            jacklib.connect(client, opts.connect[1], jacklib.port_name(meter.in_port))
+
+        measured = 0
+        while not opts.count or measured < opts.count:
+            result = meter.measure(timeout=5.0)
+            measured += 1
+            if result is None:
+                print("Signal not found, check connections", flush=True)
+                continue
+
+            print("%8.3f frames %7.3f ms total roundtrip latency" % (
+                result.frames, result.milliseconds), end="")
+            print(", extra loopback latency: %.3f frames" % result.extra, end="")
+            print(" (inverted)" if result.inverted else "", flush=True)
+    except OSError as exc:
+        sys.exit(str(exc))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        jacklib.client_close(client)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""Graph-wide latency analysis.
+
+LatencyAnalyzer reads the latency ranges of all ports in one sweep and
+computes best / worst case latency for every source to sink path of the
+graph. The graph topology (port order and edges) is kept between updates:
+a latency change only re-reads the ranges and walks the precomputed order
+again, only graph changes sort the graph again.
+
+Model: a path starts at an output port without predecessor (physical
+capture port, generator...) and ends at an input port without successor
+(physical playback port, recorder...). Its latency is the capture latency
+of the source, plus for each client crossed the difference between the
+capture latencies of its output and input ports, plus the playback
+latency of the sink. Ports of physical or terminal clients are not linked
+inside their client.
+"""
+
+from array import array
+from ctypes import byref
+
+from . import api as jacklib
+from .api import jlib
+from .enums import JackLatencyCallbackMode, JackPortFlags
+from .helpers import c_char_p_p_to_list
+from .types import jack_latency_range_t
+
+_CAPTURE = JackLatencyCallbackMode.CAPTURE
+_PLAYBACK = JackLatencyCallbackMode.PLAYBACK
+_IS_OUTPUT = int(JackPortFlags.IS_OUTPUT)
+_NOT_LINKED = int(JackPortFlags.IS_PHYSICAL | JackPortFlags.IS_TERMINAL)
+
+
+class LatencyAnalyzer:
+    ''' End to end latencies of the graph seen by client.
+
+        Call register() on an inactive client without ports (it sets the
+        latency, graph order and port registration callbacks), or call the
+        *_callback() methods from your own callbacks.
+        Callbacks only set flags, the work is done by the next call to
+        paths() or latency(), in the calling thread. '''
+
+    def __init__(self, client):
+        self.client = client
+        self.names = list[bytes]()
+        self.index = dict[bytes, int]()
+        self.capture_min = array("I")
+        self.capture_max = array("I")
+        self.playback_min = array("I")
+        self.playback_max = array("I")
+        self.cyclic = list[bytes]()
+        self._ports = []
+        self._order = list[int]()
+        self._preds = list[list]()
+        self._sources = list[int]()
+        self._sinks = list[int]()
+        self._paths = {}
+        self._graph_dirty = True
+        self._latency_dirty = True
+
+    # ---------------------------------------------------------------------------------------------
+    # Callbacks
+
+    def latency_callback(self, mode, arg):
+        self._latency_dirty = True
+
+    def graph_order_callback(self, arg) -> int:
+        self._graph_dirty = True
+        return 0
+
+    def port_registration_callback(self, port_id, register, arg):
+        self._graph_dirty = True
+
+    def register(self):
+        jacklib.set_latency_callback(self.client, self.latency_callback, None)
+        jacklib.set_graph_order_callback(self.client, self.graph_order_callback, None)
+        jacklib.set_port_registration_callback(
+            self.client, self.port_registration_callback, None)
+
+    # ---------------------------------------------------------------------------------------------
+    # Sweeps
+
+    def _read_topology(self):
+        client = self.client
+        names = c_char_p_p_to_list(jlib.jack_get_ports(client, b"", b"", 0), None)
+        ports, flags, kept = [], [], []
+        for name in names:
+            port = jlib.jack_port_by_name(client, name)
+            if port:
+                kept.append(name)
+                ports.append(port)
+                flags.append(jlib.jack_port_flags(port))
+
+        self.names = names = kept
+        self.index = index = {name: i for i, name in enumerate(names)}
+        self._ports = ports
+        count = len(names)
+        preds = [[] for _ in range(count)]
+        succ_count = [0] * count
+
+        # connections, edge kind 0
+        for i, port in enumerate(ports):
+            if flags[i] & _IS_OUTPUT:
+                for dest in c_char_p_p_to_list(
+                        jlib.jack_port_get_all_connections(client, port), None):
+                    j = index.get(dest)
+                    if j is not None:
+                        preds[j].append((i, 0))
+                        succ_count[i] += 1
+
+        # inside clients, edge kind 1
+        by_client = {}
+        for i, name in enumerate(names):
+            if not flags[i] & _NOT_LINKED:
+                by_client.setdefault(name.partition(b":")[0], []).append(i)
+        for members in by_client.values():
+            inputs = [i for i in members if not flags[i] & _IS_OUTPUT]
+            for o in members:
+                if flags[o] & _IS_OUTPUT:
+                    preds[o].extend((i, 1) for i in inputs)
+                    for i in inputs:
+                        succ_count[i] += 1
+
+        # Kahn's topological sort
+        pending = [len(p) for p in preds]
+        succs = [[] for _ in range(count)]
+        for j, pred in enumerate(preds):
+            for i, _ in pred:
+                succs[i].append(j)
+
+        order = [i for i in range(count) if not pending[i]]
+        for i in order:
+            for j in succs[i]:
+                pending[j] -= 1
+                if not pending[j]:
+                    order.append(j)
+
+        self.cyclic = [names[i] for i in range(count) if pending[i]]
+        self._order = order
+        self._preds = preds
+        self._sources = [i for i in range(count) if flags[i] & _IS_OUTPUT and not preds[i]]
+        self._sinks = [i for i in range(count)
+                       if not flags[i] & _IS_OUTPUT and not succ_count[i] and not pending[i]]
+        self._graph_dirty = False
+        self._latency_dirty = True
+
+    def _read_latencies(self):
+        get_range = jlib.jack_port_get_latency_range
+        range_ = jack_latency_range_t()
+        range_ref = byref(range_)
+        lists = ([], [], [], [])
+
+        for port in self._ports:
+            get_range(port, _CAPTURE, range_ref)
+            lists[0].append(range_.min)
+            lists[1].append(range_.max)
+            get_range(port, _PLAYBACK, range_ref)
+            lists[2].append(range_.min)
+            lists[3].append(range_.max)
+
+        self.capture_min, self.capture_max, self.playback_min, self.playback_max = (
+            array("I", values) for values in lists)
+        self._latency_dirty = False
+
+    def _compute_paths(self):
+        cap_min, cap_max = self.capture_min, self.capture_max
+        preds = self._preds
+        # port index -> {source index: (best, worst)}
+        reach = {i: {i: (cap_min[i], cap_max[i])} for i in self._sources}
+
+        for j in self._order:
+            if not preds[j]:
+                continue
+
+            ranges = {}
+            for i, kind in preds[j]:
+                if kind:
+                    add_min = max(0, cap_min[j] - cap_min[i])
+                    add_max = max(0, cap_max[j] - cap_max[i])
+                else:
+                    add_min = add_max = 0
+
+                for source, (best, worst) in reach.get(i, {}).items():
+                    best, worst = best + add_min, worst + add_max
+                    current = ranges.get(source)
+                    if current is not None:
+                        best, worst = min(best, current[0]), max(worst, current[1])
+                    ranges[source] = (best, worst)
+
+            if ranges:
+                reach[j] = ranges
+
+        names, pb_min, pb_max = self.names, self.playback_min, self.playback_max
+        paths = {}
+        for sink in self._sinks:
+            for source, (best, worst) in reach.get(sink, {}).items():
+                paths[(names[source], names[sink])] = (
+                    best + pb_min[sink], worst + pb_max[sink])
+
+        self._paths = paths
+
+    def update(self) -> bool:
+        ''' re-read what changed since the last update, returns
+            whether paths were recomputed. '''
+        if not (self._graph_dirty or self._latency_dirty):
+            return False
+
+        if self._graph_dirty:
+            self._read_topology()
+        self._read_latencies()
+        self._compute_paths()
+        return True
+
+    # ---------------------------------------------------------------------------------------------
+    # Results
+
+    def paths(self) -> dict:
+        ''' {(source name, sink name): (best, worst)} in frames. '''
+        self.update()
+        return self._paths
+
+    def latency(self, source: str, sink: str):
+        ''' (best, worst) latency in frames from source to sink,
+            None if sink is not reached from source. '''
+        return self.paths().get((source.encode(jacklib.ENCODING), sink.encode(jacklib.ENCODING)))
+
+    def compensation(self, sinks) -> dict:
+        ''' delay to add before each sink so that the worst case latencies
+            of all paths to sinks are aligned, {sink name: frames}. '''
+        worst = {}
+        paths = self.paths()
+        for sink in sinks:
+            key = sink.encode(jacklib.ENCODING)
+            worst[sink] = max((w for (_, s), (_, w) in paths.items() if s == key), default=0)
+
+        longest = max(worst.values(), default=0)
+        return {sink: longest - value for sink, value in worst.items()}
@@ -0,0 +1,136 @@
+"""Buffered forwarding of libjack error and info messages to logging.
+
+libjack calls its error and info functions from whatever thread hits the
+problem, including notification and process threads. ctypes callbacks
+always take the GIL, so the handlers installed here do as little as
+possible: they append the raw message to a bounded deque (an atomic
+operation, no lock) and return. A daemon thread wakes up every interval,
+decodes the messages and passes them to a logger, with rate limiting and
+collapsing of repeated messages.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+
+from . import api as jacklib
+
+log = logging.getLogger(__name__)
+
+
+class BufferedJackLog:
+    ''' Install with start(), normally once for the whole process.
+
+        At most rate messages per second are logged, further ones are
+        counted and reported in one warning. Identical consecutive
+        messages are logged once with a repeat count. When the buffer
+        is full the oldest messages are dropped and counted as well. '''
+
+    def __init__(self, logger=None, capacity=1024, interval=0.1, rate=50, info=True):
+        self.logger = logger or log
+        self.interval = interval
+        self.rate = rate
+        self.info = info
+        self.dropped = 0
+        self.suppressed = 0
+        self._ring = deque(maxlen=capacity)
+        self._stop = threading.Event()
+        self._thread = None
+        self._last = None
+        self._repeats = 0
+        self._budget = rate
+        self._budget_time = -1.0
+
+    # ---------------------------------------------------------------------------------------------
+    # libjack side, keep these short
+
+    def _on_error(self, message):
+        ring = self._ring
+        if len(ring) == ring.maxlen:
+            self.dropped += 1
+        ring.append((logging.ERROR, message))
+
+    def _on_info(self, message):
+        ring = self._ring
+        if len(ring) == ring.maxlen:
+            self.dropped += 1
+        ring.append((logging.INFO, message))
+
+    # ---------------------------------------------------------------------------------------------
+    # Drain thread
+
+    def _flush_repeats(self):
+        if self._repeats:
+            level, message = self._last
+            self.logger.log(level, "%s (repeated %d times)", message, self._repeats)
+            self._repeats = 0
+
+    def _emit(self, level, message, now):
+        if (level, message) == self._last:
+            self._repeats += 1
+            return
+
+        self._flush_repeats()
+        self._last = (level, message)
+
+        if now - self._budget_time >= 1.0:
+            self._budget_time = now
+            self._budget = self.rate
+        if self._budget <= 0:
+            self.suppressed += 1
+            return
+
+        self._budget -= 1
+        self.logger.log(level, "%s", message)
+
+    def drain(self):
+        ''' log buffered messages, called by the drain thread. '''
+        ring = self._ring
+        now = time.monotonic()
+
+        while ring:
+            level, message = ring.popleft()
+            self._emit(level, message.decode(jacklib.ENCODING, errors="replace"), now)
+
+        self._flush_repeats()
+        self._last = None
+
+        dropped, self.dropped = self.dropped, 0
+        suppressed, self.suppressed = self.suppressed, 0
+        if dropped or suppressed:
+            self.logger.warning(
+                "JACK log: %d messages dropped, %d messages over rate limit",
+                dropped, suppressed)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.drain()
+        self.drain()
+
+    # ---------------------------------------------------------------------------------------------
+
+    def start(self):
+        jacklib.set_error_function(self._on_error)
+        if self.info:
+            jacklib.set_info_function(self._on_info)
+
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="jacklib-log", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        ''' stop the drain thread after logging what is left.
+            The handlers stay installed and keep buffering. '''
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
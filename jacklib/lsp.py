@@ -0,0 +1,200 @@
+"""List JACK ports, connections, aliases, latencies and properties.
+
+A faster, machine-readable jack_lsp. The graph is read in one sweep (see
+snapshot.capture) and printed as text, one JSON document or NDJSON (one
+port per line). With --watch, changes reported by notification callbacks
+are then streamed, one event per line.
+
+    pyjacklib-lsp --format json
+    pyjacklib-lsp --format ndjson --watch
+"""
+
+import argparse
+import json
+import os
+import queue
+import sys
+from ctypes import byref
+
+from . import api as jacklib
+from .api import ENCODING, jlib
+from .enums import JackLatencyCallbackMode, JackOptions, JackPortFlags, JackPropertyChange
+from .helpers import get_jack_status_error_string
+from .snapshot import capture
+from .types import jack_latency_range_t, jack_status_t
+
+_FLAGS = [(flag.name.lower(), int(flag)) for flag in JackPortFlags]
+
+
+def _s(value):
+    if value is None:
+        return None
+    return value.decode(ENCODING, errors="replace")
+
+
+def graph(client, latencies=True, properties=True) -> list[dict]:
+    ''' all ports as dicts ready for JSON. '''
+    snapshot = capture(client, properties)
+    connections = {}
+    for src, dst in snapshot.connections:
+        connections.setdefault(src, []).append(dst)
+        connections.setdefault(dst, []).append(src)
+
+    range_ = jack_latency_range_t()
+    range_ref = byref(range_)
+    ports = []
+
+    for port in snapshot.ports:
+        info = {
+            "name": _s(port.name),
+            "uuid": port.uuid,
+            "type": _s(port.type),
+            "flags": [name for name, flag in _FLAGS if port.flags & flag],
+            "aliases": [_s(alias) for alias in port.aliases],
+            "connections": [_s(name) for name in connections.get(port.name, ())],
+        }
+
+        if latencies and jlib.jack_port_get_latency_range:
+            jack_port = jlib.jack_port_by_name(client, port.name)
+            latency = info["latency"] = {}
+            for mode in JackLatencyCallbackMode:
+                jlib.jack_port_get_latency_range(jack_port, mode, range_ref)
+                latency[mode.name.lower()] = [range_.min, range_.max]
+
+        if properties:
+            info["properties"] = {
+                _s(prop.key): _s(prop.value) if _is_text(prop.type) else None
+                for prop in snapshot.properties.get(port.uuid, ())}
+        ports.append(info)
+
+    return ports
+
+
+def _is_text(type_) -> bool:
+    # values of other types are binary, they are not printed
+    return not type_ or type_.startswith(b"text/") or type_.startswith(b"http")
+
+
+def format_text(ports, stream):
+    for port in ports:
+        print(port["name"], file=stream)
+        for alias in port["aliases"]:
+            print("   alias:", alias, file=stream)
+        for connection in port["connections"]:
+            print("   ", connection, file=stream)
+        print("\ttype:", port["type"], file=stream)
+        print("\tflags:", ", ".join(port["flags"]), file=stream)
+        for mode, (min_, max_) in port.get("latency", {}).items():
+            print("\t%s latency: [ %d %d ]" % (mode, min_, max_), file=stream)
+        for key, value in port.get("properties", {}).items():
+            print("\t%s: %s" % (key, value), file=stream)
+
+
+def dump(ports, fmt, stream):
+    if fmt == "text":
+        format_text(ports, stream)
+    elif fmt == "json":
+        json.dump({"ports": ports}, stream, indent=2)
+        stream.write("\n")
+    else:
+        for port in ports:
+            stream.write(json.dumps(port, separators=(",", ":")) + "\n")
+    stream.flush()
+
+
+class Watcher:
+    ''' queues graph change events from notification callbacks.
+
+        Callbacks only resolve names and put a dict in the queue, the
+        events are printed by the thread calling run(). '''
+
+    def __init__(self, client):
+        self.client = client
+        self.events = queue.Queue()
+
+    def _port_name(self, port_id):
+        port = jlib.jack_port_by_id(self.client, port_id)
+        return jacklib.port_name(port) if port else None
+
+    def _on_client_registration(self, name, register, arg):
+        self.events.put({"event": "client_registered" if register else "client_unregistered",
+                         "client": _s(name)})
+
+    def _on_port_registration(self, port_id, register, arg):
+        self.events.put({"event": "port_registered" if register else "port_unregistered",
+                         "port": self._port_name(port_id)})
+
+    def _on_port_rename(self, port_id, old_name, new_name, arg):
+        self.events.put({"event": "port_renamed", "old": _s(old_name), "new": _s(new_name)})
+
+    def _on_port_connect(self, port_a, port_b, connect, arg):
+        self.events.put({"event": "connected" if connect else "disconnected",
+                         "source": self._port_name(port_a),
+                         "destination": self._port_name(port_b)})
+
+    def _on_property_change(self, subject, key, change, arg):
+        self.events.put({"event": "property_" + JackPropertyChange(change).name.lower(),
+                         "subject": subject, "key": _s(key)})
+
+    def register(self):
+        client = self.client
+        jacklib.set_client_registration_callback(client, self._on_client_registration, None)
+        jacklib.set_port_registration_callback(client, self._on_port_registration, None)
+        jacklib.set_port_rename_callback(client, self._on_port_rename, None)
+        jacklib.set_port_connect_callback(client, self._on_port_connect, None)
+        jacklib.set_property_change_callback(client, self._on_property_change, None)
+
+    def run(self, fmt, stream, timeout=None):
+        ''' print events until interrupted, or until no event came for timeout seconds. '''
+        while True:
+            try:
+                event = self.events.get(timeout=timeout)
+            except queue.Empty:
+                return
+
+            if fmt == "text":
+                print(" ".join("%s" % value for value in event.values()), file=stream)
+            else:
+                stream.write(json.dumps(event, separators=(",", ":")) + "\n")
+            stream.flush()
+
+
+def main(args=None):
+    ap = argparse.ArgumentParser(
+        prog="pyjacklib-lsp", description=__doc__.splitlines()[0])
+    ap.add_argument("-f", "--format", choices=("text", "json", "ndjson"), default="text")
+    ap.add_argument("-w", "--watch", action="store_true",
+                    help="after the listing, print graph changes as they happen "
+                         "(one JSON object per line with json or ndjson)")
+    ap.add_argument("--no-latency", action="store_true", help="do not read port latencies")
+    ap.add_argument("--no-properties", action="store_true", help="do not read metadata")
+    opts = ap.parse_args(args)
+
+    status = jack_status_t()
+    client = jacklib.client_open("pyjacklib-lsp", JackOptions.NO_START_SERVER, status)
+    if not client:
+        sys.exit("Could not connect to JACK server: " + get_jack_status_error_string(status))
+
+    try:
+        if opts.watch:
+            # callbacks must be set before the listing, not to miss anything
+            watcher = Watcher(client)
+            watcher.register()
+            jacklib.activate(client)
+
+        dump(graph(client, not opts.no_latency, not opts.no_properties),
+             opts.format, sys.stdout)
+
+        if opts.watch:
+            watcher.run(opts.format, sys.stdout)
+    except KeyboardInterrupt:
+        pass
+    except BrokenPipeError:
+        # output piped to head or similar, silence the error at exit
+        sys.stdout = open(os.devnull, "w")
+    finally:
+        jacklib.client_close(client)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Batched metadata writes.
+
+Every jack_set_property() call makes the server notify all clients having
+a property change callback. MetadataBatch collects updates, reads the
+current metadata once when committing, and only writes the properties
+whose value or type actually changes.
+"""
+
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from ctypes import POINTER
+
+from . import api as jacklib
+from .api import ENCODING, JACK_METADATA_PRETTY_NAME, jlib
+from .types import jack_port_t, jack_uuid_t
+
+WriteResult = namedtuple("WriteResult", ("subject", "key", "written", "status"))
+WriteResult.__doc__ = ''' written is False for updates skipped because the current
+    value is the same, status is the libjack return value (0 if skipped). '''
+
+_REMOVE = object()
+
+
+def _bytes(value, encoding):
+    if value is None or isinstance(value, bytes):
+        return value
+    return value.encode(encoding)
+
+
+def _subject(subject) -> int:
+    # get_all_properties() gives int subjects
+    return subject.value if isinstance(subject, jack_uuid_t) else int(subject)
+
+
+class MetadataBatch:
+    ''' Collects property updates for client and applies them at once.
+
+            batch = MetadataBatch(client)
+            for port, name in names.items():
+                batch.set_port_pretty_name(port, name)
+            results = batch.commit()
+
+        Only the last update of a (subject, key) pair is kept. commit_async()
+        runs the commit in a worker thread and returns a Future. '''
+
+    def __init__(self, client, encoding=ENCODING):
+        self.client = client
+        self.encoding = encoding
+        self._updates = {}
+        self._executor = None
+
+    def __len__(self):
+        return len(self._updates)
+
+    def set(self, subject, key, value, type=None):
+        ''' subject is a uuid, as an int or a jack_uuid_t. '''
+        encoding = self.encoding
+        self._updates[(_subject(subject), _bytes(key, encoding))] = (
+            _bytes(value, encoding), _bytes(type, encoding))
+
+    def remove(self, subject, key):
+        self._updates[(_subject(subject), _bytes(key, self.encoding))] = _REMOVE
+
+    def set_port(self, port, key, value, type=None):
+        if not isinstance(port, POINTER(jack_port_t)):
+            port = jacklib.port_by_name(self.client, port)
+        self.set(jacklib.port_uuid(port), key, value, type)
+
+    def set_port_pretty_name(self, port, value):
+        self.set_port(port, JACK_METADATA_PRETTY_NAME, value, "text/plain")
+
+    def commit(self) -> list[WriteResult]:
+        updates, self._updates = self._updates, {}
+        return self._apply(updates)
+
+    def _apply(self, updates: dict) -> list[WriteResult]:
+        if not updates:
+            return []
+
+        current = {
+            (subject, prop.key): (prop.value, prop.type)
+            for subject, props in jacklib.get_all_properties(encoding=None).items()
+            for prop in props}
+        client = self.client
+        results = []
+
+        for (subject, key), update in updates.items():
+            existing = current.get((subject, key))
+            if update is _REMOVE:
+                if existing is None:
+                    results.append(WriteResult(subject, key, False, 0))
+                else:
+                    status = jlib.jack_remove_property(client, subject, key)
+                    results.append(WriteResult(subject, key, True, status))
+            elif existing == update:
+                results.append(WriteResult(subject, key, False, 0))
+            else:
+                status = jlib.jack_set_property(client, subject, key, *update)
+                results.append(WriteResult(subject, key, True, status))
+
+        return results
+
+    def commit_async(self):
+        ''' commit in the worker thread, returns a concurrent.futures.Future
+            of the list of results. Updates added meanwhile go to the next commit. '''
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(1, thread_name_prefix="jacklib-metadata")
+
+        updates, self._updates = self._updates, {}
+        return self._executor.submit(self._apply, updates)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
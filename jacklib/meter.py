@@ -0,0 +1,136 @@
+"""Vectorized peak, RMS and true-peak metering of audio ports."""
+
+from collections import namedtuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .arrays import PortBufferArray, SnapshotArrays
+
+MeterReading = namedtuple("MeterReading", ("peak", "rms", "true_peak"))
+
+# cycles kept to restart the values from the snapshot a reset refers to
+_HISTORY = 16
+
+
+def _catmull_rom_matrix(oversampling: int) -> np.ndarray:
+    ''' weights of x0..x3 giving the curve between x1 and x2
+        at t = k / oversampling, for k in 1..oversampling-1. '''
+    t = np.arange(1, oversampling, dtype=np.float64)[:, None] / oversampling
+    t2, t3 = t * t, t * t * t
+    return np.hstack((
+        -0.5 * t3 + t2 - 0.5 * t,
+        1.5 * t3 - 2.5 * t2 + 1.0,
+        -1.5 * t3 + 2.0 * t2 + 0.5 * t,
+        0.5 * t3 - 0.5 * t2,
+    )).T.astype(np.float32)
+
+
+class PortMeter:
+    ''' Meter a list of audio ports.
+
+        Call process() from the process callback. Values are accumulated
+        from one read() to the next one, so short peaks are not missed
+        by a GUI polling at a low rate. True peak is approximated with
+        cubic interpolation at the given oversampling factor.
+
+        A reset applies to the values read: cycles published after the
+        snapshot it follows are kept for the next read(). '''
+
+    def __init__(self, ports: list, max_frames: int, oversampling=4):
+        self.buffers = PortBufferArray(ports, max_frames)
+        self.oversampling = oversampling
+        self._interp = _catmull_rom_matrix(oversampling)
+
+        channels = len(self.buffers.ports)
+        self._ext = np.zeros((channels, max_frames + 3), dtype=np.float32)
+        self._history = np.zeros((channels, 3), dtype=np.float32)
+        self._peak = np.zeros(channels, dtype=np.float32)
+        self._true_peak = np.zeros(channels, dtype=np.float32)
+        self._sum_squares = np.zeros(channels, dtype=np.float64)
+        self._frames = 0
+        self._hist_peak = np.zeros((_HISTORY, channels), dtype=np.float32)
+        self._hist_true_peak = np.zeros((_HISTORY, channels), dtype=np.float32)
+        self._hist_sum_squares = np.zeros((_HISTORY, channels), dtype=np.float64)
+        self._hist_frames = np.zeros(_HISTORY, dtype=np.int64)
+        # snapshot version a reset was requested after, set by read()
+        self._reset_version = None
+        self.snapshot = SnapshotArrays(("peak", "rms", "true_peak"), channels)
+
+    def _reset(self, version: int):
+        ''' restart the values from the cycles published after version. '''
+        unread = self.snapshot.version - version
+        if unread > _HISTORY:
+            # too old to restart from, keep everything rather than lose cycles
+            return
+
+        slots = [(version + i) % _HISTORY for i in range(1, unread + 1)]
+        if slots:
+            self._peak[...] = self._hist_peak[slots].max(axis=0)
+            self._true_peak[...] = self._hist_true_peak[slots].max(axis=0)
+            self._sum_squares[...] = self._hist_sum_squares[slots].sum(axis=0)
+            self._frames = int(self._hist_frames[slots].sum())
+        else:
+            self._peak.fill(0.0)
+            self._true_peak.fill(0.0)
+            self._sum_squares.fill(0.0)
+            self._frames = 0
+
+    def process(self, nframes: int):
+        if not nframes:
+            return
+
+        if nframes > self.buffers.max_frames:
+            self.buffers.resize(nframes)
+            self._ext = np.zeros((len(self.buffers.ports), nframes + 3), dtype=np.float32)
+
+        version = self._reset_version
+        if version is not None:
+            self._reset_version = None
+            self._reset(version)
+
+        # the 3 last samples of the previous cycle stay in front,
+        # interpolation needs them to cover cycle boundaries.
+        ext = self._ext[:, :nframes + 3]
+        ext[:, :3] = self._history
+        samples = ext[:, 3:]
+        samples[...] = self.buffers.read(nframes)
+        self._history[...] = ext[:, -3:]
+
+        # this cycle goes to the history slot of the version it publishes
+        slot = (self.snapshot.version + 1) % _HISTORY
+        peak = self._hist_peak[slot]
+        true_peak = self._hist_true_peak[slot]
+        sum_squares = self._hist_sum_squares[slot]
+        np.abs(samples).max(axis=1, out=peak)
+        np.einsum("ij,ij->i", samples, samples, dtype=np.float64, out=sum_squares)
+        self._hist_frames[slot] = nframes
+
+        windows = sliding_window_view(ext, 4, axis=1)[:, :nframes]
+        np.maximum(peak, np.abs(windows @ self._interp).max(axis=(1, 2)), out=true_peak)
+
+        np.maximum(self._peak, peak, out=self._peak)
+        np.maximum(self._true_peak, true_peak, out=self._true_peak)
+        self._sum_squares += sum_squares
+        self._frames += nframes
+
+        self.snapshot.publish(
+            peak=self._peak,
+            rms=np.sqrt(self._sum_squares / self._frames),
+            true_peak=self._true_peak)
+
+    def process_callback(self, nframes: int, arg) -> int:
+        self.process(nframes)
+        return 0
+
+    def read(self, reset=True) -> MeterReading:
+        ''' return the values accumulated since the last reset,
+            or None if no consistent snapshot could be read. '''
+        version, values = self.snapshot.read_versioned()
+        if values is None:
+            return None
+
+        if reset:
+            self._reset_version = version
+
+        return MeterReading(values["peak"], values["rms"], values["true_peak"])
@@ -0,0 +1,215 @@
+"""MIDI clock and MIDI time code generator following the JACK transport.
+
+MidiClock writes MIDI clock (24 per quarter note), Start, Stop, Continue
+and Song Position Pointer messages, and MTC quarter frames, on a MIDI
+output port. Each message is reserved at its own frame offset in the
+cycle: the frames of the clock ticks and quarter frames of a period are
+computed at the start of the cycle from the transport position, tempo
+comes from the BBT data of the timebase master if there is one.
+
+After a relocation, playback resumes with Continue and the first clock
+on the next sixteenth note, the position sent with Song Position Pointer,
+so that receivers stay exactly in phase.
+"""
+
+from ctypes import byref, memmove
+from math import ceil, floor
+from operator import itemgetter
+
+from . import api as jacklib
+from .api import JACK_DEFAULT_MIDI_TYPE, jlib
+from .enums import JackPortFlags, JackPositionBits, JackTransportState
+from .types import jack_position_t
+
+CLOCK = b"\xf8"
+START = b"\xfa"
+CONTINUE = b"\xfb"
+STOP = b"\xfc"
+
+# MTC rate code of the supported frame rates
+MTC_RATES = {24: 0, 25: 1, 30: 3}
+
+_ROLLING = int(JackTransportState.ROLLING)
+_BBT = int(JackPositionBits.POSITION_BBT)
+
+
+def song_position(sixteenths: int) -> bytes:
+    return bytes((0xF2, sixteenths & 0x7F, (sixteenths >> 7) & 0x7F))
+
+
+def timecode(frames: int, fps: int) -> tuple[int, int, int, int]:
+    ''' (hours, minutes, seconds, frames) of a count of timecode frames. '''
+    seconds, frame = divmod(frames, fps)
+    minutes, second = divmod(seconds, 60)
+    hours, minute = divmod(minutes, 60)
+    return hours % 24, minute, second, frame
+
+
+def mtc_full_frame(frames: int, fps: int) -> bytes:
+    hours, minutes, seconds, frame = timecode(frames, fps)
+    return bytes((0xF0, 0x7F, 0x7F, 0x01, 0x01,
+                  MTC_RATES[fps] << 5 | hours, minutes, seconds, frame, 0xF7))
+
+
+def mtc_quarter_frame(index: int, fps: int) -> bytes:
+    ''' quarter frame number index since transport frame 0. Each group of
+        8 carries the timecode of the frame at which its first one is sent. '''
+    piece = index & 7
+    hours, minutes, seconds, frame = timecode((index - piece) // 4, fps)
+    value = (frame, seconds, minutes, hours | MTC_RATES[fps] << 5)[piece >> 1]
+    nibble = value >> 4 if piece & 1 else value & 0x0F
+    return bytes((0xF1, piece << 4 | nibble))
+
+
+class MidiClock:
+    ''' MIDI sync generator on its own MIDI output port.
+
+        beats_per_minute is the tempo used when no timebase master
+        provides BBT. MTC is sent at mtc_fps (24, 25 or 30, non drop)
+        if mtc is True. '''
+
+    def __init__(self, client, port_name="clock", clock=True, mtc=False, mtc_fps=25,
+                 beats_per_minute=120.0):
+        if mtc and mtc_fps not in MTC_RATES:
+            raise ValueError("mtc_fps must be one of %s" % ", ".join(map(str, MTC_RATES)))
+
+        self.client = client
+        self.clock = clock
+        self.mtc = mtc
+        self.mtc_fps = mtc_fps
+        self.beats_per_minute = beats_per_minute
+        self.sample_rate = jacklib.get_sample_rate(client)
+        self.port = jacklib.port_register(
+            client, port_name, JACK_DEFAULT_MIDI_TYPE, JackPortFlags.IS_OUTPUT, 0)
+        if not self.port:
+            raise OSError("Could not register MIDI clock port")
+
+        self.lost = 0
+        self._pos = jack_position_t()
+        self._pos_ref = byref(self._pos)
+        self._rolling = False
+        self._expected = None
+        self._last_frame = None
+        self._next_clock = 0.0
+        self._frames_per_clock = 0.0
+        self._pending = None
+
+    # ---------------------------------------------------------------------------------------------
+    # Schedule
+
+    def _tempo(self):
+        ''' (frames per clock, quarter notes at the cycle start or None). '''
+        pos = self._pos
+        if pos.valid & _BBT and pos.beats_per_minute > 0:
+            quarters_per_beat = 4.0 / pos.beat_type
+            quarters = ((pos.bar - 1) * pos.beats_per_bar + pos.beat - 1
+                        + pos.tick / pos.ticks_per_beat) * quarters_per_beat
+            beats_per_minute = pos.beats_per_minute * quarters_per_beat
+        else:
+            quarters = None
+            beats_per_minute = self.beats_per_minute
+        return 60.0 * self.sample_rate / (beats_per_minute * 24.0), quarters
+
+    def _clocks_at(self, frame, frames_per_clock, quarters) -> float:
+        if quarters is None:
+            return frame / frames_per_clock
+        return quarters * 24.0
+
+    def _locate(self, events, frame, frames_per_clock, quarters):
+        ''' resume from frame, on the next sixteenth note. '''
+        clocks = self._clocks_at(frame, frames_per_clock, quarters)
+        sixteenths = ceil(clocks / 6.0 - 1e-9)
+        self._next_clock = frame + (sixteenths * 6.0 - clocks) * frames_per_clock
+        if sixteenths:
+            events.append((0, song_position(sixteenths)))
+            self._pending = CONTINUE
+        else:
+            self._pending = START
+
+    def _schedule(self, nframes: int, state: int) -> list:
+        ''' (offset, message) of this cycle, in time order. '''
+        pos = self._pos
+        frame = pos.frame
+        events = []
+        relocated = frame != self._expected
+
+        if state != _ROLLING:
+            if self._rolling:
+                self._rolling = False
+                if self.clock:
+                    events.append((0, STOP))
+            if frame != self._last_frame:
+                # position changes while stopped
+                if self.clock:
+                    frames_per_clock, quarters = self._tempo()
+                    clocks = self._clocks_at(frame, frames_per_clock, quarters)
+                    events.append((0, song_position(int(clocks // 6.0))))
+                if self.mtc:
+                    events.append((0, mtc_full_frame(
+                        floor(frame * self.mtc_fps / self.sample_rate), self.mtc_fps)))
+            self._last_frame = frame
+            self._expected = frame
+            return events
+
+        end = frame + nframes
+
+        if self.clock:
+            frames_per_clock, quarters = self._tempo()
+            if not self._rolling or relocated:
+                if self._rolling:
+                    events.append((0, STOP))
+                self._locate(events, frame, frames_per_clock, quarters)
+            elif frames_per_clock != self._frames_per_clock:
+                # tempo change, the part of the clock period left is scaled
+                self._next_clock = frame + (max(self._next_clock - frame, 0.0)
+                                            * frames_per_clock / self._frames_per_clock)
+            self._frames_per_clock = frames_per_clock
+
+            next_clock = self._next_clock
+            while next_clock < end:
+                offset = max(int(next_clock - frame), 0)
+                if self._pending is not None:
+                    events.append((offset, self._pending))
+                    self._pending = None
+                events.append((offset, CLOCK))
+                next_clock += frames_per_clock
+            self._next_clock = next_clock
+
+        if self.mtc:
+            fps = self.mtc_fps
+            interval = self.sample_rate / (4.0 * fps)
+            if not self._rolling or relocated:
+                events.append((0, mtc_full_frame(floor(frame / interval) // 4, fps)))
+            index = ceil(frame / interval)
+            while index * interval < end:
+                events.append((int(index * interval) - frame, mtc_quarter_frame(index, fps)))
+                index += 1
+
+        self._rolling = True
+        self._expected = end
+        self._last_frame = frame
+        events.sort(key=itemgetter(0))
+        return events
+
+    # ---------------------------------------------------------------------------------------------
+    # Process thread
+
+    def process(self, nframes: int):
+        buffer = jlib.jack_port_get_buffer(self.port, nframes)
+        jlib.jack_midi_clear_buffer(buffer)
+        state = jlib.jack_transport_query(self.client, self._pos_ref)
+        reserve = jlib.jack_midi_event_reserve
+
+        for offset, message in self._schedule(nframes, state):
+            data = reserve(buffer, offset, len(message))
+            if data:
+                memmove(data, message, len(message))
+            else:
+                self.lost += 1
+
+    def process_callback(self, nframes: int, arg) -> int:
+        self.process(nframes)
+        return 0
+
+    def register(self):
+        jacklib.set_process_callback(self.client, self.process_callback, None)
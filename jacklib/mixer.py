@@ -0,0 +1,110 @@
+"""Vectorized matrix mixer / router."""
+
+import numpy as np
+
+from . import api as jacklib
+from .api import JACK_DEFAULT_AUDIO_TYPE
+from .arrays import PortBufferArray
+from .enums import JackPortFlags
+
+
+class MatrixMixer:
+    ''' N audio inputs mixed to M audio outputs through a (M x N) gain matrix.
+
+        Each cycle is a single matrix multiply of the stacked input buffers.
+        Gain changes requested from any thread are applied at the next
+        cycle and linearly ramped over ramp_frames (one period by default,
+        0 for an instant change). '''
+
+    def __init__(self, client, inputs: int, outputs: int,
+                 input_name="in_{}", output_name="out_{}", ramp_frames=None):
+        self.client = client
+        max_frames = jacklib.get_buffer_size(client)
+        self.ramp_frames = max_frames if ramp_frames is None else max(ramp_frames, 1)
+
+        ports = jacklib.port_register_many(client, [
+            *((input_name.format(i + 1), JACK_DEFAULT_AUDIO_TYPE, JackPortFlags.IS_INPUT)
+              for i in range(inputs)),
+            *((output_name.format(i + 1), JACK_DEFAULT_AUDIO_TYPE, JackPortFlags.IS_OUTPUT)
+              for i in range(outputs))])
+        if ports is None:
+            raise OSError("Could not register mixer ports")
+
+        in_ports, out_ports = ports[:inputs], ports[inputs:]
+
+        self._in = PortBufferArray(in_ports, max_frames)
+        self._out = PortBufferArray(out_ports, max_frames)
+        self._gains = np.zeros((outputs, inputs), dtype=np.float32)
+        self._start = self._target = self._gains
+        self._ramp_pos = 0
+        self._ramping = False
+        self._request = None
+        self._ramp = np.arange(1, max_frames + 1, dtype=np.float32)
+
+    @property
+    def in_ports(self) -> list:
+        return self._in.ports
+
+    @property
+    def out_ports(self) -> list:
+        return self._out.ports
+
+    @property
+    def gains(self) -> np.ndarray:
+        ''' gains currently targeted, do not modify in place. '''
+        request = self._request
+        return self._target if request is None else request
+
+    def set_gains(self, gains):
+        gains = np.array(gains, dtype=np.float32)
+        if gains.shape != self._gains.shape:
+            raise ValueError(f"gain matrix must have shape {self._gains.shape}")
+
+        self._request = gains
+
+    def set_gain(self, output: int, input_: int, gain: float):
+        gains = self.gains.copy()
+        gains[output, input_] = gain
+        self._request = gains
+
+    def process(self, nframes: int):
+        if nframes > self._in.max_frames:
+            self._in.resize(nframes)
+            self._out.resize(nframes)
+            self._ramp = np.arange(1, nframes + 1, dtype=np.float32)
+
+        request = self._request
+        if request is not None:
+            self._request = None
+            if self._ramping:
+                # start the new ramp from where the current one is
+                pos = self._ramp_pos / self.ramp_frames
+                self._gains = self._start + (self._target - self._start) * pos
+            self._start, self._target = self._gains, request
+            self._ramp_pos = 0
+            self._ramping = True
+
+        inputs = self._in.read(nframes)
+        outputs = self._out.data[:, :nframes]
+
+        if self._ramping:
+            ramp = (self._ramp[:nframes] + self._ramp_pos) / self.ramp_frames
+            np.minimum(ramp, 1.0, out=ramp)
+            start = self._start @ inputs
+            np.matmul(self._target, inputs, out=outputs)
+            outputs -= start
+            outputs *= ramp
+            outputs += start
+
+            self._ramp_pos += nframes
+            if self._ramp_pos >= self.ramp_frames:
+                self._gains = self._start = self._target
+                self._ramping = False
+        else:
+            np.matmul(self._gains, inputs, out=outputs)
+
+        self._out.write(nframes)
+
+    def process_callback(self, nframes: int, arg) -> int:
+        self.process(nframes)
+        return 0
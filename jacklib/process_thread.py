@@ -0,0 +1,90 @@
+"""Managed process thread using the JACK non-callback API."""
+
+import logging
+
+from .api import jlib
+from .types import JackThreadCallback
+
+log = logging.getLogger(__name__)
+
+
+class ProcessThreadDriver:
+    ''' Run a list of hooks in a thread managed by JACK,
+        around jack_cycle_wait() and jack_cycle_signal().
+
+        Each hook is called with nframes for each cycle. A hook returning
+        a non-zero value, or raising an exception (kept in error), makes
+        the client cycle_signal() this value (-1 for an exception) and the
+        thread end: the client is then removed from the process graph.
+        stop() does the same after the cycle in progress, with status 1
+        signalled but status left at 0.
+
+        hooks may be changed from any thread, the new list is used
+        from the next cycle. '''
+
+    def __init__(self, client, hooks=()):
+        self.client = client
+        self._hooks = tuple(hooks)
+        self.cycles = 0
+        self.status = 0
+        self.error = None
+        self._stop = False
+        self._thread_callback = JackThreadCallback(self._thread_main)
+
+    @property
+    def hooks(self) -> tuple:
+        return self._hooks
+
+    @hooks.setter
+    def hooks(self, hooks):
+        self._hooks = tuple(hooks)
+
+    def add_hook(self, hook):
+        self._hooks = self._hooks + (hook,)
+
+    def remove_hook(self, hook):
+        self._hooks = tuple(h for h in self._hooks if h is not hook)
+
+    def register(self) -> int:
+        ''' install the thread function, must be called before activate(). '''
+        if jlib.jack_set_process_thread is None:
+            return -1
+
+        self._stop = False
+        return jlib.jack_set_process_thread(self.client, self._thread_callback, None)
+
+    def _thread_main(self, arg):
+        # resolve everything once, the loop below only does local lookups
+        cycle_wait = jlib.jack_cycle_wait
+        cycle_signal = jlib.jack_cycle_signal
+        client = self.client
+
+        while not self._stop:
+            nframes = cycle_wait(client)
+            status = 0
+
+            try:
+                for hook in self._hooks:
+                    ret = hook(nframes)
+                    if ret:
+                        status = ret
+            except Exception as exc:
+                self.error = exc
+                status = -1
+                log.exception("process thread hook failed, leaving the process graph")
+
+            self.cycles += 1
+
+            if status or self._stop:
+                # the server would keep waiting for a client whose
+                # thread returned after a zero status
+                self.status = status
+                cycle_signal(client, status or 1)
+                return
+
+            cycle_signal(client, 0)
+
+    def stop(self):
+        ''' make the thread return after the cycle in progress,
+            which takes the client out of the process graph. '''
+        self._stop = True
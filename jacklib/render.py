@@ -0,0 +1,221 @@
+"""Offline rendering of JACK ports to disk in freewheel mode."""
+
+import os
+import struct
+import threading
+from ctypes import pointer, sizeof, string_at
+
+from . import api as jacklib
+from .api import JACK_DEFAULT_AUDIO_TYPE
+from .enums import JackOptions, JackPortFlags, JackTransportState
+from .helpers import get_jack_status_error_string
+from .types import jack_default_audio_sample_t, jack_position_t, jack_status_t
+
+SAMPLE_SIZE = sizeof(jack_default_audio_sample_t)
+_WAVE_FORMAT_IEEE_FLOAT = 3
+
+
+class FloatWaveWriter:
+    ''' Minimal mono 32 bit float WAV file writer,
+        data is written as given, sizes are patched on close(). '''
+
+    def __init__(self, path: str, sample_rate: int):
+        self.path = path
+        self.frames = 0
+        self._fp = open(path, "wb")
+        self._fp.write(self._header(sample_rate, 0))
+        self._sample_rate = sample_rate
+
+    @staticmethod
+    def _header(sample_rate: int, frames: int) -> bytes:
+        data_size = frames * SAMPLE_SIZE
+        return b"".join((
+            struct.pack("<4sI4s", b"RIFF", 4 + 24 + 12 + 8 + data_size, b"WAVE"),
+            struct.pack("<4sIHHIIHH", b"fmt ", 16, _WAVE_FORMAT_IEEE_FLOAT, 1,
+                        sample_rate, sample_rate * SAMPLE_SIZE, SAMPLE_SIZE, 8 * SAMPLE_SIZE),
+            struct.pack("<4sII", b"fact", 4, frames),
+            struct.pack("<4sI", b"data", data_size),
+        ))
+
+    def write(self, data: bytes):
+        self._fp.write(data)
+        self.frames += len(data) // SAMPLE_SIZE
+
+    def close(self):
+        if self._fp is None:
+            return
+
+        self._fp.seek(0)
+        self._fp.write(self._header(self._sample_rate, self.frames))
+        self._fp.close()
+        self._fp = None
+
+
+class OfflineRenderer:
+    ''' Capture ports to one WAV file each, as fast as the graph can run.
+
+        start() opens a client, connects it to sources, locates the
+        transport to start_frame and switches the server to freewheel mode.
+        Capture stops after length frames, or when all ports stayed below
+        silence_threshold for silence_seconds, whichever comes first.
+        Silence only counts once a port went above silence_threshold, so
+        a silent lead-in does not end the capture.
+        stop() (or leaving the 'with' block) always restores normal mode.
+
+        run() does all of this and blocks until the render is done. '''
+
+    def __init__(self, sources: list[str], directory: str, start_frame=0, length=None,
+                 silence_threshold=None, silence_seconds=2.0, client_name="pyjacklib-render",
+                 server_name=None):
+        if length is None and silence_threshold is None:
+            raise ValueError("length or silence_threshold is required")
+
+        self.sources = list(sources)
+        self.directory = directory
+        self.start_frame = start_frame
+        self.length = length
+        self.silence_threshold = silence_threshold
+        self.silence_seconds = silence_seconds
+        self.client_name = client_name
+        self.server_name = server_name
+        self.done = threading.Event()
+        self.interrupted = False
+        self.paths = list[str]()
+        self.client = None
+        self._ports = []
+        self._writers = list[FloatWaveWriter]()
+        self._frames = 0
+        self._silent_frames = 0
+        self._heard = False
+        self._position = jack_position_t()
+        self._position_p = pointer(self._position)
+
+    def _open_client(self):
+        status = jack_status_t()
+        client = jacklib.client_open(self.client_name, JackOptions.NO_START_SERVER, status,
+                                     server_name=self.server_name)
+        if not client:
+            raise OSError("Could not open JACK client: "
+                          + get_jack_status_error_string(status))
+        return client
+
+    def start(self):
+        self.client = self._open_client()
+        try:
+            self._start()
+        except BaseException:
+            # do not leave the client open, nor the server in freewheel mode
+            self.stop()
+            raise
+
+    def _start(self):
+        client = self.client
+        sample_rate = jacklib.get_sample_rate(client)
+        os.makedirs(self.directory, exist_ok=True)
+
+        for index, source in enumerate(self.sources):
+            port = jacklib.port_register(
+                client, "in_%d" % (index + 1), JACK_DEFAULT_AUDIO_TYPE,
+                JackPortFlags.IS_INPUT, 0)
+            if not port:
+                raise OSError("Could not register capture port for %s" % source)
+
+            path = os.path.join(
+                self.directory, source.replace(":", "_").replace("/", "_") + ".wav")
+            self._ports.append(port)
+            self._writers.append(FloatWaveWriter(path, sample_rate))
+            self.paths.append(path)
+
+        self._silence_limit = int(self.silence_seconds * sample_rate)
+        jacklib.set_process_callback(client, self._process, None)
+        jacklib.set_freewheel_callback(client, self._freewheel, None)
+        if jacklib.activate(client):
+            raise OSError("Could not activate JACK client")
+
+        for source, port in zip(self.sources, self._ports):
+            jacklib.connect(client, source, jacklib.port_name(port))
+
+        jacklib.transport_stop(client)
+        jacklib.transport_locate(client, self.start_frame)
+        jacklib.set_freewheel(client, 1)
+        jacklib.transport_start(client)
+
+    def _process(self, nframes, arg):
+        if self.done.is_set():
+            return 0
+
+        state = jacklib.jlib.jack_transport_query(self.client, self._position_p)
+        if (state != JackTransportState.ROLLING
+                or self._position.frame < self.start_frame):
+            return 0
+
+        if self.length is not None:
+            nframes = min(nframes, self.length - self._frames)
+
+        get_buffer = jacklib.jlib.jack_port_get_buffer
+        size = nframes * SAMPLE_SIZE
+        threshold = self.silence_threshold
+        silent = threshold is not None
+
+        for port, writer in zip(self._ports, self._writers):
+            data = string_at(get_buffer(port, nframes), size)
+            writer.write(data)
+
+            if silent and nframes:
+                samples = memoryview(data).cast("f")
+                if max(samples) > threshold or -min(samples) > threshold:
+                    silent = False
+
+        self._frames += nframes
+        if not silent:
+            self._heard = True
+            self._silent_frames = 0
+        elif self._heard:
+            self._silent_frames += nframes
+
+        if ((self.length is not None and self._frames >= self.length)
+                or (threshold is not None and self._silent_frames >= self._silence_limit)):
+            self.done.set()
+        return 0
+
+    def _freewheel(self, starting, arg):
+        if not starting and not self.done.is_set():
+            # someone else left freewheel mode, the render would be
+            # realtime from now on, better stop it.
+            self.interrupted = True
+            self.done.set()
+
+    @property
+    def frames(self) -> int:
+        return self._frames
+
+    def wait(self, timeout=None) -> bool:
+        return self.done.wait(timeout)
+
+    def stop(self):
+        client = self.client
+        if client is None:
+            return
+
+        try:
+            jacklib.deactivate(client)
+            jacklib.transport_stop(client)
+            jacklib.set_freewheel(client, 0)
+        finally:
+            for writer in self._writers:
+                writer.close()
+            jacklib.client_close(client)
+            self.client = None
+
+    def run(self, timeout=None) -> list[str]:
+        ''' render and return the paths of the written files. '''
+        with self:
+            self.wait(timeout)
+        return self.paths
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
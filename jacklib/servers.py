@@ -0,0 +1,188 @@
+"""Clients on several named JACK servers.
+
+One process can be a client of several JACK servers (jackd -n NAME) at
+once, each client being opened with JackOptions.SERVER_NAME.
+ServerManager opens, tracks and closes one client per server name, and
+ServerConnection keeps a graph cache for its server, invalidated by
+notification callbacks and read again only when needed, so listing the
+ports of many servers does not query all of them every time.
+
+    with ServerManager() as manager:
+        for name in ("studio", "stage"):
+            manager.open(name)
+        manager["stage"].connect("system:capture_1", "system:playback_1")
+        for conn in manager:
+            print(conn.name, conn.ports())
+
+Each connection only ever uses its own client, callbacks of a client are
+released when it is closed.
+"""
+
+import threading
+
+from . import api as jacklib
+from .enums import JackOptions
+from .helpers import get_jack_status_error_string
+from .snapshot import GraphSnapshot, capture
+from .types import jack_status_t
+
+
+class ServerConnection:
+    ''' A client connected to the JACK server name (None for the default one). '''
+
+    def __init__(self, name, client, client_name: str):
+        self.name = name
+        self.client = client
+        self.client_name = client_name
+        self.closed = False
+        self._graph = None
+        self._dirty = True
+        self._lock = threading.Lock()
+
+    # ---------------------------------------------------------------------------------------------
+    # Callbacks, only mark the cache as outdated
+
+    def _invalidate(self, *args):
+        self._dirty = True
+        return 0
+
+    def _on_shutdown(self, arg):
+        self.closed = True
+        self._dirty = True
+
+    def register(self):
+        client = self.client
+        jacklib.set_client_registration_callback(client, self._invalidate, None)
+        jacklib.set_port_registration_callback(client, self._invalidate, None)
+        jacklib.set_port_rename_callback(client, self._invalidate, None)
+        jacklib.set_port_connect_callback(client, self._invalidate, None)
+        jacklib.set_graph_order_callback(client, self._invalidate, None)
+        jacklib.on_shutdown(client, self._on_shutdown, None)
+
+    # ---------------------------------------------------------------------------------------------
+    # Graph cache
+
+    def graph(self) -> GraphSnapshot:
+        ''' cached snapshot of the server graph, without metadata
+            (which jack_get_all_properties() does not read per server). '''
+        with self._lock:
+            if self._dirty or self._graph is None:
+                # cleared before reading, a change meanwhile makes it dirty again
+                self._dirty = False
+                self._graph = capture(self.client, properties=False)
+            return self._graph
+
+    def invalidate(self):
+        self._dirty = True
+
+    def ports(self) -> list[str]:
+        return [port.name.decode(jacklib.ENCODING, errors="replace")
+                for port in self.graph().ports]
+
+    def connections(self) -> list[tuple[str, str]]:
+        encoding = jacklib.ENCODING
+        return [(src.decode(encoding, errors="replace"), dst.decode(encoding, errors="replace"))
+                for src, dst in self.graph().connections]
+
+    # ---------------------------------------------------------------------------------------------
+    # Operations
+
+    def connect(self, source_port: str, destination_port: str) -> int:
+        return jacklib.connect(self.client, source_port, destination_port)
+
+    def disconnect(self, source_port: str, destination_port: str) -> int:
+        return jacklib.disconnect(self.client, source_port, destination_port)
+
+    def call(self, func, *args, **kwargs):
+        ''' func(client, *args, **kwargs) with the client of this server,
+            for any api function taking the client as first argument. '''
+        return func(self.client, *args, **kwargs)
+
+    def close(self) -> int:
+        if self.client is None:
+            return 0
+
+        client, self.client = self.client, None
+        self.closed = True
+        return jacklib.client_close(client)
+
+
+class ServerManager:
+    ''' One client per JACK server name.
+
+        Server names are str, None stands for the default server
+        ($JACK_DEFAULT_SERVER or "default"). '''
+
+    def __init__(self, client_name="pyjacklib", options=JackOptions.NO_START_SERVER):
+        self.client_name = client_name
+        self.options = options
+        self._connections = dict[str, ServerConnection]()
+        self._lock = threading.Lock()
+
+    def open(self, server_name=None, client_name=None, activate=True) -> ServerConnection:
+        ''' connect to server_name, or return the existing connection.
+            Raises OSError if the server can not be reached. '''
+        with self._lock:
+            conn = self._connections.get(server_name)
+            if conn is not None and not conn.closed:
+                return conn
+
+            status = jack_status_t()
+            client = jacklib.client_open(client_name or self.client_name, self.options, status,
+                                         server_name=server_name)
+            if not client:
+                raise OSError("Could not connect to JACK server %r: %s" % (
+                    server_name or "default", get_jack_status_error_string(status)))
+
+            conn = ServerConnection(server_name, client, jacklib.get_client_name(client))
+            conn.register()
+            if activate:
+                jacklib.activate(client)
+
+            if server_name in self._connections:
+                # the server was shut down, forget its client
+                self._connections.pop(server_name).close()
+            self._connections[server_name] = conn
+            return conn
+
+    def get(self, server_name=None):
+        ''' connection to server_name, None if not open or shut down. '''
+        conn = self._connections.get(server_name)
+        if conn is None or conn.closed:
+            return None
+        return conn
+
+    def __getitem__(self, server_name) -> ServerConnection:
+        conn = self.get(server_name)
+        if conn is None:
+            raise KeyError(server_name)
+        return conn
+
+    def __contains__(self, server_name) -> bool:
+        return self.get(server_name) is not None
+
+    def __iter__(self):
+        ''' open connections, servers which were shut down are skipped. '''
+        with self._lock:
+            connections = list(self._connections.values())
+        return (conn for conn in connections if not conn.closed)
+
+    def names(self) -> list:
+        return [conn.name for conn in self]
+
+    def close(self, server_name=None) -> int:
+        with self._lock:
+            conn = self._connections.pop(server_name, None)
+        return conn.close() if conn is not None else 0
+
+    def close_all(self):
+        with self._lock:
+            connections, self._connections = self._connections, {}
+        for conn in connections.values():
+            conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close_all()
@@ -0,0 +1,334 @@
+"""Whole-graph snapshots, saved in a compact binary format.
+
+capture() reads clients, ports, aliases, connections and metadata of the
+running graph, dumps() / loads() convert a snapshot to / from bytes and
+restore() applies a snapshot with the fewest operations needed.
+
+Binary format (all integers little endian), version 1:
+
+    header       4s H H       magic b"JKGS", version, reserved
+    strings      I            count, then count I lengths and the
+                              concatenated bytes. Every name, type, alias
+                              and property is an index in this table.
+    clients      I            count, then count (I name, Q uuid)
+    ports        I            count, then count (I name, I type, I flags, Q uuid)
+    aliases      I            count, then count (I port index, I alias)
+    connections  I            count, then count (I source index, I destination index)
+    properties   I            count, then count (Q subject, I key, I value, I type)
+
+A property without type has type index 0xFFFFFFFF.
+"""
+
+import struct
+from collections import namedtuple
+
+from . import api as jacklib
+from .api import JACK_METADATA_PRETTY_NAME, jlib
+from .enums import JackPortFlags
+from .helpers import c_char_p_p_to_list
+from .types import jack_uuid_t
+
+MAGIC = b"JKGS"
+VERSION = 1
+_NONE = 0xFFFFFFFF
+
+ClientInfo = namedtuple("ClientInfo", ("name", "uuid"))
+PortInfo = namedtuple("PortInfo", ("name", "type", "flags", "uuid", "aliases"))
+GraphSnapshot = namedtuple(
+    "GraphSnapshot", ("clients", "ports", "connections", "properties"))
+GraphSnapshot.__doc__ = ''' Names, types, aliases and property values are bytes.
+    connections is a list of (source, destination) port names and
+    properties maps subject uuids to lists of Property. '''
+RestoreResult = namedtuple(
+    "RestoreResult", ("clients", "connected", "disconnected", "properties", "failed"))
+RestoreResult.__doc__ = ''' clients maps saved client names to current ones,
+    failed lists (operation, arguments) tuples which returned an error. '''
+
+
+def _all_properties() -> dict:
+    ''' like api.get_all_properties() without decoding anything. '''
+    if not jlib.jack_get_all_properties:
+        return {}
+    return jacklib.get_all_properties(encoding=None)
+
+
+def _client_uuid(client, name: bytes) -> int:
+    if not jlib.jack_get_uuid_for_client_name:
+        return 0
+
+    parsed = jacklib.uuid_parse(jlib.jack_get_uuid_for_client_name(client, name))
+    return parsed.value if isinstance(parsed, jack_uuid_t) else 0
+
+
+def capture(client, properties=True) -> GraphSnapshot:
+    ''' snapshot the graph as seen by client.
+
+        Only clients owning at least one port are listed, JACK
+        has no way to enumerate clients otherwise. '''
+    port_names = c_char_p_p_to_list(jlib.jack_get_ports(client, b"", b"", 0), None)
+    ports, clients, connections = [], {}, []
+
+    for name in port_names:
+        port = jlib.jack_port_by_name(client, name)
+        if not port:
+            # removed meanwhile
+            continue
+
+        client_name = name.partition(b":")[0]
+        if client_name not in clients:
+            clients[client_name] = ClientInfo(client_name, _client_uuid(client, client_name))
+
+        flags = jlib.jack_port_flags(port)
+        count, alias_1, alias_2 = jacklib.port_get_aliases(port)
+        aliases = tuple(alias.encode(jacklib.ENCODING)
+                        for alias in (alias_1, alias_2)[:max(count, 0)])
+        ports.append(PortInfo(name, jlib.jack_port_type(port), flags,
+                              jacklib.port_uuid(port), aliases))
+
+        if flags & JackPortFlags.IS_OUTPUT:
+            connections.extend(
+                (name, dest)
+                for dest in c_char_p_p_to_list(
+                    jlib.jack_port_get_all_connections(client, port), None))
+
+    return GraphSnapshot(list(clients.values()), ports, connections,
+                         _all_properties() if properties else {})
+
+
+# -------------------------------------------------------------------------------------------------
+# Serialization
+
+def dumps(snapshot: GraphSnapshot) -> bytes:
+    strings = {}
+
+    def intern(value):
+        if value is None:
+            return _NONE
+        index = strings.get(value)
+        if index is None:
+            index = strings[value] = len(strings)
+        return index
+
+    port_index = {port.name: index for index, port in enumerate(snapshot.ports)}
+    clients = [(intern(c.name), c.uuid) for c in snapshot.clients]
+    ports = [(intern(p.name), intern(p.type), p.flags, p.uuid) for p in snapshot.ports]
+    aliases = [(index, intern(alias))
+               for index, port in enumerate(snapshot.ports) for alias in port.aliases]
+    connections = [(port_index[src], port_index[dst]) for src, dst in snapshot.connections]
+    properties = [(subject, intern(prop.key), intern(prop.value), intern(prop.type))
+                  for subject, props in snapshot.properties.items() for prop in props]
+
+    strings = list(strings)
+    chunks = [
+        struct.pack("<4sHH", MAGIC, VERSION, 0),
+        struct.pack("<I%dI" % len(strings), len(strings), *map(len, strings)),
+        b"".join(strings),
+    ]
+
+    for records, fmt in ((clients, "IQ"), (ports, "IIIQ"), (aliases, "II"),
+                         (connections, "II"), (properties, "QIII")):
+        chunks.append(struct.pack(
+            "<I" + fmt * len(records), len(records), *(x for rec in records for x in rec)))
+
+    return b"".join(chunks)
+
+
+def loads(data: bytes) -> GraphSnapshot:
+    magic, version, _ = struct.unpack_from("<4sHH", data)
+    if magic != MAGIC:
+        raise ValueError("not a JACK graph snapshot")
+    if version > VERSION:
+        raise ValueError("unsupported snapshot version %d" % version)
+
+    offset = 8
+    (count,) = struct.unpack_from("<I", data, offset)
+    lengths = struct.unpack_from("<%dI" % count, data, offset + 4)
+    offset += 4 + 4 * count
+    strings = []
+    for length in lengths:
+        strings.append(data[offset:offset + length])
+        offset += length
+
+    def records(fmt):
+        nonlocal offset
+        (count,) = struct.unpack_from("<I", data, offset)
+        offset += 4
+        rec = struct.Struct("<" + fmt)
+        result = list(rec.iter_unpack(data[offset:offset + rec.size * count]))
+        offset += rec.size * count
+        return result
+
+    def string(index):
+        return None if index == _NONE else strings[index]
+
+    clients = [ClientInfo(strings[name], uuid) for name, uuid in records("IQ")]
+    ports = [[strings[name], strings[type_], flags, uuid, ()]
+             for name, type_, flags, uuid in records("IIIQ")]
+    for index, alias in records("II"):
+        ports[index][4] += (strings[alias],)
+    connections = [(ports[src][0], ports[dst][0]) for src, dst in records("II")]
+    properties = {}
+    for subject, key, value, type_ in records("QIII"):
+        properties.setdefault(subject, []).append(
+            jacklib.Property(string(key), string(value), string(type_)))
+
+    return GraphSnapshot(clients, [PortInfo(*port) for port in ports], connections, properties)
+
+
+def save(snapshot: GraphSnapshot, path: str):
+    with open(path, "wb") as fp:
+        fp.write(dumps(snapshot))
+
+
+def load(path: str) -> GraphSnapshot:
+    with open(path, "rb") as fp:
+        return loads(fp.read())
+
+
+# -------------------------------------------------------------------------------------------------
+# Restore
+
+def _pretty_name(properties: dict, uuid: int):
+    for prop in properties.get(uuid, ()):
+        if prop.key == JACK_METADATA_PRETTY_NAME.encode():
+            return prop.value
+    return None
+
+
+def _match_clients(saved: GraphSnapshot, current: GraphSnapshot) -> dict:
+    ''' saved client name -> current client name.
+
+        Same name first, then same uuid (the client was renamed while
+        running), then same pretty name (the client got another name
+        after a restart). Each current client is matched once. '''
+    current_names = {c.name for c in current.clients}
+    mapping = {c.name: c.name for c in saved.clients if c.name in current_names}
+    free = [c for c in current.clients if c.name not in mapping.values()]
+
+    by_uuid = {c.uuid: c.name for c in free if c.uuid}
+    for client in saved.clients:
+        name = by_uuid.pop(client.uuid, None) if client.name not in mapping else None
+        if name is not None:
+            mapping[client.name] = name
+
+    by_pretty = {}
+    for client in free:
+        if client.name not in mapping.values():
+            pretty = _pretty_name(current.properties, client.uuid)
+            if pretty is not None:
+                # ambiguous pretty names do not match anything
+                by_pretty[pretty] = None if pretty in by_pretty else client.name
+
+    for client in saved.clients:
+        if client.name not in mapping:
+            pretty = _pretty_name(saved.properties, client.uuid)
+            name = by_pretty.pop(pretty, None) if pretty is not None else None
+            if name is not None:
+                mapping[client.name] = name
+
+    return mapping
+
+
+def _match_ports(saved: GraphSnapshot, current: GraphSnapshot, clients: dict) -> dict:
+    ''' saved port name -> current PortInfo.
+
+        By name in the matched client, then by uuid if the port with this
+        uuid belongs to the matched client (the port was renamed), then by
+        alias. uuids are not trusted alone, they are reused after a restart. '''
+    by_name = {port.name: port for port in current.ports}
+    by_uuid = {port.uuid: port for port in current.ports}
+    by_alias = {alias: port for port in current.ports for alias in port.aliases}
+    mapping = {}
+
+    for port in saved.ports:
+        client_name, _, short_name = port.name.partition(b":")
+        new_client = clients.get(client_name)
+        match = None
+
+        if new_client is not None:
+            match = by_name.get(new_client + b":" + short_name)
+            if match is None:
+                match = by_uuid.get(port.uuid)
+                if match is not None and not match.name.startswith(new_client + b":"):
+                    match = None
+
+        if match is None:
+            match = next(filter(None, map(by_alias.get, port.aliases)), None)
+
+        if match is not None and match.type == port.type:
+            mapping[port.name] = match
+
+    return mapping
+
+
+def restore(client, snapshot: GraphSnapshot, disconnect=False,
+            properties=True, aliases=True) -> RestoreResult:
+    ''' apply snapshot to the running graph.
+
+        Only missing connections are made, and, with disconnect=True,
+        connections between restored ports which are not in the snapshot
+        are removed. Properties are only set when their value differs. '''
+    current = capture(client, properties)
+    clients = _match_clients(snapshot, current)
+    ports = _match_ports(snapshot, current, clients)
+    failed = []
+
+    wanted = set()
+    for src, dst in snapshot.connections:
+        src_port, dst_port = ports.get(src), ports.get(dst)
+        if src_port is not None and dst_port is not None:
+            wanted.add((src_port.name, dst_port.name))
+
+    existing = set(current.connections)
+    connected = 0
+    for src, dst in wanted - existing:
+        if jlib.jack_connect(client, src, dst) == 0:
+            connected += 1
+        else:
+            failed.append(("connect", (src, dst)))
+
+    disconnected = 0
+    if disconnect:
+        restored = {port.name for port in ports.values()}
+        for src, dst in existing - wanted:
+            if src in restored and dst in restored:
+                if jlib.jack_disconnect(client, src, dst) == 0:
+                    disconnected += 1
+                else:
+                    failed.append(("disconnect", (src, dst)))
+
+    if aliases:
+        for port in snapshot.ports:
+            match = ports.get(port.name)
+            missing = [a for a in port.aliases if match and a not in match.aliases]
+            if missing and len(match.aliases) + len(missing) <= 2:
+                jack_port = jlib.jack_port_by_name(client, match.name)
+                for alias in missing:
+                    if jlib.jack_port_set_alias(jack_port, alias) != 0:
+                        failed.append(("alias", (match.name, alias)))
+
+    changed = 0
+    if properties:
+        subjects = {port.uuid: ports[port.name].uuid
+                    for port in snapshot.ports if port.name in ports}
+        current_uuids = {c.name: c.uuid for c in current.clients}
+        for saved in snapshot.clients:
+            uuid = current_uuids.get(clients.get(saved.name))
+            if uuid:
+                subjects[saved.uuid] = uuid
+
+        for subject, props in snapshot.properties.items():
+            new_subject = subjects.get(subject)
+            if new_subject is None:
+                continue
+
+            values = {prop.key: prop for prop in current.properties.get(new_subject, ())}
+            for prop in props:
+                if values.get(prop.key) != prop:
+                    if jlib.jack_set_property(client, new_subject, prop.key,
+                                              prop.value, prop.type) == 0:
+                        changed += 1
+                    else:
+                        failed.append(("property", (new_subject, prop.key)))
+
+    return RestoreResult(clients, connected, disconnected, changed, failed)
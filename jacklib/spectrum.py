@@ -0,0 +1,103 @@
+"""FFT spectrum analyzer with log-frequency bands.
+
+SpectrumAnalyzer runs on a BlockAdapter without output: every hop, the
+blocks of all tapped ports get windowed and transformed in one rfft call
+and their power is summed into bands of bands_per_octave per octave. The
+bands are averaged until the next publication, display_rate times per
+second, through a SnapshotArrays which a GUI reads without any lock.
+"""
+
+import numpy as np
+
+from . import api as jacklib
+from .arrays import SnapshotArrays
+from .blocks import BlockAdapter
+
+SILENCE_DB = -200.0
+
+
+def band_edges(fft_size: int, sample_rate: int, bands_per_octave=3,
+               min_freq=20.0, max_freq=None) -> np.ndarray:
+    ''' first bin of each band and the end bin of the last one.
+
+        Bands are bands_per_octave per octave from min_freq, bands without
+        any bin of their own (at low frequencies) are merged upwards. '''
+    bin_width = sample_rate / fft_size
+    max_freq = min(max_freq or sample_rate / 2, sample_rate / 2)
+    octaves = np.log2(max_freq / min_freq)
+    freqs = min_freq * 2.0 ** (np.arange(int(np.ceil(octaves * bands_per_octave)) + 1)
+                               / bands_per_octave)
+    bins = np.ceil(freqs / bin_width).astype(np.intp)
+    # the last band ends after the bin of max_freq
+    bins[-1] = int(max_freq / bin_width) + 1
+    return np.unique(np.clip(bins, 1, fft_size // 2 + 1))
+
+
+class SpectrumAnalyzer:
+    ''' Spectrum of each of ports, in dB relative to a full scale sine.
+
+            analyzer = SpectrumAnalyzer(client, ports)
+            analyzer.register()  # or call analyzer.process() from yours
+            ...
+            levels = analyzer.read()  # (ports x bands), see frequencies
+
+        overlap is the fraction of each block shared with the next one. '''
+
+    def __init__(self, client, ports: list, fft_size=4096, overlap=0.75, bands_per_octave=3,
+                 min_freq=20.0, max_freq=None, display_rate=30.0):
+        self.sample_rate = jacklib.get_sample_rate(client)
+        self.fft_size = fft_size
+        self.display_rate = display_rate
+        hop_size = max(1, int(fft_size * (1.0 - overlap)))
+        self.adapter = BlockAdapter(client, self._analyze, fft_size, hop_size, ports)
+
+        self._window = np.hanning(fft_size).astype(np.float32)
+        # a sine of amplitude 1 sums to 1 in its band
+        self._scale = 4.0 / (fft_size * float(np.sum(self._window.astype(np.float64) ** 2)))
+
+        edges = band_edges(fft_size, self.sample_rate, bands_per_octave, min_freq, max_freq)
+        self._first_bin, self._last_bin = edges[0], edges[-1]
+        self._starts = edges[:-1] - edges[0]
+        bin_width = self.sample_rate / fft_size
+        self.frequencies = np.sqrt(edges[:-1] * np.maximum(edges[1:] - 1, edges[:-1])) * bin_width
+
+        channels = len(self.adapter.in_ports)
+        self._windowed = np.zeros((channels, fft_size), dtype=np.float32)
+        self._sum = np.zeros((channels, len(self.frequencies)), dtype=np.float64)
+        self._count = 0
+        self._frames = 0
+        self._publish_frames = max(hop_size, int(self.sample_rate / display_rate))
+        self.snapshot = SnapshotArrays(("bands",), self._sum.shape)
+        self.snapshot.arrays["bands"].fill(SILENCE_DB)
+
+    @property
+    def ports(self) -> list:
+        return self.adapter.in_ports
+
+    def _analyze(self, block):
+        spectrum = np.fft.rfft(np.multiply(block, self._window, out=self._windowed), axis=1)
+        power = spectrum.real ** 2 + spectrum.imag ** 2
+        self._sum += np.add.reduceat(
+            power[:, self._first_bin:self._last_bin], self._starts, axis=1)
+        self._count += 1
+
+        self._frames += self.adapter.hop_size
+        if self._frames >= self._publish_frames:
+            self._frames = 0
+            mean = self._sum * (self._scale / self._count)
+            self.snapshot.publish(
+                bands=10.0 * np.log10(np.maximum(mean, 10.0 ** (SILENCE_DB / 10.0))))
+            self._sum.fill(0.0)
+            self._count = 0
+
+    def process(self, nframes: int):
+        self.adapter.process(nframes)
+
+    def register(self):
+        self.adapter.register()
+
+    def read(self):
+        ''' last published (ports x bands) levels in dB,
+            or None if no consistent snapshot could be read. '''
+        values = self.snapshot.read()
+        return None if values is None else values["bands"]
@@ -0,0 +1,119 @@
+"""CPU affinity for the threads libjack creates, and for our own.
+
+ThreadAffinity is a thread init callback pinning libjack threads
+(process thread, and notification thread with JACK1) to a set of CPUs and
+recording them, so their CPU time can be followed. The helpers below pin
+Python worker threads and processes to the other CPUs.
+
+Affinity is set with os.sched_setaffinity, available on Linux only; on
+other systems threads are still recorded but not pinned.
+"""
+
+import os
+import threading
+from collections import namedtuple
+from functools import partial
+
+from . import api as jacklib
+
+ThreadInfo = namedtuple("ThreadInfo", ("native_id", "name", "cpus"))
+
+_HAS_AFFINITY = hasattr(os, "sched_setaffinity")
+
+
+def available_cpus() -> set[int]:
+    if _HAS_AFFINITY:
+        return os.sched_getaffinity(0)
+    return set(range(os.cpu_count() or 1))
+
+
+def pin_current_thread(cpus) -> bool:
+    ''' restrict the calling thread to cpus, returns False if not possible. '''
+    if not _HAS_AFFINITY or not cpus:
+        return False
+
+    try:
+        # pid 0 is the calling thread, not the whole process
+        os.sched_setaffinity(0, cpus)
+    except OSError:
+        return False
+    return True
+
+
+def other_cpus(cpus) -> set[int]:
+    ''' available CPUs not in cpus, all of them if that would leave none. '''
+    others = available_cpus() - set(cpus)
+    return others or available_cpus()
+
+
+def thread_cpu_time(native_id: int):
+    ''' CPU seconds used by a thread of this process, None if it ended. '''
+    try:
+        with open("/proc/self/task/%d/schedstat" % native_id) as fp:
+            return int(fp.read().split()[0]) / 1e9
+    except (OSError, ValueError, IndexError):
+        pass
+
+    try:
+        with open("/proc/self/task/%d/stat" % native_id) as fp:
+            # fields after the command name, which may contain spaces
+            fields = fp.read().rpartition(")")[2].split()
+    except OSError:
+        return None
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def worker_initializer(jack_cpus):
+    ''' initializer for ThreadPoolExecutor, ProcessPoolExecutor or
+        multiprocessing.Pool keeping their workers away from jack_cpus. '''
+    return partial(pin_current_thread, other_cpus(jack_cpus))
+
+
+class ThreadAffinity:
+    ''' Thread init callback pinning libjack threads to cpus.
+
+            affinity = ThreadAffinity({2, 3})
+            affinity.register(client)  # before activate()
+            ...
+            pool = ThreadPoolExecutor(initializer=worker_initializer({2, 3}))
+
+        cpus=None leaves affinity alone and only records threads. '''
+
+    def __init__(self, cpus=None):
+        self.cpus = set(cpus) if cpus is not None else None
+        self._threads = list[ThreadInfo]()
+        self._lock = threading.Lock()
+
+    def thread_init_callback(self, arg):
+        pinned = self.cpus is not None and pin_current_thread(self.cpus)
+        cpus = tuple(sorted(self.cpus)) if pinned else None
+        info = ThreadInfo(threading.get_native_id(), threading.current_thread().name, cpus)
+
+        with self._lock:
+            self._threads.append(info)
+
+    def register(self, client) -> int:
+        return jacklib.set_thread_init_callback(client, self.thread_init_callback, None)
+
+    @property
+    def threads(self) -> list[ThreadInfo]:
+        with self._lock:
+            return list(self._threads)
+
+    def cpu_times(self) -> dict[int, float]:
+        ''' {native thread id: CPU seconds} of recorded threads still alive,
+            read from /proc (Linux only). Threads which ended are forgotten. '''
+        times = {}
+        ended = set()
+
+        for info in self.threads:
+            seconds = thread_cpu_time(info.native_id)
+            if seconds is None:
+                ended.add(info)
+            else:
+                times[info.native_id] = seconds
+
+        if ended:
+            with self._lock:
+                self._threads = [info for info in self._threads if info not in ended]
+        return times
@@ -0,0 +1,184 @@
+"""Built-in JACK timebase master computing BBT from tempo and meter."""
+
+from bisect import bisect_right
+from collections import namedtuple
+from ctypes import CFUNCTYPE, c_int, c_void_p, cast
+
+from .api import jlib
+from .enums import JackPositionBits
+from .types import (
+    jack_nframes_t,
+    jack_position_t,
+    jack_transport_state_t,
+    JackTimebaseCallback
+)
+
+# same signature as JackTimebaseCallback, but the position arrives
+# as a raw address, so no LP_jack_position_t is built on every cycle.
+_RawTimebaseCallback = CFUNCTYPE(
+    None, jack_transport_state_t, jack_nframes_t, c_void_p, c_int, c_void_p)
+
+TempoChange = namedtuple(
+    "TempoChange", ("frame", "beats_per_minute", "beats_per_bar", "beat_type"))
+
+# One precomputed tempo map segment, everything needed to go from a frame
+# to BBT with one multiplication and integer tick arithmetic. bar is the
+# 0-based bar and bar_tick the tick within it at the segment start, ticks
+# the ticks elapsed since frame 0.
+_Segment = namedtuple(
+    "_Segment",
+    ("frame", "bar", "bar_tick", "ticks", "ticks_per_frame",
+     "beats_per_minute", "beats_per_bar", "beat_type"))
+
+_BBT_VALID = int(JackPositionBits.POSITION_BBT)
+
+
+class BBTTimebase:
+    ''' Timebase master filling bar/beat/tick fields of the JACK position.
+
+        The tempo map is a list of TempoChange, it is converted to
+        segments with precomputed increments. Changes requested with
+        set_tempo() or set_tempo_map() are taken into account
+        at the next cycle boundary. '''
+
+    def __init__(self, sample_rate: int, beats_per_minute=120.0,
+                 beats_per_bar=4.0, beat_type=4.0, ticks_per_beat=1920.0):
+        self.sample_rate = sample_rate
+        self.ticks_per_beat = float(ticks_per_beat)
+        self._segments = self._build_segments(
+            [TempoChange(0, beats_per_minute, beats_per_bar, beat_type)])
+        self._frames = [seg.frame for seg in self._segments]
+        self._seg_index = 0
+        self._pending = None
+        self._views = {}
+        self._client = None
+        self._raw_callback = _RawTimebaseCallback(self._timebase_callback)
+        self._callback = cast(self._raw_callback, JackTimebaseCallback)
+
+    def _build_segments(self, tempo_map: list[TempoChange],
+                        previous: list[_Segment] = ()) -> list[_Segment]:
+        segments = list(previous)
+
+        for change in sorted(tempo_map, key=lambda c: c.frame):
+            if segments:
+                prev = segments[-1]
+                if change.frame < prev.frame:
+                    continue
+                elapsed_ticks = round((change.frame - prev.frame) * prev.ticks_per_frame)
+                bars, bar_tick = divmod(prev.bar_tick + elapsed_ticks,
+                                        round(prev.beats_per_bar * self.ticks_per_beat))
+                bar = prev.bar + bars
+                ticks = prev.ticks + elapsed_ticks
+            else:
+                bar = bar_tick = ticks = 0
+
+            beats_per_frame = change.beats_per_minute / (60.0 * self.sample_rate)
+            segments.append(_Segment(
+                change.frame, bar, bar_tick, ticks,
+                beats_per_frame * self.ticks_per_beat,
+                float(change.beats_per_minute),
+                float(change.beats_per_bar),
+                float(change.beat_type)))
+
+        if not segments or segments[0].frame:
+            raise ValueError("tempo map must start at frame 0")
+
+        return segments
+
+    def set_tempo(self, beats_per_minute: float,
+                  beats_per_bar: float = None, beat_type: float = None):
+        ''' change tempo and/or meter from the next cycle boundary. '''
+        self._pending = (beats_per_minute, beats_per_bar, beat_type)
+
+    def set_tempo_map(self, tempo_map: list[TempoChange]):
+        ''' replace the whole tempo map from the next cycle boundary. '''
+        self._pending = self._build_segments(tempo_map)
+
+    def _apply_pending(self, frame: int):
+        pending, self._pending = self._pending, None
+
+        if isinstance(pending, list):
+            segments = pending
+        else:
+            bpm, bpb, beat_type = pending
+            index = bisect_right(self._frames, frame) - 1
+            current = self._segments[index]
+            # the segments before the change are kept, a change
+            # at the same frame is replaced by this one
+            segments = self._segments[:index + 1]
+            if current.frame == frame:
+                del segments[-1]
+            segments = self._build_segments(
+                [TempoChange(
+                    frame, bpm,
+                    current.beats_per_bar if bpb is None else bpb,
+                    current.beat_type if beat_type is None else beat_type)],
+                segments)
+
+        self._segments = segments
+        self._frames = [seg.frame for seg in segments]
+        self._seg_index = 0
+
+    def _segment_for(self, frame: int) -> _Segment:
+        segments = self._segments
+        seg = segments[self._seg_index]
+        index = self._seg_index + 1
+
+        if frame >= seg.frame and (index == len(segments)
+                                   or frame < segments[index].frame):
+            return seg
+
+        self._seg_index = bisect_right(self._frames, frame) - 1
+        return segments[self._seg_index]
+
+    def bbt(self, frame: int) -> tuple[int, int, int, float]:
+        ''' return (bar, beat, tick, bar_start_tick) at frame,
+            bar and beat are 1-based as in JACK. '''
+        seg = self._segment_for(frame)
+        # counted in whole ticks, so that beat boundaries are exact
+        elapsed_ticks = round((frame - seg.frame) * seg.ticks_per_frame)
+        bars, bar_tick = divmod(seg.bar_tick + elapsed_ticks,
+                                round(seg.beats_per_bar * self.ticks_per_beat))
+        beat, tick = divmod(bar_tick, round(self.ticks_per_beat))
+        ticks = seg.ticks + elapsed_ticks
+        return seg.bar + bars + 1, beat + 1, tick, float(ticks - bar_tick)
+
+    def _timebase_callback(self, state, nframes, pos_addr, new_pos, arg):
+        views = self._views
+        pos = views.get(pos_addr)
+        if pos is None:
+            pos = views[pos_addr] = jack_position_t.from_address(pos_addr)
+
+        frame = pos.frame
+        if self._pending is not None:
+            self._apply_pending(frame)
+
+        seg = self._segment_for(frame)
+        bar, beat, tick, bar_start_tick = self.bbt(frame)
+
+        pos.valid = _BBT_VALID
+        pos.bar = bar
+        pos.beat = beat
+        pos.tick = tick
+        pos.bar_start_tick = bar_start_tick
+        pos.beats_per_bar = seg.beats_per_bar
+        pos.beat_type = seg.beat_type
+        pos.ticks_per_beat = self.ticks_per_beat
+        pos.beats_per_minute = seg.beats_per_minute
+
+    def register(self, client, conditional=False) -> int:
+        ''' become the timebase master of client. '''
+        if jlib.jack_set_timebase_callback is None:
+            return -1
+
+        self._client = client
+        return jlib.jack_set_timebase_callback(
+            client, int(conditional), self._callback, None)
+
+    def release(self) -> int:
+        if self._client is None:
+            return -1
+
+        ret = jlib.jack_release_timebase(self._client)
+        self._client = None
+        return ret
@@ -39,6 +39,7 @@ jack_port_t = _jack_port
 jack_time_t = c_uint64
 jack_unique_t = c_uint64
 jack_uuid_t = c_uint64
+jack_intclient_t = c_uint64
 
 jack_options_t = _c_enum  # JackOptions
 jack_status_t = _c_enum  # JackStatus
@@ -167,4 +168,5 @@ JackTimebaseCallback = CFUNCTYPE(
 JackPropertyChangeCallback = CFUNCTYPE(
     None, jack_uuid_t, c_char_p, jack_property_change_t, c_void_p
 )
-JackErrorCallback = CFUNCTYPE(None, c_char_p)
\ No newline at end of file
+JackErrorCallback = CFUNCTYPE(None, c_char_p)
+JackInfoCallback = CFUNCTYPE(None, c_char_p)
\ No newline at end of file
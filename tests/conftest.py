@@ -1,9 +1,26 @@
+import os
 import sys
+from ctypes.util import find_library
+
 import pytest
 
+# Without libjack, run the tests against the in-process fake backend.
+if find_library("jack") is None:
+    os.environ.setdefault("JACKLIB_BACKEND", "fake")
+
 import jacklib
 from jacklib.helpers import get_jack_status_error_string
 
+
+@pytest.fixture
+def fake_jack():
+    if os.environ.get("JACKLIB_BACKEND") != "fake":
+        pytest.skip("needs JACKLIB_BACKEND=fake")
+
+    yield jacklib.jlib
+    jacklib.jlib.reset()
+
+
 @pytest.fixture
 def jack_client():
     status = jacklib.jack_status_t()
@@ -0,0 +1,72 @@
+from ctypes import POINTER, byref, c_float, cast
+
+import pytest
+
+import jacklib
+
+np = pytest.importorskip("numpy")
+
+from jacklib.blocks import BlockAdapter  # noqa: E402
+
+
+def _open(name):
+    return jacklib.client_open(name, jacklib.JackOptions.NULL, jacklib.jack_status_t())
+
+
+def _audio_port(client, name, flags):
+    return jacklib.port_register(client, name, jacklib.JACK_DEFAULT_AUDIO_TYPE, flags, 0)
+
+
+@pytest.mark.parametrize("block_size, hop_size", [
+    (1024, 256), (1024, 1024), (96, 48), (4096, 3000)])
+def test_block_adapter_passthrough(fake_jack, jack_client, block_size, hop_size):
+    period = jacklib.get_buffer_size(jack_client)
+    gen, sink = _open("gen"), _open("sink")
+    gen_out = _audio_port(gen, "out", jacklib.JackPortFlags.IS_OUTPUT)
+    sink_in = _audio_port(sink, "in", jacklib.JackPortFlags.IS_INPUT)
+    in_ = _audio_port(jack_client, "in", jacklib.JackPortFlags.IS_INPUT)
+    out = _audio_port(jack_client, "out", jacklib.JackPortFlags.IS_OUTPUT)
+    frame = [0]
+    received = []
+
+    def generate(nframes, arg):
+        buf = cast(jacklib.port_get_buffer(gen_out, nframes), POINTER(c_float * nframes))
+        buf.contents[:] = [float(frame[0] + i + 1) for i in range(nframes)]
+        frame[0] += nframes
+        return 0
+
+    def receive(nframes, arg):
+        buf = cast(jacklib.port_get_buffer(sink_in, nframes), POINTER(c_float * nframes))
+        received.extend(buf.contents)
+        return 0
+
+    blocks = []
+
+    def func(block):
+        blocks.append(block.shape)
+        return block[:, -hop_size:]
+
+    adapter = BlockAdapter(jack_client, func, block_size, hop_size, [in_], [out])
+    adapter.register()
+    jacklib.set_process_callback(gen, generate, None)
+    jacklib.set_process_callback(sink, receive, None)
+    for client in (gen, jack_client, sink):
+        jacklib.activate(client)
+    jacklib.connect(gen, "gen:out", "pyjacklib:in")
+    jacklib.connect(gen, "pyjacklib:out", "sink:in")
+
+    cycles = 4 * block_size // period + 4
+    fake_jack.run_cycles(cycles)
+
+    assert set(blocks) == {(1, block_size)}
+    assert len(blocks) == (cycles * period) // hop_size
+    # input frame n is 1.0 + n, the sink sees it adapter.latency frames later
+    received = np.array(received)
+    start = np.flatnonzero(received)[0]
+    assert start == adapter.latency == hop_size - np.gcd(hop_size, period)
+    assert np.array_equal(received[start:], np.arange(1, len(received) - start + 1))
+
+    range_ = jacklib.jack_latency_range_t()
+    jacklib.port_get_latency_range(
+        out, jacklib.JackLatencyCallbackMode.CAPTURE, byref(range_))
+    assert (range_.min, range_.max) == (adapter.latency, adapter.latency)
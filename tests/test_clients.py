@@ -0,0 +1,26 @@
+import jacklib
+from jacklib.clients import ClientDirectory
+
+
+def test_client_directory(fake_jack, jack_client):
+    directory = ClientDirectory(jack_client)
+    directory.register()
+    jacklib.activate(jack_client)
+    directory.refresh()
+    assert directory.names() == ["system"]
+
+    other = jacklib.client_open("synth", jacklib.JackOptions.NULL, jacklib.jack_status_t())
+    uuid = directory.uuid("synth")
+    assert isinstance(uuid, jacklib.jack_uuid_t)
+    assert directory.name(uuid) == "synth"
+    assert jacklib.set_client_property(jack_client, uuid, "urn:test", "x") == 0
+    assert jacklib.get_client_property(jack_client, uuid, "urn:test").value == "x"
+    assert jacklib.get_client_property(jack_client, "synth", "urn:test").value == "x"
+
+    jacklib.client_rename(other, "synth-2")
+    assert directory.uuid("synth-2") is uuid
+    assert directory.name(uuid.value) == "synth-2"
+
+    jacklib.client_close(other)
+    assert "synth-2" not in directory.names()
+    assert directory.uuid("synth-2") is None
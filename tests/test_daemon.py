@@ -0,0 +1,61 @@
+import pytest
+
+import jacklib
+from jacklib.daemon import ControlDaemon, DaemonClient, DaemonError, recv_message, send_message
+
+
+def test_control_daemon(fake_jack, tmp_path):
+    path = str(tmp_path / "daemon.sock")
+
+    with ControlDaemon(path) as daemon, DaemonClient(path) as jack:
+        assert jack.ping() == "pong"
+        assert jack.ports(r"^system:capture") == ["system:capture_1", "system:capture_2"]
+        assert jack.port("system:capture_1")["aliases"] == []
+
+        assert jack.connect("system:capture_1", "system:playback_1") == 0
+        assert jack.connections("system:playback_1") == [["system:capture_1", "system:playback_1"]]
+
+        # one client for all requests
+        assert b"pyjacklib-daemon" in fake_jack.server().clients
+        with DaemonClient(path) as other:
+            assert other.disconnect("system:capture_1", "system:playback_1") == 0
+        assert jack.connections() == []
+
+        assert jack.set_property(jacklib.JACK_METADATA_PRETTY_NAME, "Mic",
+                                 "text/plain", port="system:capture_1") == 0
+        assert jack.properties(port="system:capture_1") == {
+            jacklib.JACK_METADATA_PRETTY_NAME: "Mic"}
+        assert jack.get_property(jacklib.JACK_METADATA_PRETTY_NAME, port="system:capture_1") == {
+            "value": "Mic", "type": "text/plain"}
+
+        # changes made by other clients reach the cache
+        port = jacklib.port_by_name(daemon.manager.get().client, "system:capture_1")
+        jacklib.set_port_pretty_name(daemon.manager.get().client, port, "Guitar")
+        assert jack.properties(port="system:capture_1") == {
+            jacklib.JACK_METADATA_PRETTY_NAME: "Guitar"}
+        assert jack.remove_property(jacklib.JACK_METADATA_PRETTY_NAME,
+                                    port="system:capture_1") == 0
+        assert jack.properties(port="system:capture_1") == {}
+
+        with pytest.raises(DaemonError, match="no such port"):
+            jack.properties(port="nothing:here")
+        with pytest.raises(DaemonError, match="unknown operation"):
+            jack.call("reboot")
+
+    assert b"pyjacklib-daemon" not in fake_jack.server().clients
+
+
+def test_malformed_requests(fake_jack, tmp_path):
+    path = str(tmp_path / "daemon.sock")
+
+    with ControlDaemon(path), DaemonClient(path) as jack:
+        for request in (["ping"], {"args": {}}, {"op": 1},
+                        {"op": "ports", "args": ["^system:"]},
+                        {"op": "port", "args": {"name": 1}},
+                        {"op": "connect", "args": {"source": "system:capture_1"}}):
+            send_message(jack.sock, request)
+            reply = recv_message(jack.sock)
+            assert reply["ok"] is False and reply["error"], request
+
+        # the connection is still served
+        assert jack.ping() == "pong"
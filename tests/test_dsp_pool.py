@@ -0,0 +1,114 @@
+import multiprocessing
+import time
+from ctypes import POINTER, c_float, cast
+
+import pytest
+
+import jacklib
+
+np = pytest.importorskip("numpy")
+
+from jacklib.dsp_pool import DSPWorkerPool  # noqa: E402
+
+
+def _audio_port(client, name, flags):
+    return jacklib.port_register(client, name, jacklib.JACK_DEFAULT_AUDIO_TYPE, flags, 0)
+
+
+def _graph(fake_jack, jack_client, func, channels=2, **kwargs):
+    ''' gen -> pool -> sink, gen writes the cycle number + channel / 10. '''
+    gen = jacklib.client_open("gen", jacklib.JackOptions.NULL, jacklib.jack_status_t())
+    sink = jacklib.client_open("sink", jacklib.JackOptions.NULL, jacklib.jack_status_t())
+    gen_out = [_audio_port(gen, "out_%d" % i, jacklib.JackPortFlags.IS_OUTPUT)
+               for i in range(channels)]
+    sink_in = [_audio_port(sink, "in_%d" % i, jacklib.JackPortFlags.IS_INPUT)
+               for i in range(channels)]
+    in_ports = [_audio_port(jack_client, "in_%d" % i, jacklib.JackPortFlags.IS_INPUT)
+                for i in range(channels)]
+    out_ports = [_audio_port(jack_client, "out_%d" % i, jacklib.JackPortFlags.IS_OUTPUT)
+                 for i in range(channels)]
+    cycle = [0]
+    received = []
+
+    def generate(nframes, arg):
+        cycle[0] += 1
+        for i, port in enumerate(gen_out):
+            buf = cast(jacklib.port_get_buffer(port, nframes), POINTER(c_float * nframes))
+            np.ctypeslib.as_array(buf.contents)[:] = cycle[0] + i / 10
+        return 0
+
+    def receive(nframes, arg):
+        received.append([
+            cast(jacklib.port_get_buffer(port, nframes), POINTER(c_float * nframes)).contents[0]
+            for port in sink_in])
+        return 0
+
+    pool = DSPWorkerPool(jack_client, in_ports, out_ports, func, **kwargs)
+    jacklib.set_process_callback(gen, generate, None)
+    jacklib.set_process_callback(jack_client, pool.process_callback, None)
+    jacklib.set_process_callback(sink, receive, None)
+    for client in (gen, jack_client, sink):
+        jacklib.activate(client)
+    for i in range(channels):
+        jacklib.connect(gen, "gen:out_%d" % i, "pyjacklib:in_%d" % i)
+        jacklib.connect(gen, "pyjacklib:out_%d" % i, "sink:in_%d" % i)
+    return pool, received
+
+
+def test_pool_one_period_latency(fake_jack, jack_client):
+    pool, received = _graph(fake_jack, jack_client, np.negative, workers=2, timeout=5.0)
+    with pool:
+        fake_jack.run_cycles(4)
+
+    assert received == [pytest.approx(row) for row in
+                        ([0.0, 0.0], [-1.0, -1.1], [-2.0, -2.1], [-3.0, -3.1])]
+    assert pool.overruns == 0 and pool.errors == 0
+
+
+def _slow_once(inputs, outputs):
+    if inputs[0, 0] == 2.0:
+        time.sleep(0.3)
+    outputs[...] = inputs
+
+
+def _fail_once(inputs, outputs):
+    if inputs[0, 0] == 2.0:
+        raise ValueError("bad block")
+    outputs[...] = inputs
+
+
+@pytest.fixture
+def fork_context():
+    if "fork" not in multiprocessing.get_all_start_methods():
+        pytest.skip("needs fork")
+    return multiprocessing.get_context("fork")
+
+
+def test_late_worker_is_discarded(fake_jack, jack_client, fork_context):
+    pool, received = _graph(fake_jack, jack_client, _slow_once, channels=1, workers=1,
+                            timeout=0.05, mp_context=fork_context)
+    with pool:
+        fake_jack.run_cycles(2)
+        # the job of cycle 2 takes too long, cycle 3 is silent
+        fake_jack.run_cycles(1)
+        time.sleep(0.4)
+        # the late result is dropped, the worker gets the input of cycle 4
+        fake_jack.run_cycles(1)
+        pool.timeout = 5.0
+        fake_jack.run_cycles(1)
+
+    assert [row[0] for row in received] == pytest.approx([0.0, 1.0, 0.0, 0.0, 4.0])
+    assert pool.overruns == 1
+
+
+def test_worker_error_is_reported(fake_jack, jack_client, fork_context, caplog):
+    pool, received = _graph(fake_jack, jack_client, _fail_once, channels=1, workers=1,
+                            timeout=5.0, mp_context=fork_context)
+    with pool:
+        fake_jack.run_cycles(4)
+        assert pool.errors == 1
+        tracebacks = pool.pop_errors()
+
+    assert [row[0] for row in received] == pytest.approx([0.0, 1.0, 0.0, 3.0])
+    assert len(tracebacks) == 1 and "ValueError: bad block" in tracebacks[0]
+    assert "DSP worker 0 failed" in caplog.text
@@ -0,0 +1,189 @@
+from ctypes import POINTER, byref, c_float, cast, pointer
+
+import jacklib
+from jacklib.helpers import c_char_p_p_to_list
+
+
+def test_ports_and_connections(fake_jack, jack_client):
+    events = []
+    jacklib.set_port_connect_callback(
+        jack_client, lambda a, b, connect, arg: events.append((a, b, connect)), None)
+    out = jacklib.port_register(
+        jack_client, "out", jacklib.JACK_DEFAULT_AUDIO_TYPE, jacklib.JackPortFlags.IS_OUTPUT, 0)
+    assert isinstance(out, POINTER(jacklib.jack_port_t))
+    jacklib.activate(jack_client)
+
+    ports = c_char_p_p_to_list(
+        jacklib.get_ports(jack_client, "", "", jacklib.JackPortFlags.IS_INPUT))
+    assert ports == ["system:playback_1", "system:playback_2"]
+
+    assert jacklib.connect(jack_client, "pyjacklib:out", "system:playback_1") == 0
+    assert list(jacklib.port_get_connections(out)) == ["system:playback_1"]
+    assert [connect for a, b, connect in events] == [1]
+
+    assert jacklib.disconnect(jack_client, "pyjacklib:out", "system:playback_1") == 0
+    assert not jacklib.port_connected(out)
+    assert [connect for a, b, connect in events] == [1, 0]
+
+
+def test_process_cycle_moves_audio(fake_jack, jack_client):
+    out = jacklib.port_register(
+        jack_client, "out", jacklib.JACK_DEFAULT_AUDIO_TYPE, jacklib.JackPortFlags.IS_OUTPUT, 0)
+    in_ = jacklib.port_register(
+        jack_client, "in", jacklib.JACK_DEFAULT_AUDIO_TYPE, jacklib.JackPortFlags.IS_INPUT, 0)
+    received = []
+
+    def process(nframes, arg):
+        inbuf = cast(jacklib.port_get_buffer(in_, nframes), POINTER(c_float))
+        received.append(inbuf[0])
+        outbuf = cast(jacklib.port_get_buffer(out, nframes), POINTER(c_float))
+        for i in range(nframes):
+            outbuf[i] = len(received)
+        return 0
+
+    jacklib.set_process_callback(jack_client, process, None)
+    jacklib.activate(jack_client)
+    jacklib.connect(jack_client, "pyjacklib:out", "pyjacklib:in")
+    fake_jack.run_cycles(3)
+
+    # a client feeding itself gets its output one period later
+    assert received == [0.0, 1.0, 2.0]
+    assert jacklib.last_frame_time(jack_client) == 3 * jacklib.get_buffer_size(jack_client)
+
+
+def test_midi_roundtrip(fake_jack, jack_client):
+    out = jacklib.port_register(
+        jack_client, "midi_out", jacklib.JACK_DEFAULT_MIDI_TYPE, jacklib.JackPortFlags.IS_OUTPUT, 0)
+    in_ = jacklib.port_register(
+        jack_client, "midi_in", jacklib.JACK_DEFAULT_MIDI_TYPE, jacklib.JackPortFlags.IS_INPUT, 0)
+    received = []
+
+    def process(nframes, arg):
+        inbuf = jacklib.port_get_buffer(in_, nframes)
+        event = jacklib.jack_midi_event_t()
+        for i in range(jacklib.midi_get_event_count(inbuf)):
+            jacklib.midi_event_get(byref(event), inbuf, i)
+            received.append((event.time, bytes(event.buffer[:event.size])))
+
+        outbuf = jacklib.port_get_buffer(out, nframes)
+        data = jacklib.midi_event_reserve(outbuf, 10, 3)
+        data[0], data[1], data[2] = 0x90, 60, 100
+        return 0
+
+    jacklib.set_process_callback(jack_client, process, None)
+    jacklib.activate(jack_client)
+    jacklib.connect(jack_client, "pyjacklib:midi_out", "pyjacklib:midi_in")
+    fake_jack.run_cycles(2)
+
+    assert received == [(10, b"\x90\x3c\x64")]
+
+
+def test_metadata(fake_jack, jack_client):
+    changes = []
+    jacklib.set_property_change_callback(
+        jack_client, lambda subject, key, change, arg: changes.append((key, change)), None)
+    jacklib.activate(jack_client)
+    port = jacklib.port_register(
+        jack_client, "out", jacklib.JACK_DEFAULT_AUDIO_TYPE, jacklib.JackPortFlags.IS_OUTPUT, 0)
+
+    assert jacklib.set_port_pretty_name(jack_client, "pyjacklib:out", "Out") == 0
+    assert jacklib.get_port_pretty_name(jack_client, "pyjacklib:out") == "Out"
+    assert jacklib.get_all_properties() == {
+        jacklib.port_uuid(port): [
+            jacklib.Property(jacklib.JACK_METADATA_PRETTY_NAME, "Out", "text/plain")]
+    }
+    assert jacklib.set_client_property(jack_client, "pyjacklib", "urn:test", "x") == 0
+    assert jacklib.get_client_properties(jack_client, "pyjacklib")[0].value == "x"
+
+    assert jacklib.remove_all_properties(jack_client) == 0
+    assert jacklib.get_all_properties() == {}
+    assert [change for key, change in changes] == [
+        jacklib.JackPropertyChange.CREATED, jacklib.JackPropertyChange.CREATED,
+        jacklib.JackPropertyChange.DELETED, jacklib.JackPropertyChange.DELETED]
+
+
+def test_transport_with_timebase_master(fake_jack, jack_client):
+    from jacklib.timebase import BBTTimebase
+
+    timebase = BBTTimebase(jacklib.get_sample_rate(jack_client), beats_per_minute=120)
+    jacklib.activate(jack_client)
+    assert timebase.register(jack_client) == 0
+
+    jacklib.transport_locate(jack_client, 48000)
+    jacklib.transport_start(jack_client)
+    fake_jack.run_cycles(2)
+
+    position = jacklib.jack_position_t()
+    state = jacklib.transport_query(jack_client, pointer(position))
+    assert state == jacklib.JackTransportState.ROLLING
+    assert position.frame == 48000 + jacklib.get_buffer_size(jack_client)
+    assert (position.bar, position.beat, position.tick) == timebase.bbt(position.frame)[:3]
+    assert (position.bar, position.beat) == (1, 3)
+
+
+def test_client_name_not_unique(fake_jack, jack_client):
+    status = jacklib.jack_status_t()
+    other = jacklib.client_open("pyjacklib", jacklib.JackOptions.NULL, status)
+    assert status.value == jacklib.JackStatus.NAME_NOT_UNIQUE
+    assert jacklib.get_client_name(other) == b"pyjacklib-01"
+
+    jacklib.client_open("pyjacklib", jacklib.JackOptions.USE_EXACT_NAME, status)
+    assert status.value & jacklib.JackStatus.FAILURE
+    jacklib.client_close(other)
+
+
+def test_port_register_many(fake_jack, jack_client):
+    audio, out = jacklib.JACK_DEFAULT_AUDIO_TYPE, jacklib.JackPortFlags.IS_OUTPUT
+    ports = jacklib.port_register_many(jack_client, [("a", audio, out), ("b", audio, out)])
+    assert [jacklib.port_name(port) for port in ports] == ["pyjacklib:a", "pyjacklib:b"]
+
+    # "a" exists: "c" is rolled back
+    assert jacklib.port_register_many(jack_client, [("c", audio, out), ("a", audio, out)]) is None
+    assert not jacklib.port_by_name(jack_client, "pyjacklib:c")
+
+    assert jacklib.port_unregister_many(jack_client, ports) == 0
+    assert not jacklib.port_by_name(jack_client, "pyjacklib:a")
+
+
+def test_get_all_properties_table(fake_jack, jack_client):
+    ports = jacklib.port_register_many(jack_client, [
+        ("out_%d" % i, jacklib.JACK_DEFAULT_AUDIO_TYPE, jacklib.JackPortFlags.IS_OUTPUT)
+        for i in range(3)])
+    for i, port in enumerate(ports):
+        jacklib.set_port_pretty_name(jack_client, port, "Out %d" % i)
+    jacklib.set_property(jack_client, jacklib.port_uuid(ports[0]), b"urn:icon", b"\x89PNG",
+                         b"image/png", encoding=None)
+
+    table = jacklib.get_all_properties_table()
+    assert table.key_names == [jacklib.JACK_METADATA_PRETTY_NAME, "urn:icon"]
+    assert table.type_names == [None, "text/plain", "image/png"]
+    assert table.keys == [0, 1, 0, 0]
+    assert table.values == ["Out 0", b"\x89PNG", "Out 1", "Out 2"]
+    assert table.subjects[:2] == [jacklib.port_uuid(ports[0])] * 2
+
+    assert jacklib.get_all_properties()[jacklib.port_uuid(ports[0])] == [
+        jacklib.Property(jacklib.JACK_METADATA_PRETTY_NAME, "Out 0", "text/plain"),
+        jacklib.Property("urn:icon", b"\x89PNG", "image/png")]
+
+
+def test_internal_client(fake_jack, jack_client, monkeypatch):
+    status = jacklib.jack_status_t()
+    handle = jacklib.internal_client_load(
+        jack_client, "loop", jacklib.JackOptions.NULL, status, load_name="inprocess")
+    assert handle and status.value == 0
+    assert jacklib.get_internal_client_name(jack_client, handle) == "loop"
+    assert jacklib.internal_client_handle(jack_client, "loop", status) == handle
+    assert jacklib.port_by_name(jack_client, "loop:output")
+
+    assert not jacklib.internal_client_load(
+        jack_client, "x", jacklib.JackOptions.NULL, status, load_name="missing")
+    assert status.value & jacklib.JackStatus.LOAD_FAILURE
+
+    assert jacklib.internal_client_unload(jack_client, handle) == 0
+    assert not jacklib.port_by_name(jack_client, "loop:output")
+    assert jacklib.internal_client_unload(jack_client, handle) & jacklib.JackStatus.NO_SUCH_CLIENT
+
+    # an int whether libjack has the function or not
+    failed = jacklib.internal_client_unload(jack_client, handle)
+    monkeypatch.setattr(fake_jack, "jack_internal_client_unload", None)
+    assert type(jacklib.internal_client_unload(jack_client, handle)) is type(failed) is int
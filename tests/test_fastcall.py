@@ -0,0 +1,45 @@
+from ctypes import byref, c_void_p, cast
+
+import jacklib
+from jacklib.fastcall import FastCalls, address
+
+
+def test_fastcalls_match_jacklib(fake_jack, jack_client):
+    port = jacklib.port_register(jack_client, "out", jacklib.JACK_DEFAULT_AUDIO_TYPE,
+                                 jacklib.JackPortFlags.IS_OUTPUT, 0)
+    fast = FastCalls(jack_client)
+    port_addr = address(port)
+    results = []
+
+    def process(nframes, arg):
+        results.append((
+            fast.port_get_buffer(port_addr, nframes),
+            cast(jacklib.port_get_buffer(port, nframes), c_void_p).value,
+            fast.frame_time(), jacklib.frame_time(jack_client),
+            fast.last_frame_time(), jacklib.last_frame_time(jack_client),
+            fast.transport_query(None), jacklib.transport_query(jack_client, None),
+        ))
+        return 0
+
+    jacklib.set_process_callback(jack_client, process, None)
+    jacklib.activate(jack_client)
+    fake_jack.run_cycles(3)
+
+    assert len(results) == 3
+    for fast_buf, buf, *times in results:
+        assert isinstance(fast_buf, int)
+        assert fast_buf == buf
+        assert times[0::2] == times[1::2]
+    # frame times move on with each cycle
+    assert results[1][4] == results[0][4] + 1024
+
+
+def test_fastcalls_transport_query(fake_jack, jack_client):
+    fast = FastCalls(jack_client)
+    jacklib.transport_locate(jack_client, 4800)
+    fake_jack.run_cycles(1)
+
+    pos, fast_pos = jacklib.jack_position_t(), jacklib.jack_position_t()
+    state = jacklib.transport_query(jack_client, byref(pos))
+    assert fast.transport_query(address(byref(fast_pos))) == state
+    assert fast_pos.frame == pos.frame == 4800
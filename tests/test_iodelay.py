@@ -0,0 +1,77 @@
+import pytest
+
+import jacklib
+
+np = pytest.importorskip("numpy")
+
+from jacklib.arrays import port_array  # noqa: E402
+from jacklib.iodelay import IODelay, find_delay, main  # noqa: E402
+
+
+def test_find_delay_fractional():
+    rng = np.random.default_rng(1)
+    signal = rng.uniform(-0.5, 0.5, 4096)
+    size = 16384
+    # delay by 123.4 frames with a phase shift of the spectrum
+    freqs = np.fft.rfftfreq(size)
+    recording = np.fft.irfft(np.fft.rfft(signal, size) * np.exp(-2j * np.pi * freqs * 123.4), size)
+    delay, corr = find_delay(signal, -recording)
+    assert delay == pytest.approx(123.4, abs=0.1)
+    assert corr < -0.9
+
+
+def test_iodelay_loopback(fake_jack, jack_client):
+    period = jacklib.get_buffer_size(jack_client)
+    meter = IODelay(jack_client, signal_length=2048, max_delay=4096)
+    meter.register()
+    jacklib.activate(jack_client)
+    assert meter.measure(timeout=0) is None
+
+    jacklib.connect(jack_client, "pyjacklib:out", "pyjacklib:in")
+    fake_jack.run_cycles(3 * meter.window // period + 1)
+
+    # a client feeding itself gets its output one period later
+    result = meter.measure(timeout=0)
+    assert result.frames == pytest.approx(period, abs=0.01)
+    assert result.milliseconds == pytest.approx(1000.0 * period / meter.sample_rate, abs=0.01)
+    assert not result.inverted and result.correlation > 0.99
+    assert result.extra == pytest.approx(result.frames - result.reported[1])
+    assert meter.measure(timeout=0) is not None
+
+    # nothing connected
+    jacklib.disconnect(jack_client, "pyjacklib:out", "pyjacklib:in")
+    while meter.measure(timeout=0) is not None:
+        pass
+    fake_jack.run_cycles(2 * meter.window // period + 1)
+    assert meter.measure(timeout=0) is None
+
+
+def test_iodelay_main_connect(fake_jack, monkeypatch, capsys):
+    # a loopback client copying its input to its output
+    loop = jacklib.client_open("loop", jacklib.JackOptions.NULL, jacklib.jack_status_t())
+    loop_in, loop_out = (
+        jacklib.port_register(loop, name, jacklib.JACK_DEFAULT_AUDIO_TYPE, flags, 0)
+        for name, flags in (("in", jacklib.JackPortFlags.IS_INPUT),
+                            ("out", jacklib.JackPortFlags.IS_OUTPUT)))
+
+    def copy(nframes, arg):
+        port_array(loop_out, nframes)[:] = port_array(loop_in, nframes)
+        return 0
+
+    jacklib.set_process_callback(loop, copy, None)
+    jacklib.activate(loop)
+    connections = []
+    measure = IODelay.measure
+
+    def run_and_measure(self, timeout=None):
+        connections.append((list(jacklib.port_get_connections(self.out_port)),
+                            list(jacklib.port_get_connections(self.in_port))))
+        fake_jack.run_cycles(2 * self.window // jacklib.get_buffer_size(self.client) + 2)
+        return measure(self, timeout=0)
+
+    monkeypatch.setattr(IODelay, "measure", run_and_measure)
+    main(["--connect", "loop:in", "loop:out", "--count", "1"])
+
+    assert connections == [(["loop:in"], ["loop:out"])]
+    assert "frames" in capsys.readouterr().out
+    jacklib.client_close(loop)
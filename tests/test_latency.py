@@ -0,0 +1,53 @@
+import jacklib
+from jacklib.latency import LatencyAnalyzer
+
+
+def test_latency_paths(fake_jack, jack_client):
+    status = jacklib.jack_status_t()
+    fx = jacklib.client_open("fx", jacklib.JackOptions.NULL, status)
+    fx_in, fx_out = jacklib.port_register_many(fx, [
+        ("in", jacklib.JACK_DEFAULT_AUDIO_TYPE, jacklib.JackPortFlags.IS_INPUT),
+        ("out", jacklib.JACK_DEFAULT_AUDIO_TYPE, jacklib.JackPortFlags.IS_OUTPUT)])
+    range_ = jacklib.jack_latency_range_t()
+
+    def fx_latency(mode, arg):
+        # fx adds 64 frames
+        if mode == jacklib.JackLatencyCallbackMode.CAPTURE:
+            jacklib.port_get_latency_range(fx_in, mode, range_)
+            range_.min += 64
+            range_.max += 64
+            jacklib.port_set_latency_range(fx_out, mode, range_)
+
+    jacklib.set_latency_callback(fx, fx_latency, None)
+    analyzer = LatencyAnalyzer(jack_client)
+    analyzer.register()
+    jacklib.activate(fx)
+    jacklib.activate(jack_client)
+    jacklib.connect(fx, "system:capture_1", "fx:in")
+    jacklib.connect(fx, "fx:out", "system:playback_1")
+    jacklib.connect(fx, "system:capture_2", "system:playback_2")
+
+    period = jacklib.get_buffer_size(jack_client)
+    assert analyzer.latency("system:capture_1", "system:playback_1") == (
+        2 * period + 64, 2 * period + 64)
+    assert analyzer.latency("system:capture_2", "system:playback_2") == (2 * period, 2 * period)
+    assert analyzer.latency("system:capture_2", "system:playback_1") is None
+    assert analyzer.compensation(["system:playback_1", "system:playback_2"]) == {
+        "system:playback_1": 0, "system:playback_2": 64}
+    assert not analyzer.update()
+
+    jacklib.connect(fx, "system:capture_2", "fx:in")
+    assert analyzer.latency("system:capture_2", "system:playback_1") == (
+        2 * period + 64, 2 * period + 64)
+    jacklib.client_close(fx)
+
+
+def test_latency_connections_of_other_clients(fake_jack, jack_client, monkeypatch):
+    analyzer = LatencyAnalyzer(jack_client)
+    jacklib.activate(jack_client)
+    jacklib.connect(jack_client, "system:capture_1", "system:playback_1")
+    # JACK1 only lists the connections of the ports of the calling client
+    monkeypatch.setattr(fake_jack, "jack_port_get_connections", lambda port: None)
+
+    period = jacklib.get_buffer_size(jack_client)
+    assert analyzer.latency("system:capture_1", "system:playback_1") == (2 * period, 2 * period)
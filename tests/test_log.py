@@ -0,0 +1,29 @@
+import logging
+
+import jacklib
+from jacklib.log import BufferedJackLog
+
+
+def test_buffered_log(fake_jack, jack_client, caplog):
+    buffered = BufferedJackLog(capacity=8, rate=3, interval=60)
+    buffered.start()
+    try:
+        # errors are only buffered by the handler
+        for _ in range(2):
+            jacklib.port_register(jack_client, "x" * 400, jacklib.JACK_DEFAULT_AUDIO_TYPE,
+                                  jacklib.JackPortFlags.IS_OUTPUT, 0)
+        for i in range(10):
+            fake_jack._error("error %d" % i)
+        fake_jack._info("hello")
+        assert not caplog.records
+
+        with caplog.at_level(logging.INFO, logger="jacklib.log"):
+            buffered.drain()
+    finally:
+        buffered.stop()
+
+    messages = [record.getMessage() for record in caplog.records]
+    # 13 messages in a ring of 8: the two port errors and 3 others dropped
+    assert messages == [
+        "error 3", "error 4", "error 5",
+        "JACK log: 5 messages dropped, 5 messages over rate limit"]
@@ -0,0 +1,34 @@
+import io
+import json
+
+import jacklib
+from jacklib import lsp
+
+
+def test_graph_dump_and_watch(fake_jack, jack_client):
+    watcher = lsp.Watcher(jack_client)
+    watcher.register()
+    jacklib.activate(jack_client)
+    port = jacklib.port_register(
+        jack_client, "out", jacklib.JACK_DEFAULT_AUDIO_TYPE, jacklib.JackPortFlags.IS_OUTPUT, 0)
+    jacklib.connect(jack_client, "pyjacklib:out", "system:playback_1")
+    jacklib.set_port_pretty_name(jack_client, port, "Out")
+
+    stream = io.StringIO()
+    lsp.dump(lsp.graph(jack_client), "ndjson", stream)
+    ports = {port["name"]: port for port in map(json.loads, stream.getvalue().splitlines())}
+    assert ports["pyjacklib:out"]["connections"] == ["system:playback_1"]
+    assert ports["pyjacklib:out"]["flags"] == ["is_output"]
+    assert ports["pyjacklib:out"]["properties"] == {jacklib.JACK_METADATA_PRETTY_NAME: "Out"}
+    assert ports["system:playback_1"]["connections"] == ["pyjacklib:out"]
+    period = jacklib.get_buffer_size(jack_client)
+    assert ports["system:playback_1"]["latency"]["playback"] == [period, period]
+
+    stream = io.StringIO()
+    lsp.dump(lsp.graph(jack_client), "text", stream)
+    assert "pyjacklib:out\n    system:playback_1\n" in stream.getvalue()
+
+    stream = io.StringIO()
+    watcher.run("ndjson", stream, timeout=0)
+    events = [json.loads(line)["event"] for line in stream.getvalue().splitlines()]
+    assert events == ["port_registered", "connected", "property_created"]
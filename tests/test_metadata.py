@@ -0,0 +1,58 @@
+import jacklib
+from jacklib.metadata import MetadataBatch
+
+
+def test_metadata_batch(fake_jack, jack_client):
+    changes = []
+    jacklib.set_property_change_callback(
+        jack_client, lambda subject, key, change, arg: changes.append(key), None)
+    jacklib.activate(jack_client)
+    ports = jacklib.port_register_many(jack_client, [
+        ("out_%d" % i, jacklib.JACK_DEFAULT_AUDIO_TYPE, jacklib.JackPortFlags.IS_OUTPUT)
+        for i in range(3)])
+    jacklib.set_port_pretty_name(jack_client, ports[0], "Out 1")
+    del changes[:]
+
+    batch = MetadataBatch(jack_client)
+    for i, port in enumerate(ports):
+        batch.set_port_pretty_name(port, "Out %d" % (i + 1))
+    batch.remove(jacklib.port_uuid(ports[2]), "urn:missing")
+    results = batch.commit()
+
+    assert [result.written for result in results] == [False, True, True, False]
+    assert all(result.status == 0 for result in results)
+    assert len(changes) == 2
+    assert jacklib.get_port_pretty_name(jack_client, ports[2]) == "Out 3"
+
+    batch.set_port(ports[2], "urn:test", "x")
+    future = batch.commit_async()
+    assert [result.written for result in future.result()] == [True]
+    batch.close()
+    assert jacklib.get_port_property(jack_client, ports[2], "urn:test").value == "x"
+
+
+def test_empty_property_type(fake_jack, jack_client):
+    port = jacklib.port_register(jack_client, "out", jacklib.JACK_DEFAULT_AUDIO_TYPE,
+                                 jacklib.JackPortFlags.IS_OUTPUT, 0)
+    subject = jacklib.port_uuid(port)
+    jacklib.set_property(jack_client, subject, "urn:text", "a", "text/plain")
+    # libjack keeps an empty type as is, the fake one only through its store
+    fake_jack._metadata_server().properties[subject][b"urn:empty"] = (b"b", b"")
+
+    expected = sorted(jacklib.get_properties(subject))
+    assert jacklib.Property("urn:empty", "b", b"") in expected
+    assert sorted(jacklib.get_all_properties()[subject]) == expected
+
+
+def test_metadata_batch_uuid_subject(fake_jack, jack_client):
+    jacklib.activate(jack_client)
+    uuid = jacklib.uuid_parse(jacklib.get_uuid_for_client_name(jack_client, "pyjacklib"))
+    assert isinstance(uuid, jacklib.jack_uuid_t)
+    jacklib.set_property(jack_client, uuid.value, "urn:test", "x")
+
+    batch = MetadataBatch(jack_client)
+    batch.set(uuid, "urn:test", "y")
+    batch.set(uuid.value, "urn:test", "x")
+    assert len(batch) == 1
+    # the value did not change
+    assert [result.written for result in batch.commit()] == [False]
@@ -0,0 +1,131 @@
+from ctypes import POINTER, c_float, cast
+
+import pytest
+
+import jacklib
+
+np = pytest.importorskip("numpy")
+
+from jacklib.meter import PortMeter  # noqa: E402
+
+
+def _open(name):
+    return jacklib.client_open(name, jacklib.JackOptions.NULL, jacklib.jack_status_t())
+
+
+def _audio_port(client, name, flags):
+    return jacklib.port_register(client, name, jacklib.JACK_DEFAULT_AUDIO_TYPE, flags, 0)
+
+
+@pytest.fixture
+def metered(fake_jack, jack_client):
+    ''' (meter, signals): meter of two ports fed by a generator client,
+        playing the functions of signals(nframes) -> (2 x nframes) array. '''
+    gen = _open("gen")
+    outs = [_audio_port(gen, "out_%d" % i, jacklib.JackPortFlags.IS_OUTPUT) for i in (1, 2)]
+    ins = [_audio_port(jack_client, "in_%d" % i, jacklib.JackPortFlags.IS_INPUT)
+           for i in (1, 2)]
+    signals = []
+
+    def generate(nframes, arg):
+        block = signals.pop(0)(nframes) if signals else np.zeros((2, nframes))
+        for port, channel in zip(outs, block):
+            buf = cast(jacklib.port_get_buffer(port, nframes), POINTER(c_float * nframes))
+            buf.contents[:] = channel.tolist()
+        return 0
+
+    meter = PortMeter(ins, jacklib.get_buffer_size(jack_client))
+    jacklib.set_process_callback(gen, generate, None)
+    jacklib.set_process_callback(jack_client, meter.process_callback, None)
+    jacklib.activate(gen)
+    jacklib.activate(jack_client)
+    for i in (1, 2):
+        jacklib.connect(gen, "gen:out_%d" % i, "pyjacklib:in_%d" % i)
+
+    yield meter, signals
+    jacklib.client_close(gen)
+
+
+def test_meter_peak_and_rms(fake_jack, metered):
+    meter, signals = metered
+    # a square wave of amplitude 0.5 and a short click in silence
+    signals.append(lambda n: np.array([
+        np.where(np.arange(n) % 2, 0.5, -0.5),
+        np.where(np.arange(n) == 10, -0.8, 0.0)]))
+    fake_jack.run_cycles(1)
+
+    reading = meter.read()
+    np.testing.assert_allclose(reading.peak, [0.5, 0.8])
+    np.testing.assert_allclose(reading.rms, [0.5, 0.8 / np.sqrt(1024)], rtol=1e-6)
+    assert np.all(reading.true_peak >= reading.peak)
+
+
+def test_meter_accumulates_until_read(fake_jack, metered):
+    meter, signals = metered
+    signals.append(lambda n: np.full((2, n), 0.5))
+    signals.append(lambda n: np.full((2, n), 0.25))
+    fake_jack.run_cycles(2)
+
+    # the peak is held, the RMS covers both cycles
+    reading = meter.read(reset=False)
+    np.testing.assert_allclose(reading.peak, [0.5, 0.5])
+    np.testing.assert_allclose(reading.rms, np.sqrt((0.5 ** 2 + 0.25 ** 2) / 2), rtol=1e-6)
+
+    signals.append(lambda n: np.full((2, n), 0.25))
+    fake_jack.run_cycles(1)
+    np.testing.assert_allclose(meter.read().peak, [0.5, 0.5])
+
+    # values start again from the cycle after the reset
+    signals.append(lambda n: np.full((2, n), 0.125))
+    fake_jack.run_cycles(1)
+    reading = meter.read()
+    np.testing.assert_allclose(reading.peak, [0.125, 0.125])
+    np.testing.assert_allclose(reading.rms, [0.125, 0.125], rtol=1e-6)
+
+    fake_jack.run_cycles(1)
+    np.testing.assert_allclose(meter.read().peak, [0.0, 0.0])
+
+
+def test_meter_true_peak_between_samples(fake_jack, metered):
+    meter, signals = metered
+    # a sine at a quarter of the sample rate, sampled 45 degrees off its peaks
+    signals.append(lambda n: np.tile(np.sin(np.pi / 2 * np.arange(n) + np.pi / 4), (2, 1)))
+    fake_jack.run_cycles(1)
+
+    reading = meter.read()
+    np.testing.assert_allclose(reading.peak, np.sqrt(0.5), rtol=1e-6)
+    assert np.all(reading.true_peak > 0.8)
+    assert np.all(reading.true_peak < 1.1)
+
+
+def test_meter_reset_keeps_cycles_after_the_read(fake_jack, metered, monkeypatch):
+    meter, signals = metered
+    signals.append(lambda n: np.full((2, n), 0.25))
+    fake_jack.run_cycles(1)
+
+    # a cycle runs between the copy of the snapshot and the reset request
+    read_versioned = meter.snapshot.read_versioned
+
+    def read_then_cycle(*args):
+        result = read_versioned(*args)
+        signals.append(lambda n: np.full((2, n), 0.75))
+        fake_jack.run_cycles(1)
+        return result
+
+    monkeypatch.setattr(meter.snapshot, "read_versioned", read_then_cycle)
+    np.testing.assert_allclose(meter.read().peak, [0.25, 0.25])
+    monkeypatch.undo()
+
+    signals.append(lambda n: np.full((2, n), 0.5))
+    fake_jack.run_cycles(1)
+    reading = meter.read()
+    np.testing.assert_allclose(reading.peak, [0.75, 0.75])
+    np.testing.assert_allclose(reading.rms, np.sqrt((0.75 ** 2 + 0.5 ** 2) / 2), rtol=1e-6)
+
+
+def test_meter_empty_cycle(fake_jack, metered):
+    meter, signals = metered
+    meter.process(0)
+    reading = meter.read()
+    assert np.all(np.isfinite(reading.rms))
+    assert not reading.peak.any()
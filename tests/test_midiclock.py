@@ -0,0 +1,95 @@
+from ctypes import byref
+
+import jacklib
+from jacklib.midiclock import CLOCK, CONTINUE, START, STOP, MidiClock, song_position, timecode
+
+
+def _monitor(client):
+    ''' (transport frame, message) received on client:in. '''
+    in_ = jacklib.port_register(
+        client, "in", jacklib.JACK_DEFAULT_MIDI_TYPE, jacklib.JackPortFlags.IS_INPUT, 0)
+    pos = jacklib.jack_position_t()
+    event = jacklib.jack_midi_event_t()
+    received = []
+
+    def process(nframes, arg):
+        jacklib.transport_query(client, byref(pos))
+        buf = jacklib.port_get_buffer(in_, nframes)
+        for i in range(jacklib.midi_get_event_count(buf)):
+            jacklib.midi_event_get(byref(event), buf, i)
+            received.append((pos.frame + event.time, bytes(event.buffer[:event.size])))
+        return 0
+
+    jacklib.set_process_callback(client, process, None)
+    return received
+
+
+def test_midi_clock(fake_jack, jack_client):
+    # 120 bpm at 48 kHz: one clock every 1000 frames
+    assert jacklib.get_sample_rate(jack_client) == 48000
+    period = jacklib.get_buffer_size(jack_client)
+    monitor = jacklib.client_open("monitor", jacklib.JackOptions.NULL, jacklib.jack_status_t())
+    received = _monitor(monitor)
+    clock = MidiClock(jack_client)
+    clock.register()
+    jacklib.activate(jack_client)
+    jacklib.activate(monitor)
+    jacklib.connect(jack_client, "pyjacklib:clock", "monitor:in")
+
+    fake_jack.run_cycles(2)
+    assert received == [(0, song_position(0))]
+    received.clear()
+
+    jacklib.transport_start(jack_client)
+    fake_jack.run_cycles(1 + 10000 // period)
+    assert received[:3] == [(0, START), (0, CLOCK), (1000, CLOCK)]
+    clocks = [frame for frame, message in received if message == CLOCK]
+    assert clocks == list(range(0, clocks[-1] + 1, 1000))
+
+    jacklib.transport_stop(jack_client)
+    fake_jack.run_cycles(1)
+    # followed by the position where it stopped
+    stopped = (1 + 10000 // period) * period
+    assert received[-2:] == [(stopped, STOP), (stopped, song_position(stopped // 6000))]
+    received.clear()
+
+    # resumes on the next sixteenth note (6 clocks)
+    jacklib.transport_locate(jack_client, 12345)
+    fake_jack.run_cycles(2)
+    assert received == [(12345, song_position(2))]
+    jacklib.transport_start(jack_client)
+    fake_jack.run_cycles(2 + 8000 // period)
+    assert received[1:5] == [(12345, song_position(3)), (18000, CONTINUE),
+                             (18000, CLOCK), (19000, CLOCK)]
+    assert not clock.lost
+
+
+def test_mtc_quarter_frames(fake_jack, jack_client):
+    period = jacklib.get_buffer_size(jack_client)
+    monitor = jacklib.client_open("monitor", jacklib.JackOptions.NULL, jacklib.jack_status_t())
+    received = _monitor(monitor)
+    clock = MidiClock(jack_client, clock=False, mtc=True, mtc_fps=25)
+    clock.register()
+    jacklib.activate(jack_client)
+    jacklib.activate(monitor)
+    jacklib.connect(jack_client, "pyjacklib:clock", "monitor:in")
+
+    start = 48000 * 3661  # 01:01:01:00
+    jacklib.transport_locate(jack_client, start)
+    jacklib.transport_start(jack_client)
+    fake_jack.run_cycles(2 + 20 * 480 // period)
+
+    full_frames = [message for frame, message in received if message[0] == 0xF0]
+    assert full_frames[-1] == bytes((0xF0, 0x7F, 0x7F, 1, 1, 1 << 5 | 1, 1, 1, 0, 0xF7))
+
+    # one quarter frame every 480 frames at 25 fps
+    quarters = [(frame, message) for frame, message in received if message[0] == 0xF1]
+    assert [frame - start for frame, _ in quarters[:3]] == [0, 480, 960]
+    pieces = [message[1] >> 4 for _, message in quarters]
+    assert pieces[:6] == [4, 5, 6, 7, 0, 1]
+
+    first = pieces.index(0)
+    nibbles = [message[1] & 0x0F for _, message in quarters[first:first + 8]]
+    values = [nibbles[i] | nibbles[i + 1] << 4 for i in range(0, 8, 2)]
+    assert values == [1, 1, 1, 1 | 1 << 5]
+    assert timecode(3661 * 25 + 1, 25) == (1, 1, 1, 1)
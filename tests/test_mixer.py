@@ -0,0 +1,107 @@
+from ctypes import POINTER, c_float, cast
+
+import pytest
+
+import jacklib
+
+np = pytest.importorskip("numpy")
+
+from jacklib.mixer import MatrixMixer  # noqa: E402
+
+
+def _open(name):
+    return jacklib.client_open(name, jacklib.JackOptions.NULL, jacklib.jack_status_t())
+
+
+def _audio_port(client, name, flags):
+    return jacklib.port_register(client, name, jacklib.JACK_DEFAULT_AUDIO_TYPE, flags, 0)
+
+
+@pytest.fixture
+def mixer(fake_jack, jack_client, request):
+    ''' (mixer, received): a 2 x 2 mixer with constant inputs 1.0 and 0.5,
+        received the list of (2 x nframes) outputs of each cycle.
+        The ramp_frames of the mixer can be given as fixture parameter. '''
+    gen, sink = _open("gen"), _open("sink")
+    outs = [_audio_port(gen, "out_%d" % i, jacklib.JackPortFlags.IS_OUTPUT) for i in (1, 2)]
+    ins = [_audio_port(sink, "in_%d" % i, jacklib.JackPortFlags.IS_INPUT) for i in (1, 2)]
+    received = []
+
+    def generate(nframes, arg):
+        for port, value in zip(outs, (1.0, 0.5)):
+            buf = cast(jacklib.port_get_buffer(port, nframes), POINTER(c_float * nframes))
+            buf.contents[:] = [value] * nframes
+        return 0
+
+    def receive(nframes, arg):
+        received.append(np.array([
+            cast(jacklib.port_get_buffer(port, nframes), POINTER(c_float * nframes)).contents
+            for port in ins]))
+        return 0
+
+    mixer = MatrixMixer(jack_client, 2, 2, ramp_frames=getattr(request, "param", None))
+    jacklib.set_process_callback(gen, generate, None)
+    jacklib.set_process_callback(jack_client, mixer.process_callback, None)
+    jacklib.set_process_callback(sink, receive, None)
+    for client in (gen, jack_client, sink):
+        jacklib.activate(client)
+    for i in (1, 2):
+        jacklib.connect(gen, "gen:out_%d" % i, "pyjacklib:in_%d" % i)
+        jacklib.connect(gen, "pyjacklib:out_%d" % i, "sink:in_%d" % i)
+
+    yield mixer, received
+    jacklib.client_close(gen)
+    jacklib.client_close(sink)
+
+
+def test_mixer_sums_with_gains(fake_jack, mixer):
+    mixer, received = mixer
+    fake_jack.run_cycles(1)
+    assert not received[-1].any()
+
+    mixer.set_gains([[1.0, 1.0], [0.0, 2.0]])
+    # the first cycle ramps from silence, the next ones are steady
+    fake_jack.run_cycles(2)
+    np.testing.assert_allclose(received[-1], [[1.5] * 1024, [1.0] * 1024], rtol=1e-6)
+
+    mixer.set_gain(0, 1, -1.0)
+    fake_jack.run_cycles(2)
+    np.testing.assert_allclose(received[-1], [[0.5] * 1024, [1.0] * 1024], rtol=1e-6)
+
+
+def test_mixer_ramps_gain_changes(fake_jack, mixer):
+    mixer, received = mixer
+    mixer.set_gains([[1.0, 0.0], [0.0, 1.0]])
+    fake_jack.run_cycles(2)
+
+    mixer.set_gain(0, 0, 0.0)
+    fake_jack.run_cycles(2)
+    ramp, after = received[-2], received[-1]
+
+    # linear over the period, from the old gain to the new one, not a step
+    expected = 1.0 - np.arange(1, 1025) / 1024.0
+    np.testing.assert_allclose(ramp[0], expected, atol=1e-6)
+    assert np.all(np.diff(ramp[0]) < 0)
+    assert np.abs(np.diff(ramp[0])).max() < 0.01
+    # untouched gains do not move
+    np.testing.assert_allclose(ramp[1], 0.5)
+    np.testing.assert_allclose(after, [[0.0] * 1024, [0.5] * 1024], atol=1e-6)
+
+
+def test_mixer_gain_change_during_ramp(fake_jack, jack_client):
+    mixer = MatrixMixer(jack_client, 1, 1, ramp_frames=4096)
+    mixer.set_gains([[1.0]])
+    mixer.process(1024)
+    # a quarter of the way from 0 to 1: the new ramp starts there
+    mixer.set_gains([[0.0]])
+    mixer.process(1024)
+    np.testing.assert_allclose(mixer._start, [[0.25]])
+    np.testing.assert_allclose(mixer._target, [[0.0]])
+
+
+@pytest.mark.parametrize("mixer", [0], indirect=True)
+def test_mixer_without_ramp(fake_jack, mixer):
+    mixer, received = mixer
+    mixer.set_gains([[1.0, 0.0], [0.0, 2.0]])
+    fake_jack.run_cycles(1)
+    np.testing.assert_allclose(received[-1], [[1.0] * 1024, [1.0] * 1024])
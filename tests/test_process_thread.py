@@ -0,0 +1,70 @@
+import jacklib
+from jacklib import api
+from jacklib.process_thread import ProcessThreadDriver
+
+
+def test_hooks_run_each_cycle(fake_jack, jack_client, monkeypatch):
+    frames = []
+    signalled = []
+    cycle_signal = fake_jack.jack_cycle_signal
+
+    def record_signal(client, status):
+        signalled.append(status)
+        cycle_signal(client, status)
+
+    monkeypatch.setattr(fake_jack, "jack_cycle_signal", record_signal)
+    driver = ProcessThreadDriver(jack_client, [frames.append])
+    assert driver.register() == 0
+    jacklib.activate(jack_client)
+
+    fake_jack.run_cycles(3)
+    period = jacklib.get_buffer_size(jack_client)
+    assert frames == [period] * 3
+    assert driver.cycles == 3
+
+    driver.stop()
+    fake_jack.run_cycles(2)
+    assert driver.cycles == 4
+    assert driver.status == 0 and driver.error is None
+    # the last cycle takes the client out of the graph
+    assert signalled == [0, 0, 0, 1]
+    assert not fake_jack.server().clients[b"pyjacklib"].active
+
+
+def test_non_zero_status_ends_thread(fake_jack, jack_client):
+    calls = []
+
+    def hook(nframes):
+        calls.append(nframes)
+        return 1 if len(calls) == 2 else 0
+
+    driver = ProcessThreadDriver(jack_client, [hook])
+    driver.register()
+    jacklib.activate(jack_client)
+    fake_jack.run_cycles(4)
+
+    assert len(calls) == 2
+    assert driver.status == 1
+    assert not fake_jack.server().clients[b"pyjacklib"].active
+
+
+def test_hook_exception_ends_thread(fake_jack, jack_client, caplog):
+    def hook(nframes):
+        raise RuntimeError("boom")
+
+    driver = ProcessThreadDriver(jack_client, [hook])
+    driver.register()
+    jacklib.activate(jack_client)
+    fake_jack.run_cycles(3)
+
+    assert isinstance(driver.error, RuntimeError)
+    assert driver.status == -1 and driver.cycles == 1
+    assert "process thread hook failed" in caplog.text
+
+
+def test_thread_callbacks_released_on_close(fake_jack):
+    client = jacklib.client_open("threaded", jacklib.JackOptions.NULL, jacklib.jack_status_t())
+    assert jacklib.set_process_thread(client, lambda arg: None, None) == 0
+    assert len(api._thread_callbacks) == 1
+    jacklib.client_close(client)
+    assert api._thread_callbacks == {}
@@ -0,0 +1,102 @@
+import struct
+from ctypes import POINTER, c_float, cast
+
+import pytest
+
+import jacklib
+from jacklib.render import OfflineRenderer
+
+
+def test_render_length_and_silence(fake_jack, jack_client, tmp_path):
+    out = jacklib.port_register(
+        jack_client, "out", jacklib.JACK_DEFAULT_AUDIO_TYPE, jacklib.JackPortFlags.IS_OUTPUT, 0)
+    cycles = []
+
+    def process(nframes, arg):
+        buf = cast(jacklib.port_get_buffer(out, nframes), POINTER(c_float))
+        value = 0.5 if len(cycles) < 4 else 0.0
+        for i in range(nframes):
+            buf[i] = value
+        cycles.append(nframes)
+        return 0
+
+    jacklib.set_process_callback(jack_client, process, None)
+    jacklib.activate(jack_client)
+    nframes = jacklib.get_buffer_size(jack_client)
+    rate = jacklib.get_sample_rate(jack_client)
+
+    renderer = OfflineRenderer(["pyjacklib:out"], str(tmp_path), length=100 * nframes,
+                               silence_threshold=1e-4, silence_seconds=2 * nframes / rate)
+    with renderer:
+        fake_jack.run_cycles(20)
+        assert renderer.done.is_set()
+        assert fake_jack.server().freewheel
+
+    assert not fake_jack.server().freewheel
+    assert not renderer.interrupted
+
+    with open(renderer.paths[0], "rb") as fp:
+        data = fp.read()
+    assert data[:4] == b"RIFF" and data[8:12] == b"WAVE"
+    assert struct.unpack("<H", data[20:22])[0] == 3
+    samples = struct.unpack("<%df" % renderer.frames, data[56:])
+    # audio then two silent periods
+    assert struct.unpack("<I", data[52:56])[0] == 4 * len(samples) == 4 * renderer.frames
+    assert samples[0] == 0.5 and samples[-1] == 0.0
+    assert samples[-2 * nframes - 1] == 0.5
+
+
+def test_render_silent_lead_in(fake_jack, jack_client, tmp_path):
+    out = jacklib.port_register(
+        jack_client, "out", jacklib.JACK_DEFAULT_AUDIO_TYPE, jacklib.JackPortFlags.IS_OUTPUT, 0)
+    cycles = []
+
+    def process(nframes, arg):
+        buf = cast(jacklib.port_get_buffer(out, nframes), POINTER(c_float))
+        # 5 silent periods, 2 with audio, then silence
+        value = 0.5 if 5 <= len(cycles) < 7 else 0.0
+        for i in range(nframes):
+            buf[i] = value
+        cycles.append(nframes)
+        return 0
+
+    jacklib.set_process_callback(jack_client, process, None)
+    jacklib.activate(jack_client)
+    nframes = jacklib.get_buffer_size(jack_client)
+    rate = jacklib.get_sample_rate(jack_client)
+
+    renderer = OfflineRenderer(["pyjacklib:out"], str(tmp_path), silence_threshold=1e-4,
+                               silence_seconds=2 * nframes / rate)
+    with renderer:
+        fake_jack.run_cycles(20)
+        assert renderer.done.is_set()
+
+    # the lead-in is kept, the capture ends two periods after the audio
+    assert renderer.frames == 9 * nframes
+
+
+def test_render_on_named_server(fake_jack, tmp_path):
+    other = fake_jack.server("other")
+    renderer = OfflineRenderer(["system:capture_1"], str(tmp_path), length=1000,
+                               server_name="other")
+    with renderer:
+        assert b"pyjacklib-render" in other.clients
+        assert b"pyjacklib-render" not in fake_jack.server().clients
+        fake_jack.run_cycles(2, server="other")
+        assert renderer.done.is_set()
+
+    assert renderer.frames == 1000
+    assert b"pyjacklib-render" not in other.clients
+
+
+def test_render_start_failure_closes_client(fake_jack, tmp_path):
+    renderer = OfflineRenderer(["system:capture_1"], str(tmp_path), length=1000)
+    renderer.directory = str(tmp_path / "file")
+    open(renderer.directory, "w").close()
+
+    with pytest.raises(OSError):
+        renderer.start()
+
+    assert renderer.client is None
+    assert b"pyjacklib-render" not in fake_jack.server().clients
+    assert not fake_jack.server().freewheel
@@ -0,0 +1,44 @@
+import pytest
+
+import jacklib
+from jacklib.servers import ServerManager
+
+
+def test_server_manager(fake_jack):
+    with ServerManager("manager") as manager:
+        studio = manager.open("studio")
+        stage = manager.open("stage")
+        assert manager.open("studio") is studio
+        assert manager.names() == ["studio", "stage"]
+
+        # clients live on their own server
+        assert fake_jack.server("studio") is not fake_jack.server("stage")
+        assert b"manager" in fake_jack.server("studio").clients
+        assert b"manager" in fake_jack.server("stage").clients
+        assert b"manager" not in fake_jack.server().clients
+
+        assert studio.connections() == []
+        graph = studio.graph()
+        assert studio.graph() is graph
+
+        assert stage.connect("system:capture_1", "system:playback_1") == 0
+        assert studio.graph() is graph
+        assert stage.connections() == [("system:capture_1", "system:playback_1")]
+        assert studio.connections() == []
+
+        port = studio.call(jacklib.port_register, "out", jacklib.JACK_DEFAULT_AUDIO_TYPE,
+                           jacklib.JackPortFlags.IS_OUTPUT, 0)
+        assert port
+        assert "manager:out" in studio.ports()
+        assert "manager:out" not in stage.ports()
+
+        fake_jack.shutdown("stage")
+        assert "stage" not in manager
+        assert manager.names() == ["studio"]
+        with pytest.raises(KeyError):
+            manager["stage"]
+
+        assert manager.open("stage") is not stage
+
+    assert list(manager) == []
+    assert b"manager" not in fake_jack.server("studio").clients
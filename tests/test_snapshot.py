@@ -0,0 +1,58 @@
+import jacklib
+from jacklib import snapshot
+
+
+def open_client(name):
+    return jacklib.client_open(name, jacklib.JackOptions.USE_EXACT_NAME, jacklib.jack_status_t())
+
+
+def add_synth(name):
+    synth = open_client(name)
+    for side in ("L", "R"):
+        jacklib.port_register(synth, "out_" + side, jacklib.JACK_DEFAULT_AUDIO_TYPE,
+                              jacklib.JackPortFlags.IS_OUTPUT, 0)
+    jacklib.set_client_property(synth, name, jacklib.JACK_METADATA_PRETTY_NAME,
+                                "Synth", "text/plain")
+    jacklib.activate(synth)
+    return synth
+
+
+def test_snapshot_roundtrip_and_restore(fake_jack, jack_client):
+    synth = add_synth("synth")
+    jacklib.activate(jack_client)
+    jacklib.connect(jack_client, "synth:out_L", "system:playback_1")
+    jacklib.connect(jack_client, "synth:out_R", "system:playback_2")
+    jacklib.port_set_alias(jacklib.port_by_name(jack_client, "synth:out_L"), "synth:left")
+    jacklib.set_port_pretty_name(jack_client, "synth:out_L", "Left")
+
+    saved = snapshot.capture(jack_client)
+    assert (b"synth:out_L", b"system:playback_1") in saved.connections
+    assert snapshot.loads(snapshot.dumps(saved)) == saved
+
+    # the synth comes back under another name, without connections
+    jacklib.client_close(synth)
+    synth = add_synth("synth-01")
+
+    result = snapshot.restore(jack_client, snapshot.loads(snapshot.dumps(saved)))
+    assert result.clients[b"synth"] == b"synth-01"
+    assert result.connected == 2
+    assert result.failed == []
+    assert list(jacklib.port_get_all_connections(
+        jack_client, jacklib.port_by_name(jack_client, "synth-01:out_L"))) == ["system:playback_1"]
+    assert jacklib.get_port_pretty_name(jack_client, "synth-01:out_L") == "Left"
+
+    # nothing left to do the second time
+    result = snapshot.restore(jack_client, saved, disconnect=True)
+    assert (result.connected, result.disconnected, result.properties) == (0, 0, 0)
+    jacklib.client_close(synth)
+
+
+def test_capture_connections_of_other_clients(fake_jack, jack_client, monkeypatch):
+    synth = add_synth("synth")
+    jacklib.connect(jack_client, "synth:out_L", "system:playback_1")
+    # JACK1 only lists the connections of the ports of the calling client
+    monkeypatch.setattr(fake_jack, "jack_port_get_connections", lambda port: None)
+
+    saved = snapshot.capture(jack_client)
+    assert saved.connections == [(b"synth:out_L", b"system:playback_1")]
+    jacklib.client_close(synth)
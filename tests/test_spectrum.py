@@ -0,0 +1,53 @@
+from ctypes import POINTER, c_float, cast
+
+import pytest
+
+import jacklib
+
+np = pytest.importorskip("numpy")
+
+from jacklib.spectrum import SpectrumAnalyzer, band_edges  # noqa: E402
+
+
+def test_band_edges():
+    edges = band_edges(4096, 48000, bands_per_octave=3, min_freq=20.0)
+    assert edges[-1] == 2049
+    assert np.all(np.diff(edges) > 0)
+    # bands below the bin width are merged
+    assert edges[0] == 2
+
+
+def test_spectrum_analyzer_sine(fake_jack, jack_client):
+    rate = jacklib.get_sample_rate(jack_client)
+    gen = jacklib.client_open("gen", jacklib.JackOptions.NULL, jacklib.jack_status_t())
+    gen_out = jacklib.port_register(gen, "out", jacklib.JACK_DEFAULT_AUDIO_TYPE,
+                                    jacklib.JackPortFlags.IS_OUTPUT, 0)
+    in_, silent = (jacklib.port_register(jack_client, name, jacklib.JACK_DEFAULT_AUDIO_TYPE,
+                                         jacklib.JackPortFlags.IS_INPUT, 0)
+                   for name in ("in", "silent"))
+    frame = [0]
+
+    def generate(nframes, arg):
+        t = (frame[0] + np.arange(nframes)) / rate
+        buf = cast(jacklib.port_get_buffer(gen_out, nframes), POINTER(c_float * nframes))
+        np.ctypeslib.as_array(buf.contents)[:] = 0.5 * np.sin(2 * np.pi * 1000.0 * t)
+        frame[0] += nframes
+        return 0
+
+    analyzer = SpectrumAnalyzer(jack_client, [in_, silent], display_rate=20.0)
+    assert analyzer.read().shape == (2, len(analyzer.frequencies))
+    assert np.all(analyzer.read() == -200.0)
+
+    analyzer.register()
+    jacklib.set_process_callback(gen, generate, None)
+    jacklib.activate(gen)
+    jacklib.activate(jack_client)
+    jacklib.connect(gen, "gen:out", "pyjacklib:in")
+    fake_jack.run_cycles(rate // jacklib.get_buffer_size(jack_client) // 4)
+
+    levels = analyzer.read()
+    band = np.argmin(np.abs(np.log(analyzer.frequencies / 1000.0)))
+    assert levels[0, band] == pytest.approx(-6.02, abs=0.2)
+    assert np.max(np.delete(levels[0], [band - 1, band, band + 1])) < -40.0
+    # silent port
+    assert np.all(levels[1] < -150.0)
@@ -0,0 +1,20 @@
+import threading
+
+import jacklib
+from jacklib.threads import ThreadAffinity, available_cpus, other_cpus, thread_cpu_time
+
+
+def test_thread_affinity(fake_jack, jack_client):
+    # keep the current affinity, the fake backend calls the
+    # thread init callback in the thread calling activate()
+    cpus = available_cpus()
+    affinity = ThreadAffinity(cpus)
+    assert affinity.register(jack_client) == 0
+    jacklib.activate(jack_client)
+
+    [info] = affinity.threads
+    assert info.native_id == threading.get_native_id()
+    assert set(info.cpus or cpus) == cpus
+    assert list(affinity.cpu_times()) == [info.native_id]
+    assert thread_cpu_time(info.native_id) > 0
+    assert other_cpus(cpus) == cpus
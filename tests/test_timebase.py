@@ -0,0 +1,93 @@
+from ctypes import pointer
+
+import pytest
+
+import jacklib
+from jacklib.timebase import BBTTimebase, TempoChange
+
+
+def test_bbt_beat_boundaries_three_four():
+    timebase = BBTTimebase(48000, beats_per_minute=60, beats_per_bar=3, beat_type=4)
+    assert timebase.bbt(0) == (1, 1, 0, 0.0)
+    assert timebase.bbt(72000)[:3] == (1, 2, 960)
+    assert timebase.bbt(96000)[:3] == (1, 3, 0)
+    assert timebase.bbt(144000) == (2, 1, 0, 3 * 1920.0)
+    assert timebase.bbt(143999)[:3] == (2, 1, 0)
+    assert timebase.bbt(143970)[:3] == (1, 3, 1919)
+
+
+def test_bbt_beat_onsets_seven_eight():
+    timebase = BBTTimebase(48000, beats_per_minute=140, beats_per_bar=7, beat_type=8)
+    frames_per_beat = 48000 * 60 / 140
+    for n in range(2000):
+        bar, beat, tick, bar_start_tick = timebase.bbt(int(n * frames_per_beat))
+        assert (bar, beat, tick) == (n // 7 + 1, n % 7 + 1, 0)
+        assert bar_start_tick == (n // 7) * 7 * 1920.0
+
+
+def test_tempo_map_segments():
+    timebase = BBTTimebase(48000)
+    timebase.set_tempo_map([TempoChange(0, 120, 4, 4), TempoChange(96000, 60, 3, 4)])
+    timebase._apply_pending(0)
+    # 120 bpm 4/4 for 4 beats, then 60 bpm 3/4
+    assert timebase.bbt(96000)[:3] == (2, 1, 0)
+    assert timebase.bbt(96000 + 3 * 48000)[:3] == (3, 1, 0)
+
+
+def test_repeated_tempo_changes():
+    timebase = BBTTimebase(48000, beats_per_minute=120)
+    timebase.set_tempo(60)
+    timebase._apply_pending(48000)
+    timebase.set_tempo(240, 3)
+    timebase._apply_pending(96000)
+
+    assert len(timebase._segments) == 3
+    # 2 beats at 120 bpm, 1 at 60 bpm, then 3/4 at 240 bpm,
+    # which makes the 4th beat the first one of bar 2
+    assert timebase.bbt(48000)[:3] == (1, 3, 0)
+    assert timebase.bbt(96000 - 1)[:3] == (1, 4, 0)
+    assert timebase.bbt(96000)[:3] == (2, 1, 0)
+    assert timebase.bbt(108000)[:3] == (2, 2, 0)
+    # earlier segments are kept
+    assert timebase.bbt(24000)[:3] == (1, 2, 0)
+
+    # a change at the frame of the last one replaces it
+    timebase.set_tempo(120)
+    timebase._apply_pending(96000)
+    assert len(timebase._segments) == 3
+    assert timebase.bbt(96000 + 24000)[:3] == (2, 2, 0)
+    assert timebase.bbt(96000 + 48000)[:3] == (2, 3, 0)
+
+
+def test_set_tempo_while_rolling(fake_jack, jack_client):
+    timebase = BBTTimebase(jacklib.get_sample_rate(jack_client), beats_per_bar=6, beat_type=8)
+    jacklib.activate(jack_client)
+    assert timebase.register(jack_client) == 0
+    jacklib.transport_start(jack_client)
+    position = jacklib.jack_position_t()
+
+    for bpm in (100, 90, 180):
+        timebase.set_tempo(bpm)
+        fake_jack.run_cycles(3)
+        jacklib.transport_query(jack_client, pointer(position))
+        assert position.beats_per_minute == bpm
+        assert position.beats_per_bar == 6 and position.beat_type == 8
+        assert (position.bar, position.beat, position.tick) == timebase.bbt(position.frame)[:3]
+
+    # the first change, at frame 0, replaced the initial tempo
+    assert len(timebase._segments) == 3
+    assert timebase.bbt(0) == (1, 1, 0, 0.0)
+
+
+@pytest.mark.parametrize("frame", [0, 1, 47999, 48000, 1234567])
+def test_bbt_fields_in_range(frame):
+    timebase = BBTTimebase(44100, beats_per_minute=133, beats_per_bar=5, beat_type=4)
+    bar, beat, tick, bar_start_tick = timebase.bbt(frame)
+    assert bar >= 1 and 1 <= beat <= 5 and 0 <= tick < 1920
+
+
+def test_register_without_timebase_support(fake_jack, jack_client, monkeypatch):
+    monkeypatch.setattr(fake_jack, "jack_set_timebase_callback", None)
+    timebase = BBTTimebase(jacklib.get_sample_rate(jack_client))
+    assert timebase.register(jack_client) == -1
+    assert timebase.release() == -1